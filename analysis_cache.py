@@ -0,0 +1,224 @@
+"""
+Content-addressed cache for GPT-4o sentiment analysis results
+
+Entries are keyed on a hash of the normalized journal text plus the
+prompt/model version, so re-saving an unchanged (or whitespace-only edited)
+entry never pays for a second OpenAI round trip.
+
+Two tiers:
+- an in-process LRU with TTL and size-based eviction
+- a persistent table (SQLite `analysis_cache` locally, Supabase in cloud mode)
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_content(text):
+    """Normalize text so cosmetic edits map to the same cache key"""
+    text = unicodedata.normalize('NFC', text or '')
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def content_key(text, version):
+    """Stable cache key for a piece of journal text under a prompt/model version"""
+    payload = f"{version}\x00{normalize_content(text)}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry TTL"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self.expirations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheStore:
+    """Persistent cache tier backed by the local SQLite database"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+
+    def get(self, key, max_age):
+        db = self._get_db()
+        try:
+            row = db.execute(
+                'SELECT result, created_at FROM analysis_cache WHERE cache_key = ?',
+                (key,)
+            ).fetchone()
+        finally:
+            db.close()
+        if row is None or row['created_at'] < time.time() - max_age:
+            return None
+        return json.loads(row['result'])
+
+    def set(self, key, version, value):
+        db = self._get_db()
+        try:
+            db.execute(
+                'INSERT OR REPLACE INTO analysis_cache (cache_key, version, result, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, version, json.dumps(value), time.time())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class SupabaseCacheStore:
+    """Persistent cache tier backed by the Supabase `analysis_cache` table"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, key, max_age):
+        result = self._client.table('analysis_cache')\
+            .select('result, created_at')\
+            .eq('cache_key', key)\
+            .limit(1)\
+            .execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        if float(row['created_at']) < time.time() - max_age:
+            return None
+        value = row['result']
+        return json.loads(value) if isinstance(value, str) else value
+
+    def set(self, key, version, value):
+        self._client.table('analysis_cache').upsert({
+            'cache_key': key,
+            'version': version,
+            'result': value,
+            'created_at': time.time()
+        }).execute()
+
+
+class AnalysisCache:
+    """Two-tier cache in front of an expensive analysis function"""
+
+    def __init__(self, version, max_entries=1024, ttl_seconds=3600,
+                 store=None, persist_ttl_seconds=30 * 24 * 3600):
+        self.version = version
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self.store = store
+        self.persist_ttl_seconds = persist_ttl_seconds
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.store_errors = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, text):
+        return content_key(text, self.version)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, text):
+        """Return a cached analysis for `text`, or None on a miss"""
+        key = self.key_for(text)
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return dict(value)
+
+        if self.store is not None:
+            try:
+                value = self.store.get(key, self.persist_ttl_seconds)
+            except Exception as e:
+                self._count('store_errors')
+                print(f"[WARN] Analysis cache read failed: {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self._count('persistent_hits')
+                return dict(value)
+
+        self._count('misses')
+        return None
+
+    def set(self, text, value):
+        """Store an analysis result in both tiers"""
+        key = self.key_for(text)
+        self.memory.set(key, dict(value))
+        if self.store is not None:
+            try:
+                self.store.set(key, self.version, value)
+            except Exception as e:
+                self._count('store_errors')
+                print(f"[WARN] Analysis cache write failed: {e}")
+
+    def get_or_compute(self, text, compute):
+        """Return the cached analysis or compute, cache and return it"""
+        value = self.get(text)
+        if value is not None:
+            return value
+        value = compute(text)
+        self.set(text, value)
+        return value
+
+    def stats(self):
+        hits = self.memory_hits + self.persistent_hits
+        lookups = hits + self.misses
+        return {
+            'version': self.version,
+            'memory_hits': self.memory_hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'memory_size': len(self.memory),
+            'memory_capacity': self.memory.max_entries,
+            'evictions': self.memory.evictions,
+            'expirations': self.memory.expirations,
+            'store_errors': self.store_errors,
+            'persistent': self.store is not None
+        }
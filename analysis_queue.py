@@ -0,0 +1,141 @@
+"""
+Background worker pool for journal entry analysis
+
+Entries are stored immediately with analysis_status='pending' and their
+(entry_id, content) pair is queued here. Worker threads run the handler,
+which performs the GPT-4o analysis and writes the results back to the row.
+Jobs are keyed by entry and content hash: resubmitting the same text is a
+no-op, while an edited text is queued again and supersedes the older job
+(whose result is not retained; the handler's write-back is guarded by the
+content, so it cannot land on the edited row either).
+"""
+
+import hashlib
+import queue
+import threading
+import time
+
+from analysis_cache import LRUCache
+
+
+class AnalysisQueue:
+    """Bounded job queue drained by a fixed pool of daemon worker threads"""
+
+    def __init__(self, handler, workers=2, max_depth=100, result_ttl_seconds=600):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.results = LRUCache(max_entries=max(max_depth, 256), ttl_seconds=result_ttl_seconds)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queue = queue.Queue(maxsize=max_depth)
+        # entry id -> hash of the newest content queued or running for it
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        """Spawn the worker threads (idempotent)"""
+        if self.running:
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'analysis-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=5.0):
+        """Ask workers to exit once the queue drains"""
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def submit(self, entry_id, content, block=False, timeout=None):
+        """
+        Queue an entry for analysis.
+        Returns False when the queue is full so the caller can fall back to
+        synchronous analysis instead of dropping the job.
+        """
+        key = str(entry_id)
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        with self._lock:
+            previous = self._in_flight.get(key)
+            if previous == digest:
+                return True
+            self._in_flight[key] = digest
+        try:
+            self._queue.put((key, content, digest), block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                if self._in_flight.get(key) == digest:
+                    if previous is None:
+                        del self._in_flight[key]
+                    else:
+                        self._in_flight[key] = previous
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def is_pending(self, entry_id):
+        with self._lock:
+            return str(entry_id) in self._in_flight
+
+    def result(self, entry_id):
+        """Most recent analysis produced for an entry, if still retained"""
+        return self.results.get(str(entry_id))
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            entry_id, content, digest = job
+            try:
+                analysis = self.handler(entry_id, content)
+                with self._lock:
+                    # Superseded by a newer submit for an edited text: keep nothing
+                    if analysis is not None and self._in_flight.get(entry_id) == digest:
+                        self.results.set(entry_id, analysis)
+                    self.completed += 1
+            except Exception as e:
+                print(f"[ERROR] Analysis job for entry {entry_id} failed: {e}")
+                with self._lock:
+                    self.failed += 1
+            finally:
+                with self._lock:
+                    if self._in_flight.get(entry_id) == digest:
+                        del self._in_flight[entry_id]
+                self._queue.task_done()
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'running': self.running,
+            'max_depth': self.max_depth,
+            'depth': self._queue.qsize(),
+            'in_flight': len(self._in_flight),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
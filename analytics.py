@@ -0,0 +1,156 @@
+"""
+Sentiment trends and emotion statistics over arbitrary date ranges
+
+trends() turns a user's entries into compact, chart-ready arrays in one
+vectorized pass: per-day entry counts and mean sentiment (bincount), a
+trailing rolling mean and volatility (standard deviation, from cumulative
+sums), per-weekday means, emotion and theme frequency histograms and an
+emotion co-occurrence matrix (an incidence-matrix product).
+
+NumPy is imported on the first call rather than with the module, so cold
+starts that never serve analytics do not pay for it.
+"""
+
+from datetime import timedelta
+
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+PRECISION = 3
+
+
+def _round(value):
+    if value is None or value != value:
+        return None
+    return round(float(value), PRECISION)
+
+
+def _rounded(values):
+    return [_round(v) for v in values.tolist()]
+
+
+def _labels(lists):
+    """(entry positions, labels) for every label of every entry"""
+    positions = []
+    labels = []
+    for i, values in enumerate(lists):
+        for label in values or ():
+            positions.append(i)
+            labels.append(label)
+    return positions, labels
+
+
+def _ranked(labels, top):
+    """(labels, counts) of the `top` most frequent labels (ties by name)"""
+    import numpy as np
+
+    if not labels:
+        return [], []
+    names, counts = np.unique(np.array(labels, dtype=str), return_counts=True)
+    # np.unique sorts names, so a stable sort on -count breaks ties by name
+    order = np.argsort(-counts, kind='stable')[:top]
+    return names[order].tolist(), counts[order].tolist()
+
+
+def _series(day_index, scores, n, window):
+    """Per-day counts and means, trailing-window mean and volatility"""
+    import numpy as np
+
+    counts = np.bincount(day_index, minlength=n).astype(float)
+    sums = np.bincount(day_index, weights=scores, minlength=n)
+    squares = np.bincount(day_index, weights=scores * scores, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily_mean = sums / counts
+
+        # Trailing window over days: differences of cumulative sums
+        def rolled(values):
+            cumulative = np.concatenate(([0.0], np.cumsum(values)))
+            lower = np.maximum(np.arange(1, n + 1) - window, 0)
+            return cumulative[1:] - cumulative[lower]
+
+        window_counts = rolled(counts)
+        window_mean = rolled(sums) / window_counts
+        variance = np.maximum(rolled(squares) / window_counts - window_mean * window_mean, 0.0)
+        volatility = np.where(window_counts >= 2, np.sqrt(variance), np.nan)
+    return counts.astype(int).tolist(), daily_mean, window_mean, volatility
+
+
+def _weekdays(day_numbers, scores):
+    import numpy as np
+
+    weekday = (day_numbers + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    counts = np.bincount(weekday, minlength=7)
+    sums = np.bincount(weekday, weights=scores, minlength=7)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return counts.tolist(), sums / counts
+
+
+def _cooccurrence(positions, labels, vocabulary, entries):
+    """Entries containing both labels, for every pair of `vocabulary` labels"""
+    import numpy as np
+
+    index = {label: i for i, label in enumerate(vocabulary)}
+    pairs = [(p, index[label]) for p, label in zip(positions, labels) if label in index]
+    incidence = np.zeros((entries, len(vocabulary)), dtype=np.int32)
+    if pairs:
+        rows, columns = np.array(pairs).T
+        incidence[rows, columns] = 1
+    return (incidence.T @ incidence).tolist()
+
+
+def trends(rows, start, end, window=7, top=10):
+    """
+    Chart-ready statistics for entries created between `start` and `end` (dates, inclusive)
+    rows need created_at, sentiment_score, emotions and key_themes
+    """
+    import numpy as np
+
+    n = (end - start).days + 1
+    day_labels = [(start + timedelta(days=i)).isoformat() for i in range(n)]
+
+    # Column arrays for the entries inside the range
+    created = [str(row['created_at'])[:10] for row in rows]
+    first, last = start.isoformat(), end.isoformat()
+    keep = [i for i, day in enumerate(created) if first <= day <= last]
+    if len(keep) != len(rows):
+        rows = [rows[i] for i in keep]
+        created = [created[i] for i in keep]
+    total = len(rows)
+    scores = np.array([float(row['sentiment_score'] or 0.0) for row in rows], dtype=float)
+    day_numbers = np.array(created, dtype='datetime64[D]').astype(np.int64)
+    day_index = day_numbers - np.datetime64(start, 'D').astype(np.int64)
+
+    counts, daily_mean, window_mean, volatility = _series(day_index, scores, n, window)
+    weekday_counts, weekday_mean = _weekdays(day_numbers, scores)
+
+    emotion_positions, emotions = _labels(row.get('emotions') for row in rows)
+    _, themes = _labels(row.get('key_themes') for row in rows)
+    emotion_labels, emotion_counts = _ranked(emotions, top)
+    theme_labels, theme_counts = _ranked(themes, top)
+
+    return {
+        'range': {'start': first, 'end': last, 'days': n, 'window': window},
+        'summary': {
+            'entries': total,
+            'avg_sentiment': _round(scores.mean()) if total else None,
+            'volatility': _round(scores.std()) if total >= 2 else None,
+            'positive_share': _round((scores > POSITIVE_THRESHOLD).mean()) if total else None,
+            'negative_share': _round((scores < NEGATIVE_THRESHOLD).mean()) if total else None
+        },
+        'days': day_labels,
+        'entry_counts': counts,
+        'daily_mean': _rounded(daily_mean),
+        'rolling_mean': _rounded(window_mean),
+        'rolling_volatility': _rounded(volatility),
+        'weekdays': {
+            'labels': WEEKDAYS,
+            'counts': weekday_counts,
+            'mean': _rounded(weekday_mean)
+        },
+        'emotions': {'labels': emotion_labels, 'counts': emotion_counts},
+        'themes': {'labels': theme_labels, 'counts': theme_counts},
+        'cooccurrence': {
+            'labels': emotion_labels,
+            'matrix': _cooccurrence(emotion_positions, emotions, emotion_labels, total)
+        }
+    }
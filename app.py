@@ -1,12 +1,39 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context, make_response
 from functools import wraps
 import os
 import json
+import hashlib
 from datetime import datetime, timedelta
 import secrets
+import atexit
 import sqlite3
+import threading
+import time
 from dotenv import load_dotenv
 
+from analysis_cache import AnalysisCache, SQLiteCacheStore, SupabaseCacheStore
+from analysis_queue import AnalysisQueue
+import local_sentiment
+import daily_stats
+import analytics
+import data_version
+import pagination
+import search_index
+import export_stream
+import import_stream
+from db_pool import ConnectionPool
+import storage
+import metrics
+import clients
+import resilience
+import compression
+import assets
+import report_stream
+import chat_intents
+from chat_context import ChatContextCache
+from openai_gateway import OpenAIGateway
+from report_cache import WeeklyReportCache, SQLiteReportStore, SupabaseReportStore, entries_fingerprint
+
 # Load environment variables
 load_dotenv()
 
@@ -26,41 +53,86 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-# Debug logging
-print(f"[DEBUG] MODE: {MODE}")
-print(f"[DEBUG] VERCEL detected: {IS_VERCEL}")
-print(f"[DEBUG] SUPABASE_URL configured: {bool(SUPABASE_URL)}")
-print(f"[DEBUG] SUPABASE_KEY configured: {bool(SUPABASE_KEY)}")
+# Outbound call policies: per-call timeouts within a per-request budget,
+# jittered retries for idempotent calls and a circuit breaker per upstream
+REQUEST_BUDGET_SECONDS = float(os.getenv('REQUEST_BUDGET_SECONDS', '25'))
+SUPABASE_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '5'))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '20'))
+
+def _circuit_breaker(name):
+    return resilience.CircuitBreaker(
+        name,
+        error_rate=float(os.getenv('CIRCUIT_ERROR_RATE', '0.5')),
+        min_calls=int(os.getenv('CIRCUIT_MIN_CALLS', '10')),
+        window=int(os.getenv('CIRCUIT_WINDOW_SECONDS', '30')),
+        cooldown=float(os.getenv('CIRCUIT_COOLDOWN_SECONDS', '15'))
+    )
+
+supabase_upstream = resilience.Upstream(
+    'supabase',
+    timeout=SUPABASE_TIMEOUT,
+    retries=int(os.getenv('SUPABASE_RETRIES', '2')),
+    # Reads only: table selects and the search/rollup RPCs
+    idempotent=lambda operation: operation.endswith('.select') or operation.startswith('rpc.'),
+    breaker=_circuit_breaker('supabase')
+)
+openai_upstream = resilience.Upstream(
+    'openai',
+    timeout=OPENAI_TIMEOUT,
+    retries=int(os.getenv('OPENAI_RETRIES', '1')),
+    # Completions have no side effects; the SDK's own retries are turned off
+    idempotent=lambda operation: True,
+    timeout_kwarg=True,
+    breaker=_circuit_breaker('openai')
+)
 
 # Initialize clients based on mode
+# Clients are built on first use so cold starts skip importing supabase/openai
 supabase = None
 openai_client = None
 
 if MODE == 'cloud':
     if not SUPABASE_URL or not SUPABASE_KEY:
         print(f"[ERROR] Missing Supabase configuration. URL: {bool(SUPABASE_URL)}, KEY: {bool(SUPABASE_KEY)}")
+    elif clients.is_installed('supabase'):
+        supabase = metrics.trace_supabase(
+            clients.LazyClient(clients.supabase_factory(SUPABASE_URL, SUPABASE_KEY, SUPABASE_TIMEOUT), 'Supabase'),
+            upstream=supabase_upstream
+        )
+        print("[OK] Using Supabase (Cloud Mode)")
     else:
-        try:
-            from supabase import create_client, Client
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-            print("[OK] Using Supabase (Cloud Mode)")
-        except Exception as e:
-            print(f"[ERROR] Supabase client creation failed: {e}")
-            # On Vercel, we MUST stay in cloud mode to avoid SQLite permission errors
-            if not IS_VERCEL:
-                print("[INFO] Falling back to local mode")
-                MODE = 'local'
+        print("[ERROR] Supabase client creation failed: supabase package is not installed")
+        # On Vercel, we MUST stay in cloud mode to avoid SQLite permission errors
+        if not IS_VERCEL:
+            print("[INFO] Falling back to local mode")
+            MODE = 'local'
 
 # Always define database path for local mode
 DATABASE = 'journal.db'
 
+# Connections are reused per thread (WAL, synchronous=NORMAL, page cache, mmap)
+db_pool = ConnectionPool(
+    os.path.abspath(DATABASE),
+    max_connections=int(os.getenv('SQLITE_POOL_SIZE', '8')),
+    cache_kib=int(os.getenv('SQLITE_CACHE_KIB', '16384')),
+    mmap_bytes=int(os.getenv('SQLITE_MMAP_MB', '64')) * 1024 * 1024
+)
+atexit.register(db_pool.close_all)
+
 def get_db():
-    """Get database connection"""
-    # Ensure database file exists and is writable
-    db_path = os.path.abspath(DATABASE)
-    db = sqlite3.connect(db_path, check_same_thread=False)
-    db.row_factory = sqlite3.Row
-    return db
+    """Get database connection (pooled; close() returns it to the pool)"""
+    return db_pool.acquire()
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    """Hand back a connection a request forgot to close"""
+    db_pool.release_thread()
+
+def ensure_column(db, table, column, definition):
+    """Add a column to an existing SQLite table if it is missing"""
+    columns = {row['name'] for row in db.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
 
 def init_db():
     """Initialize the database"""
@@ -81,31 +153,252 @@ def init_db():
             sentiment_score REAL NOT NULL,
             emotions TEXT DEFAULT '[]',
             key_themes TEXT DEFAULT '[]',
+            analysis_status TEXT NOT NULL DEFAULT 'complete',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    # Bring databases created by older versions up to date
+    ensure_column(db, 'journal_entries', 'updated_at', 'TIMESTAMP')
+    ensure_column(db, 'journal_entries', 'analysis_status', "TEXT NOT NULL DEFAULT 'complete'")
+    # Keyset pagination index: each page is a range scan on (user_id, created_at, id)
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_user_created_id
+        ON journal_entries (user_id, created_at DESC, id DESC)
+    ''')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_pending
+        ON journal_entries (analysis_status) WHERE analysis_status = 'pending'
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            cache_key TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS weekly_reports (
+            user_id TEXT NOT NULL,
+            window_start TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            report TEXT NOT NULL,
+            generated_at REAL NOT NULL,
+            PRIMARY KEY (user_id, window_start)
+        )
+    ''')
+    # Per-user daily rollup kept current by triggers on journal_entries
+    daily_stats.install_sqlite(db)
+    # Per-user data versions behind the ETags of read endpoints
+    data_version.install_sqlite(db)
+    # FTS5 full-text index over entry content, synced by triggers
+    search_index.install_sqlite(db)
     db.commit()
     db.close()
 
+# Storage backend for entries and local accounts: supabase | sqlite | memory
+# ('memory' keeps everything in process, e.g. for benchmarks; nothing is persisted)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', '').lower() or ('supabase' if MODE == 'cloud' else 'sqlite')
+
 # Initialize database ONLY in local mode
-if MODE == 'local':
+if MODE == 'local' and STORAGE_BACKEND == 'sqlite':
     print("[OK] Initializing SQLite (Local Mode)")
     init_db()
 else:
-    print("[OK] Skipping SQLite initialization in cloud mode")
+    print(f"[OK] Skipping SQLite initialization ({STORAGE_BACKEND} storage)")
+
+if STORAGE_BACKEND == 'memory':
+    entry_store = storage.MemoryEntries()
+    user_store = storage.MemoryUsers()
+elif STORAGE_BACKEND == 'sqlite':
+    entry_store = storage.SQLiteEntries(get_db)
+    user_store = storage.SQLiteUsers(get_db)
+else:
+    # Cloud accounts go through Supabase Auth
+    entry_store = storage.SupabaseEntries(supabase) if supabase else None
+    user_store = None
+    if entry_store is None:
+        print("[ERROR] Supabase storage selected but no Supabase client is available")
 
 # Initialize OpenAI if API key is available
 if OPENAI_API_KEY and OPENAI_API_KEY.startswith('sk-'):
-    try:
-        from openai import OpenAI
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    if clients.is_installed('openai'):
+        # Coalescing, requests/tokens-per-minute budgets and a cap on in-flight calls
+        # Retries run in the gateway, outside admission, so each attempt is rate limited
+        openai_client = OpenAIGateway(
+            metrics.trace_openai(
+                clients.LazyClient(clients.openai_factory(OPENAI_API_KEY, OPENAI_TIMEOUT, max_retries=0), 'OpenAI')
+            ),
+            rpm=int(os.getenv('OPENAI_RPM', '500')),
+            tpm=int(os.getenv('OPENAI_TPM', '30000')),
+            max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', '8')),
+            max_wait=float(os.getenv('OPENAI_MAX_QUEUE_WAIT', '30')),
+            upstream=openai_upstream
+        )
         print("[OK] Using GPT-4o for AI analysis")
-    except Exception as e:
-        print(f"[WARN] OpenAI initialization failed: {e}")
-        openai_client = None
+    else:
+        print("[WARN] OpenAI initialization failed: openai package is not installed")
+
+# Content-addressed cache for sentiment analysis results
+# Bump ANALYSIS_PROMPT_VERSION whenever the analysis prompt changes
+ANALYSIS_MODEL = 'gpt-4o'
+ANALYSIS_PROMPT_VERSION = 'v1'
+
+_analysis_cache_store = None
+if os.getenv('ANALYSIS_CACHE_PERSIST', 'true').lower() == 'true':
+    # The shared cache table is server-only: written with the service role key, never a user's session
+    SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
+    if STORAGE_BACKEND == 'supabase' and supabase and SUPABASE_SERVICE_KEY:
+        _analysis_cache_store = SupabaseCacheStore(metrics.trace_supabase(
+            clients.LazyClient(
+                clients.supabase_factory(SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_TIMEOUT),
+                'Supabase (service role)'
+            ),
+            upstream=supabase_upstream
+        ))
+    elif STORAGE_BACKEND == 'sqlite':
+        _analysis_cache_store = SQLiteCacheStore(get_db)
+
+analysis_cache = AnalysisCache(
+    version=f"{ANALYSIS_MODEL}:{ANALYSIS_PROMPT_VERSION}",
+    max_entries=int(os.getenv('ANALYSIS_CACHE_SIZE', '1024')),
+    ttl_seconds=int(os.getenv('ANALYSIS_CACHE_TTL', '3600')),
+    store=_analysis_cache_store,
+    persist_ttl_seconds=int(os.getenv('ANALYSIS_CACHE_PERSIST_TTL', str(30 * 24 * 3600)))
+)
+
+# Asynchronous analysis: store entries as 'pending' and analyze in a worker pool
+# Disabled on Vercel, where background threads do not outlive the request
+ANALYSIS_ASYNC = os.getenv('ANALYSIS_ASYNC', 'false').lower() == 'true' and not IS_VERCEL
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+ANALYSIS_QUEUE_SIZE = int(os.getenv('ANALYSIS_QUEUE_SIZE', '100'))
+ANALYSIS_MAX_RETRIES = int(os.getenv('ANALYSIS_MAX_RETRIES', '2'))
+
+# Analysis engine: 'gpt' (GPT-4o only), 'local' (rule-based only) or
+# 'tiered' (local first, escalate to GPT-4o when confidence is low)
+ANALYSIS_ENGINE = os.getenv('ANALYSIS_ENGINE', 'gpt').lower()
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv('LOCAL_CONFIDENCE_THRESHOLD', '0.5'))
+
+# Per-user daily rollups (daily_user_stats) for the active backend
+if STORAGE_BACKEND == 'supabase' and supabase:
+    daily_stats_store = daily_stats.SupabaseDailyStats(supabase)
+elif STORAGE_BACKEND == 'memory':
+    daily_stats_store = daily_stats.RepositoryDailyStats(entry_store)
+else:
+    daily_stats_store = daily_stats.SQLiteDailyStats(get_db)
+
+# Materialized weekly reports, validated by a fingerprint of the week's entries
+if STORAGE_BACKEND == 'supabase' and supabase:
+    report_cache = WeeklyReportCache(SupabaseReportStore(supabase))
+elif STORAGE_BACKEND == 'sqlite':
+    report_cache = WeeklyReportCache(SQLiteReportStore(get_db))
+else:
+    report_cache = WeeklyReportCache()
+
+# Per-user chat context snapshots (bounded LRU over the daily rollup)
+chat_context = ChatContextCache(
+    daily_stats_store,
+    max_users=int(os.getenv('CHAT_CONTEXT_CACHE_SIZE', '1000')),
+    ttl_seconds=int(os.getenv('CHAT_CONTEXT_TTL', '300'))
+)
+
+
+# Per-user data versions (bumped by every entry write) for ETags / 304 responses
+if STORAGE_BACKEND == 'supabase' and supabase:
+    _data_version_store = data_version.SupabaseVersions(supabase)
+elif STORAGE_BACKEND == 'memory':
+    _data_version_store = data_version.MemoryVersions()
+else:
+    _data_version_store = data_version.SQLiteVersions(get_db)
+
+data_versions = data_version.VersionCache(
+    _data_version_store,
+    ttl_seconds=float(os.getenv('DATA_VERSION_TTL', '5'))
+)
+
+
+def invalidate_user_caches(user_id):
+    """Drop derived per-user data after a journal write"""
+    data_versions.invalidate(user_id)
+    chat_context.invalidate(user_id)
+    report_cache.invalidate(user_id)
+
+# Per-request timing: Server-Timing header plus Prometheus counters/histograms
+def _route_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def start_request_timing():
+    metrics.begin_request()
+    resilience.begin_request(REQUEST_BUDGET_SECONDS)
+
+@app.after_request
+def add_server_timing(response):
+    resilience.end_request()
+    timings = metrics.end_request()
+    if timings is not None:
+        route = _route_label()
+        response.headers['Server-Timing'] = timings.header()
+        metrics.http_latency.observe(time.perf_counter() - timings.started, route, request.method)
+        metrics.http_requests.inc(route, request.method, response.status_code)
+    return response
+
+@app.teardown_request
+def count_request_exception(exception=None):
+    if exception is not None:
+        metrics.http_exceptions.inc(_route_label())
+
+# Response compression (gzip, or brotli when installed) for text and JSON bodies
+COMPRESS_RESPONSES = os.getenv('COMPRESS_RESPONSES', 'true').lower() == 'true'
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
 
+@app.after_request
+def compress_response(response):
+    if (not COMPRESS_RESPONSES or response.status_code in (204, 304) or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in compression.COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = compression.negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        # Exports: compressed chunk by chunk, never buffered (live streams flush every chunk)
+        response.response = compression.compress_stream(
+            response.response, encoding, flush=response.headers.get('X-Accel-Buffering') == 'no'
+        )
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        response.set_data(compression.compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Fingerprinted static assets: templates link asset_url('css/style.css')
+asset_manifest = assets.AssetManifest(app.static_folder)
+
+def asset_url(filename):
+    return url_for('static', filename=asset_manifest.url_path(filename))
+
+app.jinja_env.globals['asset_url'] = asset_url
+
+@app.route('/static/dist/<path:filename>')
+def fingerprinted_asset(filename):
+    """Hashed asset names never change content, so they are cached for a year"""
+    asset = asset_manifest.body(filename, request.accept_encodings)
+    if asset is None:
+        return 'Not Found', 404
+    body, encoding, mimetype = asset
+    response = Response(body, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = assets.IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
 
 # Authentication decorator
 def login_required(f):
@@ -116,6 +409,38 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def conditional_get(f):
+    """
+    ETag a read endpoint with the user's data version; a matching If-None-Match
+    is answered with 304 before the route queries the backend
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session['user']['id']
+        try:
+            # Revalidations read the store: a cached version can miss other workers' writes
+            version = data_versions.get(user_id, fresh=bool(request.if_none_match))
+        except Exception as e:
+            print(f"[WARN] Data version lookup failed: {e}")
+            return f(*args, **kwargs)
+        
+        # The date is part of the tag because 'last 7/30 days' windows move daily
+        key = f"{user_id}:{version}:{datetime.utcnow().date()}:{request.full_path}"
+        etag = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            # Errors and responses marked no-store (e.g. fallback reports) are not tagged
+            if response.status_code != 200 or 'no-store' in response.headers.get('Cache-Control', ''):
+                return response
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Cookie')
+        return response
+    return decorated_function
+
 @app.route('/')
 def index():
     if 'user' in session:
@@ -161,10 +486,7 @@ def login():
             
             # Local SQLite authentication
             if MODE == 'local':
-                db = get_db()
-                user = db.execute('SELECT * FROM users WHERE email = ? AND password = ?', 
-                                (email, password)).fetchone()
-                db.close()
+                user = user_store.authenticate(email, password)
                 
                 if user:
                     session['user'] = {
@@ -237,27 +559,15 @@ def signup():
                     
                     return jsonify({'success': False, 'error': error_msg}), 500
                 
-                db = None
                 try:
-                    db = get_db()
-                    cursor = db.cursor()
-                    cursor.execute('INSERT INTO users (email, password) VALUES (?, ?)', 
-                              (email, password))
-                    db.commit()
+                    user_store.create(email, password)
                     
                     return jsonify({'success': True, 'message': 'Account created! Please log in.'})
-                except sqlite3.IntegrityError:
-                    if db:
-                        db.rollback()
+                except storage.DuplicateUserError:
                     return jsonify({'success': False, 'error': 'Email already exists'}), 400
                 except sqlite3.OperationalError as e:
-                    if db:
-                        db.rollback()
                     print(f"[ERROR] Database operational error: {e}")
                     return jsonify({'success': False, 'error': 'Database error. Vercel detected? Ensure MODE=cloud is set.'}), 500
-                finally:
-                    if db:
-                        db.close()
             else:
                 return jsonify({'success': False, 'error': 'Database not configured or unauthorized.'}), 500
         except Exception as e:
@@ -307,26 +617,35 @@ def create_journal_entry():
         return jsonify({'error': 'Content is required'}), 400
     
     try:
-        # Real GPT-4o sentiment analysis (The "Brain")
-        sentiment_analysis = analyze_sentiment_gpt4o(content)
-        
-        # Insert into Supabase with RLS (The "Vault")
         user_id = session['user']['id']
         
+        # Async mode: store the entry right away and analyze it in the background
+        # (cached analyses are still applied inline since they cost nothing)
+        if ANALYSIS_ASYNC and analysis_queue.running:
+            sentiment_analysis = analyze_locally(content) or analysis_cache.get(content)
+            if sentiment_analysis is None:
+                return create_pending_journal_entry(user_id, content)
+        else:
+            # Real GPT-4o sentiment analysis (The "Brain")
+            sentiment_analysis = analyze_sentiment_gpt4o(content)
+        
+        # Insert through the storage backend (Supabase RLS in cloud mode: The "Vault")
         entry_data = {
             'user_id': user_id,
             'content': content,
             'sentiment_score': sentiment_analysis['sentiment_score'],
             'emotions': sentiment_analysis['emotions'],
-            'key_themes': sentiment_analysis['key_themes']
+            'key_themes': sentiment_analysis['key_themes'],
+            'analysis_status': sentiment_analysis.get('analysis_status', 'complete')
         }
         
-        result = supabase.table('journal_entries').insert(entry_data).execute()
+        entry = entry_store.insert(entry_data)
         
-        if result.data:
+        if entry:
+            invalidate_user_caches(user_id)
             return jsonify({
                 'success': True,
-                'entry': result.data[0],
+                'entry': entry,
                 'analysis': sentiment_analysis
             })
         else:
@@ -336,6 +655,43 @@ def create_journal_entry():
         print(f"Create Entry Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def create_pending_journal_entry(user_id, content):
+    """Insert an entry with analysis_status='pending' and queue its analysis"""
+    entry_data = {
+        'user_id': user_id,
+        'content': content,
+        'sentiment_score': 0.0,
+        'emotions': [],
+        'key_themes': [],
+        'analysis_status': 'pending'
+    }
+    
+    entry = entry_store.insert(entry_data)
+    
+    if not entry:
+        return jsonify({'error': 'Failed to create entry'}), 500
+    
+    invalidate_user_caches(user_id)
+    
+    # Queue full: analyze inline rather than leave the entry pending
+    if not analysis_queue.submit(entry['id'], content):
+        print(f"[WARN] Analysis queue full, analyzing entry {entry['id']} inline")
+        sentiment_analysis = process_analysis_job(entry['id'], content)
+        entry.update({
+            'sentiment_score': sentiment_analysis['sentiment_score'],
+            'emotions': sentiment_analysis['emotions'],
+            'key_themes': sentiment_analysis['key_themes'],
+            'analysis_status': sentiment_analysis['analysis_status']
+        })
+        return jsonify({'success': True, 'entry': entry, 'analysis': sentiment_analysis})
+    
+    return jsonify({
+        'success': True,
+        'entry': entry,
+        'analysis_status': 'pending',
+        'analysis_url': url_for('get_entry_analysis', entry_id=entry['id'])
+    }), 202
+
 @app.route('/api/journal/update/<entry_id>', methods=['PUT'])
 @login_required
 def update_journal_entry(entry_id):
@@ -351,24 +707,22 @@ def update_journal_entry(entry_id):
         
         user_id = session['user']['id']
         
-        # Update with Supabase (RLS ensures user can only update their own entries)
+        # Scoped to the user (and RLS in cloud mode) so only their own entries change
         update_data = {
             'content': content,
             'sentiment_score': sentiment_analysis['sentiment_score'],
             'emotions': sentiment_analysis['emotions'],
-            'key_themes': sentiment_analysis['key_themes']
+            'key_themes': sentiment_analysis['key_themes'],
+            'analysis_status': sentiment_analysis.get('analysis_status', 'complete')
         }
         
-        result = supabase.table('journal_entries')\
-            .update(update_data)\
-            .eq('id', entry_id)\
-            .eq('user_id', user_id)\
-            .execute()
+        entry = entry_store.update(user_id, entry_id, update_data)
         
-        if result.data:
+        if entry:
+            invalidate_user_caches(user_id)
             return jsonify({
                 'success': True,
-                'entry': result.data[0],
+                'entry': entry,
                 'analysis': sentiment_analysis
             })
         else:
@@ -384,14 +738,11 @@ def delete_journal_entry(entry_id):
     try:
         user_id = session['user']['id']
         
-        # Delete with Supabase (RLS ensures user can only delete their own entries)
-        result = supabase.table('journal_entries')\
-            .delete()\
-            .eq('id', entry_id)\
-            .eq('user_id', user_id)\
-            .execute()
+        # Scoped to the user (and RLS in cloud mode) so only their own entries are deleted
+        deleted = entry_store.delete(user_id, entry_id)
         
-        if result.data:
+        if deleted:
+            invalidate_user_caches(user_id)
             return jsonify({
                 'success': True,
                 'message': 'Entry deleted successfully'
@@ -403,8 +754,258 @@ def delete_journal_entry(entry_id):
         print(f"Delete Entry Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Batch mutations: a list of ids (at most BATCH_MAX_IDS) or a date range / sentiment filter
+BATCH_MAX_IDS = int(os.getenv('BATCH_MAX_IDS', '500'))
+RETAG_FIELDS = ('emotions', 'key_themes')
+
+def parse_batch_selection(data):
+    """
+    (ids, filters) for a batch request: {"ids": [...]} or
+    {"filter": {"start_date", "end_date", "sentiment"}}; raises ValueError
+    """
+    ids = data.get('ids')
+    selection = data.get('filter')
+    if (ids is None) == (selection is None):
+        raise ValueError('Provide either ids or filter')
+    
+    if ids is not None:
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(i, (int, str)) and not isinstance(i, bool) for i in ids)):
+            raise ValueError('ids must be a non-empty list of entry ids')
+        if len(ids) > BATCH_MAX_IDS:
+            raise ValueError(f'At most {BATCH_MAX_IDS} ids per request')
+        return list(dict.fromkeys(str(i) for i in ids)), {}
+    
+    if not isinstance(selection, dict) or set(selection) - {'start_date', 'end_date', 'sentiment'}:
+        raise ValueError('filter accepts start_date, end_date and sentiment')
+    filters = {
+        'since': selection.get('start_date'),
+        'until': selection.get('end_date'),
+        'sentiment': selection.get('sentiment')
+    }
+    # An empty filter would select the whole journal
+    if not any(filters.values()):
+        raise ValueError('filter needs start_date, end_date or sentiment')
+    if filters['sentiment'] not in (None, 'positive', 'neutral', 'negative'):
+        raise ValueError('sentiment must be positive, neutral or negative')
+    for name in ('since', 'until'):
+        if filters[name] is not None:
+            try:
+                datetime.fromisoformat(str(filters[name]))
+            except ValueError:
+                raise ValueError('start_date/end_date must be ISO dates')
+    # end_date is inclusive: a plain date covers the whole day
+    filters['until'] = storage.exclusive_end(filters['until'])
+    return None, filters
+
+def batch_results(requested, matched, status, details=None):
+    """Per-id outcome: `status` for matched ids, 'not_found' for the rest (or matched ids only for filters)"""
+    details = details or {}
+    matched = [str(i) for i in matched]
+    found = set(matched)
+    return [
+        dict(details.get(i, {}), id=i, status=status) if i in found else {'id': i, 'status': 'not_found'}
+        for i in (requested if requested is not None else matched)
+    ]
+
+def analyze_batch_edits(texts):
+    """
+    Analyses for edited texts without calling GPT-4o inside the request: the
+    local engine or a cached result when there is one, otherwise the local
+    fallback marked 'pending' (queued for the async workers after saving) or,
+    without workers, 'failed' for backfill.py
+    """
+    queued = ANALYSIS_ASYNC and analysis_queue.running
+    analyses = []
+    for text in texts:
+        analysis = analyze_locally(text) or analysis_cache.get(text)
+        if analysis is None:
+            analysis = fallback_analysis(text)
+            if queued:
+                analysis['analysis_status'] = 'pending'
+        analyses.append(analysis)
+    return analyses
+
+def queue_batch_edits(user_id, edits):
+    """Hand saved 'pending' edits {id: content} to the analysis workers; a full queue marks the rest 'failed'"""
+    rejected = [entry_id for entry_id, content in edits.items() if not analysis_queue.submit(entry_id, content)]
+    if rejected:
+        print(f"[WARN] Analysis queue full, {len(rejected)} batch edits left for backfill")
+        entry_store.update_many(user_id, {'analysis_status': 'failed'}, ids=rejected)
+    return rejected
+
+@app.route('/api/journal/batch/delete', methods=['POST'])
+@login_required
+def batch_delete_journal_entries():
+    """Delete many entries with one statement; per-id results"""
+    try:
+        ids, filters = parse_batch_selection(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        user_id = session['user']['id']
+        deleted = entry_store.delete_many(user_id, ids, **filters)
+        
+        if deleted:
+            invalidate_user_caches(user_id)
+        return jsonify({
+            'success': True,
+            'deleted': len(deleted),
+            'results': batch_results(ids, deleted, 'deleted')
+        })
+        
+    except Exception as e:
+        print(f"Batch Delete Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def parse_batch_edits(entries):
+    """{id: content} from [{"id", "content"}, ...]; raises ValueError"""
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('entries must be a non-empty list')
+    if len(entries) > BATCH_MAX_IDS:
+        raise ValueError(f'At most {BATCH_MAX_IDS} entries per request')
+    edits = {}
+    for item in entries:
+        if not isinstance(item, dict) or item.get('id') in (None, '') or isinstance(item.get('id'), bool):
+            raise ValueError('Each entry needs an id')
+        if not isinstance(item.get('content'), str) or not item['content'].strip():
+            raise ValueError('Content is required')
+        edits[str(item['id'])] = item['content']
+    return edits
+
+def parse_retag_fields(fields):
+    """Fields for a set-based update: emotions and/or key_themes as lists of strings"""
+    if not isinstance(fields, dict) or not fields or set(fields) - set(RETAG_FIELDS):
+        raise ValueError('set accepts emotions and key_themes')
+    for name, value in fields.items():
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f'{name} must be a list of strings')
+    return fields
+
+@app.route('/api/journal/batch/update', methods=['POST'])
+@login_required
+def batch_update_journal_entries():
+    """
+    Update many entries at once; per-id results
+    {"entries": [{"id", "content"}, ...]} edits content (re-analyzed in batches);
+    ids or filter plus {"set": {"emotions", "key_themes"}} retags with one statement
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        if 'entries' in data:
+            edits = parse_batch_edits(data['entries'])
+        else:
+            edits = None
+            ids, filters = parse_batch_selection(data)
+            fields = parse_retag_fields(data.get('set'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        user_id = session['user']['id']
+        
+        if edits is not None:
+            ids = list(edits)
+            analyses = analyze_batch_edits([edits[i] for i in ids])
+            updates = {
+                entry_id: {
+                    'content': edits[entry_id],
+                    'sentiment_score': analysis['sentiment_score'],
+                    'emotions': analysis['emotions'],
+                    'key_themes': analysis['key_themes'],
+                    'analysis_status': analysis.get('analysis_status', 'complete')
+                }
+                for entry_id, analysis in zip(ids, analyses)
+            }
+            updated = entry_store.update_each(user_id, updates)
+            details = {
+                entry_id: {name: value for name, value in fields.items() if name != 'content'}
+                for entry_id, fields in updates.items()
+            }
+            # Entries without a local/cached analysis are re-analyzed by the async workers
+            pending = {
+                str(i): edits[str(i)] for i in updated if updates[str(i)]['analysis_status'] == 'pending'
+            }
+            for entry_id in queue_batch_edits(user_id, pending):
+                details[entry_id]['analysis_status'] = 'failed'
+        else:
+            updated = entry_store.update_many(user_id, fields, ids, **filters)
+            details = None
+        
+        if updated:
+            invalidate_user_caches(user_id)
+        return jsonify({
+            'success': True,
+            'updated': len(updated),
+            'results': batch_results(ids, updated, 'updated', details)
+        })
+        
+    except Exception as e:
+        print(f"Batch Update Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/journal/analysis/<entry_id>', methods=['GET'])
+@login_required
+def get_entry_analysis(entry_id):
+    """Poll the analysis status of an entry created in async mode"""
+    try:
+        user_id = session['user']['id']
+        
+        entry = entry_store.get(user_id, entry_id, 'id, analysis_status, sentiment_score, emotions, key_themes')
+        
+        if not entry:
+            return jsonify({'error': 'Entry not found or unauthorized'}), 404
+        
+        status = entry.get('analysis_status') or 'complete'
+        
+        if status == 'pending':
+            return jsonify({'entry_id': entry['id'], 'analysis_status': status, 'retry_after_ms': 1000})
+        
+        retained = analysis_queue.result(entry['id']) or {}
+        return jsonify({
+            'entry_id': entry['id'],
+            'analysis_status': status,
+            'analysis': {
+                'entry_id': entry['id'],
+                'sentiment_score': entry['sentiment_score'],
+                'emotions': entry['emotions'],
+                'key_themes': entry['key_themes'],
+                'brief_insight': retained.get('brief_insight', 'Your entry has been analyzed.')
+            }
+        })
+    except Exception as e:
+        print(f"Get Analysis Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def parse_view(value):
+    """Listing mode: 'full' rows (default) or 'summary' rows with a content preview"""
+    view = (value or 'full').lower()
+    if view not in ('full', 'summary'):
+        raise ValueError("view must be 'full' or 'summary'")
+    return view
+
+@app.route('/api/journal/entry/<entry_id>', methods=['GET'])
+@login_required
+@conditional_get
+def get_journal_entry(entry_id):
+    """Full entry, for views that list summaries and load content on demand"""
+    try:
+        user_id = session['user']['id']
+        
+        entry = entry_store.get(user_id, entry_id)
+        
+        if not entry:
+            return jsonify({'error': 'Entry not found or unauthorized'}), 404
+        
+        return jsonify({'entry': entry})
+    except Exception as e:
+        print(f"Get Entry Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/journal/search', methods=['GET'])
 @login_required
+@conditional_get
 def search_journal_entries():
     try:
         user_id = session['user']['id']
@@ -413,33 +1014,42 @@ def search_journal_entries():
         end_date = request.args.get('end_date')
         sentiment = request.args.get('sentiment')  # 'positive', 'neutral', 'negative'
         
-        # Build Supabase query (RLS automatically filters by user_id)
-        query_builder = supabase.table('journal_entries').select('*').eq('user_id', user_id)
-        
-        # Add search term
-        if query:
-            query_builder = query_builder.ilike('content', f'%{query}%')
+        terms = search_index.parse_terms(query)
         
-        # Add date range
-        if start_date:
-            query_builder = query_builder.gte('created_at', start_date)
-        
-        if end_date:
-            query_builder = query_builder.lte('created_at', end_date)
-        
-        # Add sentiment filter
-        if sentiment == 'positive':
-            query_builder = query_builder.gt('sentiment_score', 0.3)
-        elif sentiment == 'negative':
-            query_builder = query_builder.lt('sentiment_score', -0.3)
-        elif sentiment == 'neutral':
-            query_builder = query_builder.gte('sentiment_score', -0.3).lte('sentiment_score', 0.3)
+        try:
+            limit = pagination.parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            if cursor:
+                cursor = pagination.decode_ranked_cursor(cursor) if terms else pagination.decode_cursor(cursor)
+            view = parse_view(request.args.get('view'))
+            # end_date is inclusive: a plain date covers the whole day
+            end_date = storage.exclusive_end(end_date)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        result = query_builder.order('created_at', desc=True).execute()
+        # Text search: relevance-ranked full-text index with highlighted snippets
+        if terms:
+            rows = entry_store.search(user_id, terms, start_date, end_date, sentiment, limit + 1, cursor)
+            entries, next_cursor = pagination.paginate(rows, limit, pagination.encode_ranked_cursor)
+            if view == 'summary':
+                entries = [storage.to_summary(entry) for entry in entries]
+        else:
+            # Filters only: newest first, continuing after the previous page (keyset, no OFFSET)
+            rows = entry_store.range(
+                user_id,
+                since=start_date,
+                until=end_date,
+                sentiment=sentiment,
+                cursor=cursor,
+                limit=limit + 1,
+                columns=storage.SUMMARY_COLUMNS if view == 'summary' else '*'
+            )
+            entries, next_cursor = pagination.paginate(rows, limit)
         
         return jsonify({
-            'entries': result.data,
-            'count': len(result.data)
+            'entries': entries,
+            'count': len(entries),
+            'next_cursor': next_cursor
         })
     except Exception as e:
         print(f"Search Error: {e}")
@@ -447,59 +1057,248 @@ def search_journal_entries():
 
 @app.route('/api/journal/entries', methods=['GET'])
 @login_required
+@conditional_get
 def get_journal_entries():
     try:
         user_id = session['user']['id']
         
-        # Get entries for the last 30 days from Supabase
-        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
+        try:
+            limit = pagination.parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            cursor = pagination.decode_cursor(cursor) if cursor else None
+            days = int(request.args.get('days', 30))
+            view = parse_view(request.args.get('view'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        result = supabase.table('journal_entries')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .gte('created_at', thirty_days_ago)\
-            .order('created_at', desc=True)\
-            .execute()
+        # Get entries for the last 30 days (or ?days=N), newest first
+        since = (datetime.utcnow() - timedelta(days=days)).isoformat()
         
-        return jsonify({'entries': result.data})
+        # ?view=summary skips full content: preview, score and labels only
+        columns = storage.SUMMARY_COLUMNS if view == 'summary' else '*'
+        rows = entry_store.range(user_id, since=since, cursor=cursor, limit=limit + 1, columns=columns)
+        entries, next_cursor = pagination.paginate(rows, limit)
+        
+        return jsonify({'entries': entries, 'next_cursor': next_cursor})
     except Exception as e:
         print(f"Get Entries Error: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/weekly-report', methods=['GET'])
 @login_required
+@conditional_get
 def get_weekly_report():
     try:
         user_id = session['user']['id']
+        refresh = request.args.get('refresh') == '1'
         
-        # Get entries from the last 7 days from Supabase
-        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        # Get entries from the last 7 days
+        window_start = datetime.utcnow() - timedelta(days=7)
+        seven_days_ago = window_start.isoformat()
+        window_key = window_start.date().isoformat()
         
-        result = supabase.table('journal_entries')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .gte('created_at', seven_days_ago)\
-            .order('created_at', desc=False)\
-            .execute()
+        # Cheap fingerprint query first: a stored report for the same entries is served as-is
+        if not refresh:
+            keys = entry_store.range(user_id, since=seven_days_ago, columns='id, created_at, updated_at')
+            
+            if not keys:
+                return jsonify({'report': None, 'message': 'No entries found for the last week'})
+            
+            cached = report_cache.get(user_id, window_key, entries_fingerprint(keys))
+            if cached:
+                report, age = cached
+                return jsonify({'report': report, 'cached': True, 'cache_age_seconds': round(age)})
         
-        if not result.data:
+        entries = entry_store.range(user_id, since=seven_days_ago, descending=False)
+        
+        if not entries:
             return jsonify({'report': None, 'message': 'No entries found for the last week'})
         
         # Generate AI-powered report with GPT-4o
-        report = generate_weekly_report_gpt4o(result.data)
+        report = generate_weekly_report_gpt4o(entries)
+        
+        # Fallback reports are not stored (or ETagged) so the next view retries GPT-4o
+        response = jsonify({'report': report, 'cached': False, 'cache_age_seconds': 0})
+        if report.get('generated_by') != 'fallback':
+            report_cache.put(user_id, window_key, entries_fingerprint(entries), report)
+        else:
+            response.headers['Cache-Control'] = 'no-store'
         
-        return jsonify({'report': report})
+        return response
     except Exception as e:
         print(f"Weekly Report Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/weekly-report/stream', methods=['GET'])
+@login_required
+def stream_weekly_report():
+    """
+    Weekly report as Server-Sent Events
+    'stats' (local statistics) is sent as soon as the entries are loaded, then
+    'delta'/'field' events as GPT-4o writes the insights, then 'done' with the full report
+    """
+    try:
+        user_id = session['user']['id']
+        refresh = request.args.get('refresh') == '1'
+        
+        window_start = datetime.utcnow() - timedelta(days=7)
+        window_key = window_start.date().isoformat()
+        entries = entry_store.range(user_id, since=window_start.isoformat(), descending=False)
+        
+        response = Response(
+            stream_with_context(weekly_report_events(user_id, window_key, entries, refresh)),
+            mimetype='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    except Exception as e:
+        print(f"Weekly Report Stream Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def weekly_report_events(user_id, window_key, entries, refresh=False):
+    """SSE frames for stream_weekly_report"""
+    if not entries:
+        yield report_stream.sse_event('done', {'report': None, 'message': 'No entries found for the last week'})
+        return
+    
+    fingerprint = entries_fingerprint(entries)
+    cached = None if refresh else report_cache.get(user_id, window_key, fingerprint)
+    if cached:
+        report, age = cached
+        yield report_stream.sse_event('stats', {k: report.get(k) for k in ('sentiment_graph', 'best_day', 'worst_day', 'mood_distribution')})
+        yield report_stream.sse_event('done', {'report': report, 'cached': True, 'cache_age_seconds': round(age)})
+        return
+    
+    stats = weekly_report_stats(entries)
+    yield report_stream.sse_event('stats', stats)
+    
+    parser = report_stream.IncrementalJSONParser()
+    try:
+        if openai_client is None:
+            raise RuntimeError('OpenAI client is not configured')
+        
+        completion = openai_client.chat.completions.create(
+            model="gpt-4o",
+            messages=weekly_report_messages(entries, stats),
+            temperature=0.8,
+            max_tokens=500,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        for chunk in completion:
+            if getattr(chunk, 'usage', None):
+                metrics.record_usage('gpt-4o', chunk.usage)
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for kind, path, value in parser.feed(chunk.choices[0].delta.content):
+                if kind == 'delta':
+                    yield report_stream.sse_event('delta', {'path': list(path), 'text': value})
+                elif len(path) in (1, 2):
+                    yield report_stream.sse_event('field', {'path': list(path), 'value': value})
+        
+        report = assemble_weekly_report(entries, stats, parser.close(), 'gpt-4o')
+        report_cache.put(user_id, window_key, fingerprint, report)
+    except Exception as e:
+        print(f"GPT-4o Weekly Report Stream Error: {e}")
+        # Keep the statistics already sent; fallback text is not cached
+        report = assemble_weekly_report(entries, stats, {}, 'fallback')
+    
+    yield report_stream.sse_event('done', {'report': report, 'cached': False, 'cache_age_seconds': 0})
+
 def analyze_sentiment_gpt4o(text):
     """
     Real GPT-4o sentiment analysis (The "Brain")
     Performs nuanced emotional analysis beyond simple positive/negative labels
+    Results are served from the content-addressed analysis cache when possible
     """
+    local_analysis = analyze_locally(text)
+    if local_analysis is not None:
+        return local_analysis
+    
     try:
-        prompt = f"""Analyze the following journal entry for emotional content and themes.
+        return analysis_cache.get_or_compute(text, _request_sentiment_analysis)
+    
+    except Exception as e:
+        print(f"GPT-4o Analysis Error: {e}")
+        # Fall back to the local engine if the API fails (never cached)
+        return fallback_analysis(text)
+
+def analyze_locally(text):
+    """
+    Local engine result when ANALYSIS_ENGINE allows skipping GPT-4o, else None
+    In tiered mode only confident local results are used
+    """
+    if ANALYSIS_ENGINE not in ('local', 'tiered'):
+        return None
+    
+    analysis, confidence = local_sentiment.analyze_scored(text)
+    if ANALYSIS_ENGINE == 'local' or confidence >= LOCAL_CONFIDENCE_THRESHOLD:
+        return analysis
+    return None
+
+def fallback_analysis(text):
+    """
+    Local rule-based analysis used when GPT-4o is unavailable
+    Marked 'failed' so backfill.py re-analyzes it once GPT-4o is back
+    """
+    analysis = local_sentiment.analyze(text)
+    analysis['analysis_status'] = 'failed'
+    return analysis
+
+def process_analysis_job(entry_id, content):
+    """
+    Worker handler for async mode: analyze a pending entry with retries and
+    write the result back, marking the row 'complete' (or 'failed')
+    """
+    status = 'complete'
+    for attempt in range(ANALYSIS_MAX_RETRIES + 1):
+        try:
+            sentiment_analysis = analysis_cache.get_or_compute(content, _request_sentiment_analysis)
+            break
+        except Exception as e:
+            print(f"[WARN] Analysis attempt {attempt + 1} for entry {entry_id} failed: {e}")
+            if attempt < ANALYSIS_MAX_RETRIES:
+                time.sleep(min(2 ** attempt, 10))
+    else:
+        sentiment_analysis = fallback_analysis(content)
+        status = 'failed'
+    sentiment_analysis['analysis_status'] = status
+    
+    # Only touch rows that are still pending with the analyzed text, so a newer
+    # edit is never overwritten (an edit made meanwhile has queued its own job)
+    updated = entry_store.update(None, entry_id, {
+        'sentiment_score': sentiment_analysis['sentiment_score'],
+        'emotions': sentiment_analysis['emotions'],
+        'key_themes': sentiment_analysis['key_themes'],
+        'analysis_status': status
+    }, expect_status='pending', expect_content=content)
+    if updated:
+        invalidate_user_caches(updated['user_id'])
+    else:
+        print(f"[WARN] Entry {entry_id} changed during analysis; result dropped")
+    
+    return sentiment_analysis
+
+def requeue_pending_entries():
+    """Re-enqueue rows left pending by a previous process (runs in the background)"""
+    def _requeue():
+        try:
+            pending = entry_store.pending()
+            for entry in pending:
+                # Block until there is room so a large backlog is not dropped
+                analysis_queue.submit(entry['id'], entry['content'], block=True)
+            if pending:
+                print(f"[OK] Re-queued {len(pending)} pending analysis jobs")
+        except Exception as e:
+            print(f"[ERROR] Re-queueing pending analysis failed: {e}")
+    
+    threading.Thread(target=_requeue, name='analysis-requeue', daemon=True).start()
+
+def _request_sentiment_analysis(text):
+    """Call GPT-4o for a single entry; raises on any API or parsing failure"""
+    prompt = f"""Analyze the following journal entry for emotional content and themes.
 Provide a detailed psychological analysis with:
 1. Sentiment score (-1.0 to 1.0, where -1 is very negative, 0 is neutral, 1 is very positive)
 2. Up to 3 primary emotions detected (e.g., anxious, grateful, stressed, hopeful, etc.)
@@ -517,70 +1316,88 @@ Respond ONLY with valid JSON in this exact format:
     "brief_insight": "Your insight here"
 }}"""
 
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an empathetic mental wellness AI assistant specializing in emotional analysis. Respond only with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        # Parse the JSON response
-        result = json.loads(response.choices[0].message.content)
-        
-        # Validate and ensure proper format
-        return {
-            'sentiment_score': float(result.get('sentiment_score', 0.0)),
-            'emotions': result.get('emotions', ['neutral'])[:3],
-            'key_themes': result.get('key_themes', ['self-reflection'])[:2],
-            'brief_insight': result.get('brief_insight', 'Your entry has been analyzed.')
-        }
+    response = openai_client.chat.completions.create(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": "You are an empathetic mental wellness AI assistant specializing in emotional analysis. Respond only with valid JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=300
+    )
     
-    except Exception as e:
-        print(f"GPT-4o Analysis Error: {e}")
-        # Fallback to basic analysis if API fails
-        return {
-            'sentiment_score': 0.0,
-            'emotions': ['reflective'],
-            'key_themes': ['self-reflection'],
-            'brief_insight': 'Your entry has been recorded. AI analysis temporarily unavailable.'
+    # Parse the JSON response
+    result = json.loads(response.choices[0].message.content)
+    
+    # Validate and ensure proper format
+    return {
+        'sentiment_score': float(result.get('sentiment_score', 0.0)),
+        'emotions': result.get('emotions', ['neutral'])[:3],
+        'key_themes': result.get('key_themes', ['self-reflection'])[:2],
+        'brief_insight': result.get('brief_insight', 'Your entry has been analyzed.')
+    }
+
+WEEKLY_REPORT_SYSTEM_PROMPT = "You are a compassionate mental wellness AI that helps users understand their emotional patterns. Respond only with valid JSON."
+
+def _content_preview(entry):
+    return entry['content'][:100] + '...' if len(entry['content']) > 100 else entry['content']
+
+def weekly_report_stats(entries):
+    """Locally computed part of the weekly report (no GPT-4o needed)"""
+    sentiments = [entry['sentiment_score'] for entry in entries]
+    best_entry = max(entries, key=lambda x: x['sentiment_score'])
+    worst_entry = min(entries, key=lambda x: x['sentiment_score'])
+    
+    # Calculate mood distribution
+    positive_count = sum(1 for s in sentiments if s > 0.3)
+    negative_count = sum(1 for s in sentiments if s < -0.3)
+    neutral_count = len(sentiments) - positive_count - negative_count
+    
+    return {
+        'sentiment_graph': sentiments,
+        'best_day': {
+            'date': best_entry['created_at'][:10],
+            'score': best_entry['sentiment_score'],
+            'content_preview': _content_preview(best_entry)
+        },
+        'worst_day': {
+            'date': worst_entry['created_at'][:10],
+            'score': worst_entry['sentiment_score'],
+            'content_preview': _content_preview(worst_entry)
+        },
+        'mood_distribution': {
+            'positive': positive_count,
+            'neutral': neutral_count,
+            'negative': negative_count
         }
+    }
 
-def generate_weekly_report_gpt4o(entries):
-    """
-    Generate AI-powered weekly report with activity-mood correlation (The "Brain")
-    Uses GPT-4o to synthesize insights and identify patterns
-    """
-    try:
-        # Calculate basic statistics
-        sentiments = [entry['sentiment_score'] for entry in entries]
-        avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
-        
-        best_entry = max(entries, key=lambda x: x['sentiment_score'])
-        worst_entry = min(entries, key=lambda x: x['sentiment_score'])
-        
-        # Prepare entries summary for GPT-4o
-        entries_summary = []
-        for entry in entries:
-            emotions = json.loads(entry['emotions']) if isinstance(entry['emotions'], str) else entry['emotions']
-            themes = json.loads(entry['key_themes']) if isinstance(entry['key_themes'], str) else entry['key_themes']
-            entries_summary.append({
-                'date': entry['created_at'][:10],
-                'sentiment': entry['sentiment_score'],
-                'emotions': emotions,
-                'themes': themes,
-                'preview': entry['content'][:200]
-            })
-        
-        prompt = f"""As an empathetic mental wellness AI, analyze this week's journal entries and provide insights.
+def weekly_report_messages(entries, stats):
+    """Chat messages asking GPT-4o for the narrative part of the weekly report"""
+    sentiments = stats['sentiment_graph']
+    avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
+    best_day, worst_day = stats['best_day'], stats['worst_day']
+    
+    # Prepare entries summary for GPT-4o
+    entries_summary = []
+    for entry in entries:
+        emotions = json.loads(entry['emotions']) if isinstance(entry['emotions'], str) else entry['emotions']
+        themes = json.loads(entry['key_themes']) if isinstance(entry['key_themes'], str) else entry['key_themes']
+        entries_summary.append({
+            'date': entry['created_at'][:10],
+            'sentiment': entry['sentiment_score'],
+            'emotions': emotions,
+            'themes': themes,
+            'preview': entry['content'][:200]
+        })
+    
+    prompt = f"""As an empathetic mental wellness AI, analyze this week's journal entries and provide insights.
 
 Week Summary:
 - Total entries: {len(entries)}
 - Average sentiment: {avg_sentiment:.2f}
-- Best day: {best_entry['created_at'][:10]} (score: {best_entry['sentiment_score']:.2f})
-- Challenging day: {worst_entry['created_at'][:10]} (score: {worst_entry['sentiment_score']:.2f})
+- Best day: {best_day['date']} (score: {best_day['score']:.2f})
+- Challenging day: {worst_day['date']} (score: {worst_day['score']:.2f})
 
 Entries:
 {json.dumps(entries_summary, indent=2)}
@@ -598,46 +1415,41 @@ Respond ONLY with valid JSON:
     "key_insights": ["insight1", "insight2", "insight3"],
     "recommendations": ["rec1", "rec2", "rec3"]
 }}"""
+    
+    return [
+        {"role": "system", "content": WEEKLY_REPORT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def assemble_weekly_report(entries, stats, result, generated_by):
+    """Merge GPT-4o's narrative fields (with defaults) into the local statistics"""
+    report = {
+        'generated_by': generated_by,
+        'overall_mood': result.get('overall_mood', 'Balanced'),
+        'trajectory': result.get('trajectory', 'Stable'),
+        'key_insights': result.get('key_insights', [f'You created {len(entries)} journal entries this week']),
+        'recommendations': result.get('recommendations', ['Continue your daily journaling practice'])
+    }
+    report.update(stats)
+    return report
 
+def generate_weekly_report_gpt4o(entries):
+    """
+    Generate AI-powered weekly report with activity-mood correlation (The "Brain")
+    Uses GPT-4o to synthesize insights and identify patterns
+    """
+    try:
+        stats = weekly_report_stats(entries)
+        
         response = openai_client.chat.completions.create(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a compassionate mental wellness AI that helps users understand their emotional patterns. Respond only with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=weekly_report_messages(entries, stats),
             temperature=0.8,
             max_tokens=500
         )
         
         result = json.loads(response.choices[0].message.content)
-        
-        # Calculate mood distribution
-        positive_count = sum(1 for s in sentiments if s > 0.3)
-        negative_count = sum(1 for s in sentiments if s < -0.3)
-        neutral_count = len(sentiments) - positive_count - negative_count
-        
-        return {
-            'overall_mood': result.get('overall_mood', 'Balanced'),
-            'trajectory': result.get('trajectory', 'Stable'),
-            'key_insights': result.get('key_insights', [f'You created {len(entries)} journal entries this week']),
-            'recommendations': result.get('recommendations', ['Continue your daily journaling practice']),
-            'sentiment_graph': sentiments,
-            'best_day': {
-                'date': best_entry['created_at'][:10],
-                'score': best_entry['sentiment_score'],
-                'content_preview': best_entry['content'][:100] + '...' if len(best_entry['content']) > 100 else best_entry['content']
-            },
-            'worst_day': {
-                'date': worst_entry['created_at'][:10],
-                'score': worst_entry['sentiment_score'],
-                'content_preview': worst_entry['content'][:100] + '...' if len(worst_entry['content']) > 100 else worst_entry['content']
-            },
-            'mood_distribution': {
-                'positive': positive_count,
-                'neutral': neutral_count,
-                'negative': negative_count
-            }
-        }
+        return assemble_weekly_report(entries, stats, result, 'gpt-4o')
     
     except Exception as e:
         print(f"GPT-4o Weekly Report Error: {e}")
@@ -646,6 +1458,7 @@ Respond ONLY with valid JSON:
         avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
         
         return {
+            'generated_by': 'fallback',
             'overall_mood': 'Balanced',
             'trajectory': 'Stable',
             'key_insights': [f'You created {len(entries)} journal entries this week'],
@@ -656,35 +1469,214 @@ Respond ONLY with valid JSON:
             'mood_distribution': {'positive': 0, 'neutral': len(entries), 'negative': 0}
         }
 
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', str(export_stream.EXPORT_PAGE_SIZE)))
+
+def stream_export(chunks, label, error_record=False):
+    """
+    Wrap an export generator so a failure mid-download is logged and then
+    re-raised: headers are already sent, so the server aborts the connection
+    instead of ending the body cleanly, and a truncated backup cannot pass as
+    complete. NDJSON exports first get an explicit {"error": ...} line.
+    """
+    try:
+        for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        print(f"[ERROR] {label} export stream failed: {e}")
+        if error_record:
+            yield json.dumps({'error': f'Export failed: {e}', 'complete': False}) + '\n'
+        raise
+
 @app.route('/api/export/json', methods=['GET'])
 @login_required
 def export_json():
-    """Export all journal entries as JSON"""
+    """Export all journal entries as JSON (or NDJSON with ?format=ndjson), streamed page by page"""
     try:
         user_id = session['user']['id']
+        export_format = request.args.get('format', 'json').lower()
+        if export_format not in ('json', 'ndjson'):
+            return jsonify({'error': 'format must be json or ndjson'}), 400
         
-        # Get all entries for user from Supabase
-        result = supabase.table('journal_entries')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
-            .execute()
-        
-        export_data = {
-            'user_email': session['user']['email'],
-            'export_date': datetime.utcnow().isoformat(),
-            'total_entries': len(result.data),
-            'entries': result.data
-        }
+        entries = export_stream.iter_pages(
+            export_stream.repository_page_fetcher(entry_store, user_id),
+            EXPORT_PAGE_SIZE
+        )
+        
+        if export_format == 'ndjson':
+            chunks = export_stream.iter_ndjson(entries)
+            mimetype = 'application/x-ndjson'
+        else:
+            chunks = export_stream.iter_json({
+                'user_email': session['user']['email'],
+                'export_date': datetime.utcnow().isoformat()
+            }, entries)
+            mimetype = 'application/json'
         
-        response = jsonify(export_data)
-        response.headers['Content-Disposition'] = f'attachment; filename=journal_export_{datetime.now().strftime("%Y%m%d")}.json'
+        response = Response(
+            stream_with_context(stream_export(chunks, 'JSON', error_record=export_format == 'ndjson')),
+            mimetype=mimetype
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename=journal_export_{datetime.now().strftime("%Y%m%d")}.{export_format}'
+        response.headers['X-Content-Type-Options'] = 'nosniff'
         return response
         
     except Exception as e:
         print(f"Export JSON Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', str(import_stream.IMPORT_BATCH_SIZE)))
+
+def import_analysis(content):
+    """
+    Analysis for an imported entry that carries none: local engine or cache, never GPT-4o
+    Anything else gets the 'failed' fallback so backfill.py analyzes it later
+    """
+    return analyze_locally(content) or analysis_cache.get(content) or fallback_analysis(content)
+
+def import_summary(importer):
+    return dict(importer.counts, errors=importer.errors)
+
+def stream_import_progress(importer, batches, user_id):
+    """NDJSON progress line per inserted batch, then a final 'done' (or 'error') line"""
+    try:
+        for counts in batches:
+            yield json.dumps(dict(counts, event='progress')) + '\n'
+        yield json.dumps(dict(import_summary(importer), event='done')) + '\n'
+    except Exception as e:
+        print(f"[ERROR] Journal import failed: {e}")
+        yield json.dumps(dict(import_summary(importer), event='error', error=str(e))) + '\n'
+    finally:
+        if importer.counts['imported']:
+            invalidate_user_caches(user_id)
+
+@app.route('/api/journal/import', methods=['POST'])
+@login_required
+def import_journal():
+    """
+    Import a JSON export (or NDJSON with ?format=ndjson) from the request body or an uploaded file
+    Parsed incrementally and inserted in batches; ?progress=1 streams a progress line per batch
+    """
+    try:
+        user_id = session['user']['id']
+        upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+        if request.mimetype == 'multipart/form-data' and upload is None:
+            return jsonify({'error': 'file is required'}), 400
+        
+        import_format = request.args.get('format', '').lower()
+        if not import_format:
+            ndjson = upload.filename.endswith('.ndjson') if upload else request.mimetype == 'application/x-ndjson'
+            import_format = 'ndjson' if ndjson else 'json'
+        if import_format not in ('json', 'ndjson'):
+            return jsonify({'error': 'format must be json or ndjson'}), 400
+        
+        stream = upload.stream if upload else request.stream
+        parse = import_stream.iter_ndjson if import_format == 'ndjson' else import_stream.iter_json
+        importer = import_stream.Importer(entry_store, user_id, import_analysis, IMPORT_BATCH_SIZE)
+        batches = importer.run(parse(stream.read))
+        
+        if request.args.get('progress', '').lower() in ('1', 'true'):
+            response = Response(
+                stream_with_context(stream_import_progress(importer, batches, user_id)),
+                mimetype='application/x-ndjson'
+            )
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+        
+        try:
+            for _ in batches:
+                pass
+        except ValueError as e:
+            # Malformed upload: batches before the error stay imported (re-importing skips them)
+            return jsonify(dict(import_summary(importer), error=str(e))), 400
+        finally:
+            if importer.counts['imported']:
+                invalidate_user_caches(user_id)
+        
+        return jsonify(dict(import_summary(importer), success=True))
+        
+    except Exception as e:
+        print(f"Import Journal Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analysis/cache-stats', methods=['GET'])
+@login_required
+def get_analysis_cache_stats():
+    """Hit/miss counters for the sentiment analysis cache"""
+    return jsonify(analysis_cache.stats())
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+def collect_app_metrics():
+    """Scrape-time gauges from the caches, analysis queue and SQLite pool"""
+    analysis = analysis_cache.stats()
+    yield ('journal_analysis_cache_lookups_total', 'Sentiment analysis cache lookups by result', 'counter', {
+        (('result', 'memory_hit'),): analysis['memory_hits'],
+        (('result', 'persistent_hit'),): analysis['persistent_hits'],
+        (('result', 'miss'),): analysis['misses']
+    })
+    yield ('journal_analysis_cache_hit_ratio', 'Share of analysis lookups served from cache', 'gauge', analysis['hit_rate'])
+    yield ('journal_analysis_cache_store_errors_total', 'Persistent analysis cache failures', 'counter', analysis['store_errors'])
+    reports = report_cache.stats()
+    yield ('journal_report_cache_lookups_total', 'Weekly report cache lookups by result', 'counter', {
+        (('result', 'hit'),): reports['hits'],
+        (('result', 'miss'),): reports['misses']
+    })
+    yield ('journal_report_cache_hit_ratio', 'Share of weekly reports served from cache', 'gauge', reports['hit_rate'])
+    chats = chat_context.stats()
+    yield ('journal_chat_context_lookups_total', 'Chat context snapshot lookups by result', 'counter', {
+        (('result', 'hit'),): chats['hits'],
+        (('result', 'miss'),): chats['misses']
+    })
+    yield ('journal_chat_context_snapshots', 'Chat context snapshots held in memory', 'gauge', chats['size'])
+    queue = analysis_queue.stats()
+    yield ('journal_analysis_queue_depth', 'Analysis jobs waiting in the queue', 'gauge', queue['depth'])
+    yield ('journal_analysis_jobs_total', 'Analysis jobs by outcome', 'counter', {
+        (('outcome', 'completed'),): queue['completed'],
+        (('outcome', 'failed'),): queue['failed'],
+        (('outcome', 'rejected'),): queue['rejected']
+    })
+    if isinstance(openai_client, OpenAIGateway):
+        gateway = openai_client.stats()
+        yield ('journal_openai_gateway_in_flight', 'OpenAI calls holding a concurrency slot', 'gauge', gateway['in_flight'])
+        yield ('journal_openai_gateway_queued', 'OpenAI calls waiting for rate-limit capacity or a slot', 'gauge', gateway['queued'])
+        yield ('journal_openai_gateway_coalesce_ratio', 'Share of OpenAI calls served by an identical in-flight call', 'gauge', gateway['coalesce_rate'])
+    upstreams = {}
+    if openai_client is not None:
+        upstreams['openai'] = openai_upstream.stats()
+    if supabase is not None:
+        upstreams['supabase'] = supabase_upstream.stats()
+    yield ('journal_circuit_breaker_state', 'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)', 'gauge', {
+        (('service', name),): resilience.STATE_VALUES[stats['state']] for name, stats in upstreams.items()
+    })
+    yield ('journal_circuit_breaker_short_circuits_total', 'Calls refused while a breaker was open', 'counter', {
+        (('service', name),): stats['short_circuits'] for name, stats in upstreams.items()
+    })
+    yield ('journal_outbound_retries_total', 'Outbound calls retried after a transient error', 'counter', {
+        (('service', name),): stats['retries'] for name, stats in upstreams.items()
+    })
+    if STORAGE_BACKEND == 'sqlite':
+        pool = db_pool.stats()
+        yield ('journal_sqlite_connections', 'Pooled SQLite connections by state', 'gauge', {
+            (('state', 'open'),): pool['open'],
+            (('state', 'idle'),): pool['idle']
+        })
+        yield ('journal_sqlite_pool_waits_total', 'Acquires that waited for a free connection', 'counter', pool['waits'])
+
+metrics.registry.add_collector(collect_app_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint; requires METRICS_TOKEN as a bearer token (open only in local mode)"""
+    if not METRICS_TOKEN:
+        # Never expose internals from a deployment that forgot to set a token
+        if MODE == 'cloud' or IS_VERCEL:
+            return jsonify({'error': 'Not found'}), 404
+    elif not secrets.compare_digest(request.headers.get('Authorization', '').encode(),
+                                    f'Bearer {METRICS_TOKEN}'.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/draft/save', methods=['POST'])
 @login_required
 def save_draft():
@@ -709,37 +1701,23 @@ def clear_draft():
 
 @app.route('/api/weekly-comparison', methods=['GET'])
 @login_required
+@conditional_get
 def get_weekly_comparison():
-    """Get week-over-week comparison"""
+    """Get week-over-week comparison from the daily rollup"""
     try:
         user_id = session['user']['id']
         
-        # Get this week's entries
-        this_week_start = (datetime.utcnow() - timedelta(days=7)).isoformat()
-        this_week_result = supabase.table('journal_entries')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .gte('created_at', this_week_start)\
-            .order('created_at', desc=False)\
-            .execute()
-        
-        # Get last week's entries
-        last_week_start = (datetime.utcnow() - timedelta(days=14)).isoformat()
-        last_week_end = this_week_start
-        last_week_result = supabase.table('journal_entries')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .gte('created_at', last_week_start)\
-            .lt('created_at', last_week_end)\
-            .order('created_at', desc=False)\
-            .execute()
-        
-        # Calculate averages
-        this_week = this_week_result.data
-        last_week = last_week_result.data
-        
-        this_week_avg = sum(e['sentiment_score'] for e in this_week) / len(this_week) if this_week else 0
-        last_week_avg = sum(e['sentiment_score'] for e in last_week) / len(last_week) if last_week else 0
+        # This week = the last 7 UTC days including today, last week = the 7 before
+        today = datetime.utcnow().date()
+        this_week_start = today - timedelta(days=6)
+        last_week_start = today - timedelta(days=13)
+        
+        days = daily_stats_store.fetch(user_id, last_week_start, today)
+        this_week = daily_stats.summarize([d for d in days if d['day'] >= this_week_start.isoformat()])
+        last_week = daily_stats.summarize([d for d in days if d['day'] < this_week_start.isoformat()])
+        
+        this_week_avg = this_week['avg_sentiment']
+        last_week_avg = last_week['avg_sentiment']
         
         change = this_week_avg - last_week_avg
         change_percent = (change / abs(last_week_avg) * 100) if last_week_avg != 0 else 0
@@ -747,11 +1725,11 @@ def get_weekly_comparison():
         return jsonify({
             'this_week': {
                 'avg_sentiment': round(this_week_avg, 2),
-                'entry_count': len(this_week)
+                'entry_count': this_week['entry_count']
             },
             'last_week': {
                 'avg_sentiment': round(last_week_avg, 2),
-                'entry_count': len(last_week)
+                'entry_count': last_week['entry_count']
             },
             'change': round(change, 2),
             'change_percent': round(change_percent, 1),
@@ -761,38 +1739,110 @@ def get_weekly_comparison():
         print(f"Weekly Comparison Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stats/metrics', methods=['GET'])
+@login_required
+@conditional_get
+def get_dashboard_metrics():
+    """Dashboard metric cards computed from the last 30 days of daily rollups"""
+    try:
+        user_id = session['user']['id']
+        
+        today = datetime.utcnow().date()
+        days = daily_stats_store.fetch(user_id, today - timedelta(days=29), today)
+        month = daily_stats.summarize(days)
+        week = daily_stats.summarize([d for d in days if d['day'] >= (today - timedelta(days=6)).isoformat()])
+        
+        return jsonify({
+            'total_entries': month['entry_count'],
+            'positive_mood_percent': round(month['positive_count'] / month['entry_count'] * 100) if month['entry_count'] else 0,
+            'weekly_entries': week['entry_count'],
+            'current_streak': daily_stats.current_streak(days, today),
+            'avg_sentiment': round(month['avg_sentiment'], 2),
+            'top_emotions': list(month['emotion_counts'])[:5],
+            'top_themes': list(month['theme_counts'])[:5]
+        })
+    except Exception as e:
+        print(f"Dashboard Metrics Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', '3660'))
+
+def parse_trends_range(args, today):
+    """(start, end, window, top) from ?start_date/end_date (or ?days=N ending today), ?window and ?top"""
+    end = datetime.strptime(args['end_date'], '%Y-%m-%d').date() if args.get('end_date') else today
+    if args.get('start_date'):
+        start = datetime.strptime(args['start_date'], '%Y-%m-%d').date()
+    else:
+        start = end - timedelta(days=int(args.get('days', 30)) - 1)
+    if start > end:
+        raise ValueError('start_date must not be after end_date')
+    if (end - start).days + 1 > ANALYTICS_MAX_DAYS:
+        raise ValueError(f'At most {ANALYTICS_MAX_DAYS} days per request')
+    window = int(args.get('window', 7))
+    top = int(args.get('top', 10))
+    if not 1 <= window <= 365 or not 1 <= top <= 50:
+        raise ValueError('window must be 1-365 and top 1-50')
+    return start, end, window, top
+
+@app.route('/api/analytics/trends', methods=['GET'])
+@login_required
+@conditional_get
+def get_analytics_trends():
+    """
+    Chart-ready sentiment trends and emotion statistics for a date range:
+    daily counts/means, rolling mean and volatility, weekday means,
+    emotion/theme histograms and emotion co-occurrence
+    """
+    try:
+        start, end, window, top = parse_trends_range(request.args, datetime.utcnow().date())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        user_id = session['user']['id']
+        rows = entry_store.range(
+            user_id,
+            since=start.isoformat(),
+            until=(end + timedelta(days=1)).isoformat(),
+            descending=False,
+            columns='created_at, sentiment_score, emotions, key_themes'
+        )
+        return jsonify(analytics.trends(rows, start, end, window, top))
+    except Exception as e:
+        print(f"Analytics Trends Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/export/pdf', methods=['GET'])
 @login_required
 def export_pdf():
-    """Export journal as text file"""
+    """Export journal as text file, streamed page by page"""
     try:
-        from flask import make_response
-        
         user_id = session['user']['id']
+        user_email = session['user']['email']
         
-        result = supabase.table('journal_entries')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
-            .execute()
+        entries = export_stream.iter_pages(
+            export_stream.repository_page_fetcher(entry_store, user_id),
+            EXPORT_PAGE_SIZE
+        )
         
-        # Create text-based export content
-        pdf_content = f"""SENTIENT JOURNAL - EXPORT
-User: {session['user']['email']}
+        def generate():
+            # Create text-based export content
+            yield f"""SENTIENT JOURNAL - EXPORT
+User: {user_email}
 Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Total Entries: {len(result.data)}
 
 {'='*80}
 
 """
-        
-        for entry in result.data:
-            emotions = entry.get('emotions', [])
-            themes = entry.get('key_themes', [])
-            
-            pdf_content += f"""
+            total = 0
+            for entry in entries:
+                emotions = entry.get('emotions', [])
+                themes = entry.get('key_themes', [])
+                total += 1
+                
+                yield f"""
 Date: {entry['created_at']}
-Sentiment Score: {entry['sentiment_score']:.2f}
+Sentiment Score: {float(entry['sentiment_score']):.2f}
 Emotions: {', '.join(emotions)}
 Themes: {', '.join(themes)}
 
@@ -801,9 +1851,10 @@ Themes: {', '.join(themes)}
 {'-'*80}
 
 """
+            yield f"\nTotal Entries: {total}\n"
         
         # Return as downloadable text file
-        response = make_response(pdf_content)
+        response = Response(stream_with_context(stream_export(generate(), 'Text')), mimetype='text/plain')
         response.headers['Content-Type'] = 'text/plain; charset=utf-8'
         response.headers['Content-Disposition'] = f'attachment; filename=journal_export_{datetime.now().strftime("%Y%m%d")}.txt'
         
@@ -817,6 +1868,9 @@ Themes: {', '.join(themes)}
 # WELLNESS ASSISTANT CHAT API
 # ========================================
 
+# Chat intents, keywords and replies are defined in chat_intents.json
+chat_router = chat_intents.IntentRouter.from_file(os.getenv('CHAT_INTENTS_PATH', chat_intents.INTENTS_PATH))
+
 @app.route('/api/chat/reflect', methods=['POST'])
 @login_required
 def chat_reflect():
@@ -829,36 +1883,15 @@ def chat_reflect():
         if not user_message:
             return jsonify({'error': 'Message is required'}), 400
         
-        # Get user's journal data for context
-        db = get_db()
-        
-        # Get recent entries
-        recent_entries = db.execute('''
-            SELECT * FROM journal_entries 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        ''', (user_id,)).fetchall()
-        
-        # Get total entry count
-        total_entries = db.execute('''
-            SELECT COUNT(*) as count FROM journal_entries WHERE user_id = ?
-        ''', (user_id,)).fetchone()['count']
-        
-        # Calculate average sentiment
-        avg_sentiment = 0
-        if recent_entries:
-            sentiments = [entry['sentiment_score'] for entry in recent_entries]
-            avg_sentiment = sum(sentiments) / len(sentiments)
-        
-        db.close()
+        # Cached snapshot of the user's journal (counts, recent mood and labels)
+        context = chat_context.get(user_id)
         
         # Generate intelligent response based on user message
         reply, suggested_prompts = generate_assistant_response(
             user_message, 
-            total_entries, 
-            avg_sentiment, 
-            recent_entries
+            context['total_entries'], 
+            context['avg_sentiment'], 
+            context['recent_days']
         )
         
         return jsonify({
@@ -871,161 +1904,21 @@ def chat_reflect():
 
 def generate_assistant_response(message, total_entries, avg_sentiment, recent_entries):
     """Generate contextual responses based on user queries"""
-    
-    # Greeting responses
-    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
-        if total_entries == 0:
-            return (
-                "👋 Hello! I'm your Wellness Assistant. I'm here to help you start your mental wellness journey through journaling. "
-                "Would you like some tips on how to begin?",
-                ["How do I start journaling?", "What should I write about?", "Show me journaling tips"]
-            )
-        else:
-            mood_desc = "positive" if avg_sentiment > 0.3 else "challenging" if avg_sentiment < -0.3 else "balanced"
-            return (
-                f"👋 Welcome back! You've written {total_entries} journal entries so far. "
-                f"Your recent mood has been {mood_desc}. How can I help you today?",
-                ["Show my progress", "Give me journaling tips", "Help me reflect on patterns"]
-            )
-    
-    # Progress and stats queries
-    elif any(word in message for word in ['progress', 'stats', 'how am i doing', 'track']):
-        if total_entries == 0:
-            return (
-                "You haven't started journaling yet! Let's begin your wellness journey. "
-                "Regular journaling helps you track emotions, identify patterns, and improve mental health.",
-                ["Start my first entry", "Why should I journal?", "What are the benefits?"]
-            )
-        else:
-            mood_emoji = "😊" if avg_sentiment > 0.3 else "😔" if avg_sentiment < -0.3 else "😐"
-            return (
-                f"{mood_emoji} You've written {total_entries} journal entries! "
-                f"Your average emotional state is {avg_sentiment:.2f}. "
-                f"{'Keep up the great work!' if avg_sentiment > 0 else 'Remember, tough times are temporary. Keep journaling to track your journey.'} "
-                f"Consistency is key to mental wellness!",
-                ["Show weekly report", "View emotional trends", "Compare this week vs last week"]
-            )
-    
-    # Journaling tips and how-to
-    elif any(word in message for word in ['how', 'start', 'begin', 'tips', 'help', 'guide']):
-        return (
-            "📝 Here are some powerful journaling tips:\n\n"
-            "1. **Be Honest**: Write freely without judgment\n"
-            "2. **Be Specific**: Include details about your day and feelings\n"
-            "3. **Be Consistent**: Try to journal daily, even if brief\n"
-            "4. **Reflect**: Ask yourself 'What did I learn today?'\n"
-            "5. **Express Gratitude**: Note 3 things you're grateful for\n\n"
-            "Ready to write your next entry?",
-            ["Start writing now", "Tell me more about consistency", "What should I write about?"]
-        )
-    
-    # What to write about
-    elif any(word in message for word in ['write about', 'topics', 'ideas', 'prompts']):
-        return (
-            "💡 Great journaling prompts:\n\n"
-            "• How are you feeling right now and why?\n"
-            "• What challenged you today and how did you handle it?\n"
-            "• What made you smile or feel grateful?\n"
-            "• What patterns do you notice in your emotions?\n"
-            "• What goals do you want to work towards?\n"
-            "• Who or what inspired you recently?\n\n"
-            "Pick one and start writing!",
-            ["I'll start writing", "Give me more prompts", "Show my recent entries"]
-        )
-    
-    # Mental wellness and self-care
-    elif any(word in message for word in ['wellness', 'mental health', 'self-care', 'anxiety', 'stress', 'depressed']):
-        return (
-            "🧠 Mental wellness is a journey, not a destination. Here's what can help:\n\n"
-            "• **Journal regularly** to process emotions\n"
-            "• **Practice mindfulness** and deep breathing\n"
-            "• **Stay connected** with supportive people\n"
-            "• **Move your body** - exercise helps mood\n"
-            "• **Sleep well** - rest is crucial\n"
-            "• **Seek help** when needed - it's a sign of strength\n\n"
-            "Remember: You're not alone in this journey. 💚",
-            ["Track my mood patterns", "I want to journal now", "Show my progress"]
-        )
-    
-    # Consistency and habits
-    elif any(word in message for word in ['consistent', 'habit', 'daily', 'routine', 'streak']):
-        return (
-            "🔥 Building a journaling habit:\n\n"
-            "• **Set a specific time** - morning or before bed works great\n"
-            "• **Start small** - even 5 minutes counts\n"
-            "• **Use reminders** - set a daily alarm\n"
-            "• **Track your streak** - celebrate small wins\n"
-            "• **Don't break the chain** - write something every day\n\n"
-            f"You've written {total_entries} entries so far. Keep going!",
-            ["Write my entry now", "Show my streak", "Give me motivation"]
-        )
-    
-    # Patterns and insights
-    elif any(word in message for word in ['pattern', 'insight', 'trend', 'notice', 'learn']):
-        if total_entries < 5:
-            return (
-                "To identify meaningful patterns, try journaling for at least a week. "
-                "The more you write, the clearer your emotional patterns become!",
-                ["Start writing more", "What should I track?", "Show journaling tips"]
-            )
-        else:
-            return (
-                f"📊 Based on your {total_entries} entries, here's what I notice:\n\n"
-                f"• Your average mood is {avg_sentiment:.2f}\n"
-                f"• {'You tend to be optimistic!' if avg_sentiment > 0.3 else 'You face challenges with resilience.' if avg_sentiment < -0.3 else 'Your emotions are balanced.'}\n"
-                "• Check your Emotional Trends tab for visual insights\n"
-                "• Review your Weekly Report for detailed analysis\n\n"
-                "Keep journaling to discover more patterns!",
-                ["View emotional trends", "Generate weekly report", "Continue journaling"]
-            )
-    
-    # Motivation and encouragement
-    elif any(word in message for word in ['motivate', 'encourage', 'inspire', 'why journal']):
-        return (
-            "✨ Why journaling is powerful:\n\n"
-            "• **Clarity**: Untangle complex emotions\n"
-            "• **Growth**: Track your personal evolution\n"
-            "• **Healing**: Process difficult experiences\n"
-            "• **Gratitude**: Focus on positive moments\n"
-            "• **Self-awareness**: Understand yourself better\n"
-            "• **Stress relief**: Release pent-up feelings\n\n"
-            "You're investing in yourself. That's beautiful! 💪",
-            ["I'm ready to write", "Show my progress", "Give me writing prompts"]
-        )
-    
-    # Weekly report
-    elif any(word in message for word in ['week', 'report', 'summary']):
-        return (
-            "📊 To see your weekly insights:\n\n"
-            "1. Click on the **Weekly Report** tab\n"
-            "2. Press **Generate Weekly Insights**\n"
-            "3. Review your mood trends, best/worst days, and recommendations\n\n"
-            "Your weekly report helps you understand your emotional journey!",
-            ["Take me to reports", "Show my trends", "I'll write more entries"]
-        )
-    
-    # Export data
-    elif any(word in message for word in ['export', 'download', 'backup', 'save']):
-        return (
-            "💾 To export your journal:\n\n"
-            "1. Go to the **Export Data** tab\n"
-            "2. Choose **JSON** (for data) or **Text** (for reading)\n"
-            "3. Your entries will download automatically\n\n"
-            "It's always good to backup your thoughts!",
-            ["Show export options", "Continue journaling", "View my entries"]
-        )
-    
-    # Default helpful response
-    else:
-        return (
-            "I'm here to help you with:\n\n"
-            "• **Journaling tips** and writing prompts\n"
-            "• **Progress tracking** and emotional insights\n"
-            "• **Mental wellness** guidance and support\n"
-            "• **Building habits** and staying consistent\n\n"
-            "What would you like to explore?",
-            ["Give me journaling tips", "Show my progress", "Help me stay consistent", "What should I write about?"]
-        )
+    intent = chat_router.match(message)
+    return chat_router.respond(intent, total_entries, avg_sentiment)
+
+
+# Background analysis worker pool (async mode only)
+analysis_queue = AnalysisQueue(
+    process_analysis_job,
+    workers=ANALYSIS_WORKERS,
+    max_depth=ANALYSIS_QUEUE_SIZE
+)
+
+if ANALYSIS_ASYNC and entry_store:
+    analysis_queue.start()
+    requeue_pending_entries()
+    print(f"[OK] Async analysis enabled ({ANALYSIS_WORKERS} workers, queue depth {ANALYSIS_QUEUE_SIZE})")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+"""
+Fingerprinted, precompressed static assets
+
+Templates link CSS/JS through asset_url('css/style.css'), which resolves to
+/static/dist/css/style.<hash>.css. The name changes whenever the content
+does, so these URLs are served with a year-long immutable Cache-Control
+and repeat visits never revalidate them.
+
+Build step (writes static/dist/: hashed copies, .gz and .br siblings and
+manifest.json) for deployments and CDNs:
+    python assets.py build
+
+Without a build the manifest is computed from the sources at startup and
+compressed variants are produced on first request and kept in memory.
+"""
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import sys
+import threading
+
+import compression
+
+ASSET_DIRS = ('css', 'js')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(filename, digest):
+    """'css/style.css' -> 'css/style.<digest>.css'"""
+    root, ext = posixpath.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+def sources(static_folder):
+    """Asset paths relative to the static folder ('css/style.css', ...)"""
+    for directory in ASSET_DIRS:
+        base = os.path.join(static_folder, directory)
+        if not os.path.isdir(base):
+            continue
+        for name in sorted(os.listdir(base)):
+            if os.path.isfile(os.path.join(base, name)):
+                yield f'{directory}/{name}'
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def build(static_folder):
+    """Write hashed and precompressed copies plus the manifest; returns the manifest"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for filename in sources(static_folder):
+        data = _read(os.path.join(static_folder, filename))
+        target = hashed_name(filename, fingerprint(data))
+        path = os.path.join(dist, *target.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        for encoding in compression.available_encodings():
+            with open(path + EXTENSIONS[encoding], 'wb') as f:
+                f.write(compression.compress(data, encoding, best=True))
+        manifest[filename] = target
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Maps logical asset names to fingerprinted ones and serves their encoded bodies"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        manifest_path = os.path.join(self.dist_folder, MANIFEST_NAME)
+        self.built = os.path.exists(manifest_path)
+        if self.built:
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {
+                filename: hashed_name(filename, fingerprint(_read(os.path.join(static_folder, filename))))
+                for filename in sources(static_folder)
+            }
+        self._sources = {hashed: filename for filename, hashed in self.manifest.items()}
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def url_path(self, filename):
+        """Path under /static for `filename` (unchanged when it is not a managed asset)"""
+        hashed = self.manifest.get(filename)
+        return f'{DIST_DIR}/{hashed}' if hashed else filename
+
+    def _load(self, hashed, encoding):
+        if self.built:
+            path = os.path.join(self.dist_folder, *hashed.split('/'))
+            if encoding:
+                path += EXTENSIONS[encoding]
+            return _read(path) if os.path.exists(path) else None
+        data = _read(os.path.join(self.static_folder, *self._sources[hashed].split('/')))
+        return compression.compress(data, encoding, best=True) if encoding else data
+
+    def body(self, hashed, accept_encodings):
+        """(body, encoding or None, mimetype) for a fingerprinted name, or None if unknown"""
+        if hashed not in self._sources:
+            return None
+        encoding = compression.negotiate(accept_encodings)
+        key = (hashed, encoding)
+        if key not in self._bodies:
+            data = self._load(hashed, encoding)
+            if data is None:
+                # Built without this encoding (e.g. brotli installed after the build)
+                data, encoding = self._load(hashed, None), None
+            with self._lock:
+                self._bodies[key] = (data, encoding)
+        data, encoding = self._bodies[key]
+        mimetype = mimetypes.guess_type(hashed)[0] or 'application/octet-stream'
+        return data, encoding, mimetype
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--static', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    args = parser.parse_args()
+
+    manifest = build(args.static)
+    encodings = ', '.join(compression.available_encodings())
+    print(f"✅ Built {len(manifest)} assets into {os.path.join(args.static, DIST_DIR)} ({encodings})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,423 @@
+"""
+Backfill / Re-analysis Tool for AI Mental Wellness Journal
+
+Finds entries that still carry the placeholder analysis written while GPT-4o
+was unavailable (sentiment 0.0 + ['reflective']) or that are stuck in the
+'pending'/'failed' async state, and re-analyzes them in batches: many entries
+are packed into one prompt under a token budget, batches run concurrently
+under a requests-per-minute limit, and results are written back with bulk
+updates of the analysis columns only. A result is dropped when its entry was
+edited after it was read (updated_at changed), so a backfill never reverts an
+edit. Progress is checkpointed so an interrupted run can be resumed.
+
+Usage:
+    python backfill.py --dry-run             # count rows that need analysis
+    python backfill.py --workers 4 --rpm 60  # run the backfill
+    python backfill.py --resume              # continue from the last checkpoint
+    python backfill.py --all                 # re-analyze every entry
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+MODEL = 'gpt-4o'
+CHECKPOINT_FILE = '.backfill_checkpoint.json'
+
+# Rough characters-per-token ratio used for budgeting prompts
+CHARS_PER_TOKEN = 4
+# Output tokens reserved per entry in a batch response
+OUTPUT_TOKENS_PER_ENTRY = 60
+# Prompt overhead (instructions + JSON framing) per batch
+PROMPT_OVERHEAD_TOKENS = 200
+
+# USD per 1M tokens (override with --input-price / --output-price)
+DEFAULT_INPUT_PRICE = 2.50
+DEFAULT_OUTPUT_PRICE = 10.00
+
+FALLBACK_EMOTIONS = ['reflective']
+FALLBACK_THEMES = ['self-reflection']
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return []
+    return value or []
+
+
+def needs_analysis(entry):
+    """True for rows written by the GPT-4o fallback branch or left pending/failed"""
+    if entry.get('analysis_status') in ('pending', 'failed'):
+        return True
+    return (
+        float(entry.get('sentiment_score') or 0.0) == 0.0
+        and _as_list(entry.get('emotions')) == FALLBACK_EMOTIONS
+        and _as_list(entry.get('key_themes')) == FALLBACK_THEMES
+    )
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# ========================================
+# ENTRY SOURCES
+# ========================================
+
+class SupabaseSource:
+    """Reads candidate rows from Supabase and bulk-updates results via apply_backfill_results"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def fetch_page(self, cursor, limit, include_all):
+        query = self.client.table('journal_entries')\
+            .select('id, user_id, content, sentiment_score, emotions, key_themes, analysis_status, created_at, updated_at')
+        if not include_all:
+            query = query.or_('sentiment_score.eq.0,analysis_status.in.(pending,failed)')
+        if cursor:
+            # Inclusive lower bound; rows already processed at the boundary are skipped below
+            query = query.gte('created_at', cursor['created_at'])
+        rows = query.order('created_at', desc=False).order('id', desc=False).limit(limit).execute().data
+        if cursor:
+            rows = [
+                r for r in rows
+                if (r['created_at'], str(r['id'])) > (cursor['created_at'], str(cursor['id']))
+            ]
+        return rows
+
+    def write_results(self, rows):
+        """Write one batch's analysis; returns how many rows were unchanged since fetch and written"""
+        return self.client.rpc('apply_backfill_results', {'results': [
+            {
+                'id': row['id'],
+                'updated_at': row['updated_at'],
+                'sentiment_score': row['sentiment_score'],
+                'emotions': row['emotions'],
+                'key_themes': row['key_themes']
+            }
+            for row in rows
+        ]}).execute().data
+
+
+class SQLiteSource:
+    """Reads candidate rows from the local SQLite database"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+
+    def fetch_page(self, cursor, limit, include_all):
+        where = []
+        params = []
+        if not include_all:
+            where.append('''(
+                (sentiment_score = 0
+                 AND json_array_length(emotions) = 1 AND json_extract(emotions, '$[0]') = 'reflective')
+                OR analysis_status IN ('pending', 'failed')
+            )''')
+        if cursor:
+            where.append('(created_at, id) > (?, ?)')
+            params.extend([cursor['created_at'], cursor['id']])
+        sql = 'SELECT id, user_id, content, sentiment_score, emotions, key_themes, analysis_status, created_at, updated_at FROM journal_entries'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY created_at, id LIMIT ?'
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, params)]
+
+    def write_results(self, rows):
+        """Write one batch's analysis; rows edited since they were fetched are skipped"""
+        with self.lock:
+            with self.db:
+                before = self.db.total_changes
+                self.db.executemany(
+                    '''UPDATE journal_entries
+                       SET sentiment_score = ?, emotions = ?, key_themes = ?,
+                           analysis_status = 'complete', updated_at = CURRENT_TIMESTAMP
+                       WHERE id = ? AND updated_at IS ?''',
+                    [
+                        (row['sentiment_score'], json.dumps(row['emotions']),
+                         json.dumps(row['key_themes']), row['id'], row['updated_at'])
+                        for row in rows
+                    ]
+                )
+                return self.db.total_changes - before
+
+
+# ========================================
+# BATCHING + GPT CALLS
+# ========================================
+
+def pack_batches(entries, token_budget, max_batch):
+    """Greedily pack entries into batches whose estimated prompt fits the budget"""
+    batches = []
+    current = []
+    used = PROMPT_OVERHEAD_TOKENS
+    max_entry_tokens = token_budget - PROMPT_OVERHEAD_TOKENS - OUTPUT_TOKENS_PER_ENTRY
+    for entry in entries:
+        text = entry['content']
+        if estimate_tokens(text) > max_entry_tokens:
+            text = text[:max_entry_tokens * CHARS_PER_TOKEN]
+        cost = estimate_tokens(text) + OUTPUT_TOKENS_PER_ENTRY
+        if current and (used + cost > token_budget or len(current) >= max_batch):
+            batches.append(current)
+            current = []
+            used = PROMPT_OVERHEAD_TOKENS
+        current.append((entry, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(batch):
+    items = [{'id': str(i), 'text': text} for i, (_, text) in enumerate(batch)]
+    return f"""Analyze each of the following journal entries for emotional content and themes.
+For every entry provide:
+1. Sentiment score (-1.0 to 1.0, where -1 is very negative, 0 is neutral, 1 is very positive)
+2. Up to 3 primary emotions detected (e.g., anxious, grateful, stressed, hopeful, etc.)
+3. Up to 2 key themes (e.g., work, relationships, health, personal growth, etc.)
+
+Entries:
+{json.dumps(items, ensure_ascii=False)}
+
+Respond ONLY with valid JSON in this exact format, with one result per entry id:
+{{
+    "results": [
+        {{"id": "0", "sentiment_score": 0.5, "emotions": ["emotion1", "emotion2"], "key_themes": ["theme1"]}}
+    ]
+}}"""
+
+
+def parse_batch_response(content, batch):
+    """Map per-entry JSON results back onto the batch rows; missing ids are skipped"""
+    payload = json.loads(content)
+    results = payload.get('results', []) if isinstance(payload, dict) else payload
+    by_id = {str(item.get('id')): item for item in results if isinstance(item, dict)}
+    rows = []
+    for i, (entry, _) in enumerate(batch):
+        item = by_id.get(str(i))
+        if item is None:
+            continue
+        try:
+            score = max(-1.0, min(1.0, float(item.get('sentiment_score', 0.0))))
+        except (TypeError, ValueError):
+            continue
+        rows.append({
+            'id': entry['id'],
+            'updated_at': entry.get('updated_at'),
+            'sentiment_score': score,
+            'emotions': list(item.get('emotions') or ['neutral'])[:3],
+            'key_themes': list(item.get('key_themes') or ['self-reflection'])[:2]
+        })
+    return rows
+
+
+class RateLimiter:
+    """Spaces out calls so no more than `rpm` start in any minute"""
+
+    def __init__(self, rpm):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def analyze_batch(client, batch, limiter, retries=2):
+    """Run one batched GPT-4o call; returns (rows, prompt_tokens, completion_tokens)"""
+    prompt = build_batch_prompt(batch)
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": "You are an empathetic mental wellness AI assistant specializing in emotional analysis. Respond only with valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.3,
+                max_tokens=OUTPUT_TOKENS_PER_ENTRY * len(batch) + 50
+            )
+            rows = parse_batch_response(response.choices[0].message.content, batch)
+            usage = getattr(response, 'usage', None)
+            return (
+                rows,
+                getattr(usage, 'prompt_tokens', 0) or 0,
+                getattr(usage, 'completion_tokens', 0) or 0
+            )
+        except Exception as e:
+            print(f"  ⚠️  Batch of {len(batch)} failed (attempt {attempt + 1}): {e}")
+            if attempt < retries:
+                time.sleep(2 ** attempt)
+    return [], 0, 0
+
+
+# ========================================
+# CHECKPOINTING + DRIVER
+# ========================================
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, cursor, totals):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'cursor': cursor, 'totals': totals}, f)
+    os.replace(tmp_path, path)
+
+
+def make_source(mode, database):
+    if mode == 'cloud':
+        from supabase import create_client
+        url = os.getenv('SUPABASE_URL')
+        key = os.getenv('SUPABASE_KEY')
+        if not url or not key:
+            raise SystemExit("❌ SUPABASE_URL and SUPABASE_KEY must be set for cloud mode")
+        return SupabaseSource(create_client(url, key))
+    return SQLiteSource(os.path.abspath(database))
+
+
+def run_backfill(source, client, args):
+    checkpoint = load_checkpoint(args.checkpoint) if args.resume else None
+    cursor = checkpoint['cursor'] if checkpoint else None
+    totals = checkpoint['totals'] if checkpoint else {
+        'selected': 0, 'updated': 0, 'failed': 0, 'changed': 0, 'calls': 0,
+        'prompt_tokens': 0, 'completion_tokens': 0
+    }
+    totals.setdefault('changed', 0)
+    if cursor:
+        print(f"↩️  Resuming after {cursor['created_at']} (id {cursor['id']})")
+
+    limiter = RateLimiter(args.rpm)
+    started = time.monotonic()
+    processed_this_run = 0
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        while True:
+            page = source.fetch_page(cursor, args.page_size, args.all)
+            if not page:
+                break
+            # The SQL filter is deliberately loose; apply the exact fallback check here
+            last = page[-1]
+            entries = page if args.all else [e for e in page if needs_analysis(e)]
+
+            if entries:
+                batches = pack_batches(entries, args.batch_tokens, args.max_batch)
+                results = list(pool.map(lambda b: analyze_batch(client, b, limiter), batches))
+                rows = [row for batch_rows, _, _ in results for row in batch_rows]
+                written = source.write_results(rows) if rows else 0
+                totals['selected'] += len(entries)
+                totals['updated'] += written
+                # Edited while in flight: the edit wins, the entry is picked up by a later run
+                totals['changed'] += len(rows) - written
+                totals['failed'] += len(entries) - len(rows)
+                totals['calls'] += len(batches)
+                totals['prompt_tokens'] += sum(r[1] for r in results)
+                totals['completion_tokens'] += sum(r[2] for r in results)
+                processed_this_run += len(entries)
+
+            cursor = {'created_at': last['created_at'], 'id': last['id']}
+            save_checkpoint(args.checkpoint, cursor, totals)
+
+            elapsed = time.monotonic() - started
+            rate = processed_this_run / elapsed * 60 if elapsed else 0.0
+            print(f"  ✅ {totals['updated']} updated, {totals['failed']} failed, "
+                  f"{totals['changed']} edited meanwhile ({rate:.0f} entries/min)")
+
+    return totals, time.monotonic() - started, processed_this_run
+
+
+def count_candidates(source, args):
+    cursor = None
+    count = 0
+    while True:
+        page = source.fetch_page(cursor, args.page_size, args.all)
+        if not page:
+            return count
+        count += len(page) if args.all else sum(1 for e in page if needs_analysis(e))
+        cursor = {'created_at': page[-1]['created_at'], 'id': page[-1]['id']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-analyze journal entries in batches with GPT-4o')
+    parser.add_argument('--mode', choices=['local', 'cloud'], default=os.getenv('MODE', 'local').lower())
+    parser.add_argument('--database', default='journal.db', help='SQLite database path (local mode)')
+    parser.add_argument('--all', action='store_true', help='re-analyze every entry, not only fallback rows')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent GPT-4o calls')
+    parser.add_argument('--rpm', type=float, default=60, help='max GPT-4o requests per minute')
+    parser.add_argument('--batch-tokens', type=int, default=6000, help='prompt token budget per batch')
+    parser.add_argument('--max-batch', type=int, default=25, help='max entries per batch')
+    parser.add_argument('--page-size', type=int, default=500, help='rows fetched per page')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE)
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint file')
+    parser.add_argument('--dry-run', action='store_true', help='only count rows that need analysis')
+    parser.add_argument('--input-price', type=float, default=DEFAULT_INPUT_PRICE, help='USD per 1M prompt tokens')
+    parser.add_argument('--output-price', type=float, default=DEFAULT_OUTPUT_PRICE, help='USD per 1M completion tokens')
+    args = parser.parse_args()
+
+    print("="*60)
+    print("AI Mental Wellness Journal - Analysis Backfill")
+    print("="*60)
+
+    source = make_source(args.mode, args.database)
+
+    if args.dry_run:
+        print(f"🔍 {count_candidates(source, args)} entries need analysis ({args.mode} mode)")
+        return 0
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        print("❌ OPENAI_API_KEY is not configured")
+        return 1
+    from openai import OpenAI
+    client = OpenAI(api_key=api_key)
+
+    totals, elapsed, processed = run_backfill(source, client, args)
+
+    cost = (totals['prompt_tokens'] * args.input_price
+            + totals['completion_tokens'] * args.output_price) / 1_000_000
+    print("="*60)
+    print("BACKFILL SUMMARY")
+    print("="*60)
+    print(f"Entries selected:   {totals['selected']}")
+    print(f"Entries updated:    {totals['updated']}")
+    print(f"Entries failed:     {totals['failed']}")
+    print(f"Edited meanwhile:   {totals['changed']} (left for the next run)")
+    print(f"GPT-4o calls:       {totals['calls']}")
+    print(f"Throughput:         {processed / elapsed * 60 if elapsed else 0:.1f} entries/min")
+    print(f"Tokens (in/out):    {totals['prompt_tokens']}/{totals['completion_tokens']}")
+    print(f"Estimated cost:     ${cost:.4f} (${cost / totals['updated'] if totals['updated'] else 0:.6f} per entry)")
+    print("="*60)
+
+    return 0 if totals['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark: trends analytics over long journal histories
+
+Times analytics.trends() on synthetic histories (100k entries by default,
+spread over --days days), then measures GET /api/analytics/trends end to end
+on a seeded backend (query + computation + JSON).
+
+Usage:
+    python benchmarks/bench_analytics.py
+    python benchmarks/bench_analytics.py --entries 100000 --days 1825 --json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import analytics
+from bench_payload import EMOTIONS, THEMES, boot_app
+
+
+def synthetic_rows(count, days, seed_value):
+    rng = random.Random(seed_value)
+    start = datetime.utcnow() - timedelta(days=days - 1)
+    step = days * 24 * 60 * 60 / count
+    return [{
+        'created_at': (start + timedelta(seconds=i * step)).isoformat(sep=' '),
+        'sentiment_score': round(rng.uniform(-1, 1), 2),
+        'emotions': rng.sample(EMOTIONS, 3),
+        'key_themes': rng.sample(THEMES, 2)
+    } for i in range(count)], start.date()
+
+
+def time_trends(rows, start, end, repeats):
+    analytics.trends(rows[:10], start, end)  # pay the NumPy import outside the timings
+    timings = []
+    for _ in range(repeats):
+        began = time.perf_counter()
+        analytics.trends(rows, start, end)
+        timings.append(time.perf_counter() - began)
+    return {'median_ms': round(statistics.median(timings) * 1000, 1),
+            'min_ms': round(min(timings) * 1000, 1)}
+
+
+def time_endpoint(backend, rows, days, repeats):
+    with contextlib.redirect_stdout(sys.stderr):
+        journal_app = boot_app(backend)
+        client = journal_app.app.test_client()
+        client.post('/signup', json={'email': 'analytics@bench.local', 'password': 'bench-password'})
+        client.post('/login', json={'email': 'analytics@bench.local', 'password': 'bench-password'})
+        with client.session_transaction() as sess:
+            user_id = sess['user']['id']
+        for i in range(0, len(rows), 1000):
+            journal_app.entry_store.insert_many([
+                dict(row, user_id=user_id, content=f'entry {i + n}')
+                for n, row in enumerate(rows[i:i + 1000])
+            ])
+
+    timings = []
+    size = 0
+    for _ in range(repeats):
+        began = time.perf_counter()
+        # A fresh query string each time so conditional GETs cannot short-circuit
+        response = client.get(f'/api/analytics/trends?days={days}&top=10&_={time.perf_counter_ns()}',
+                              headers={'Accept-Encoding': 'identity'})
+        timings.append(time.perf_counter() - began)
+        if response.status_code != 200:
+            raise SystemExit(f"trends returned {response.status_code}: {response.get_data(as_text=True)}")
+        size = len(response.get_data())
+    return {'median_ms': round(statistics.median(timings) * 1000, 1), 'response_bytes': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time trends analytics on long histories')
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=1825, help='span of the history in days')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--backend', choices=['memory', 'sqlite', 'none'], default='sqlite',
+                        help="backend for the end-to-end request ('none' skips it)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    rows, start = synthetic_rows(args.entries, args.days, args.seed)
+    end = start + timedelta(days=args.days - 1)
+
+    results = {
+        'entries': args.entries,
+        'days': args.days,
+        'trends': time_trends(rows, start, end, args.repeats)
+    }
+    if args.backend != 'none':
+        results['endpoint'] = dict(time_endpoint(args.backend, rows, args.days, args.repeats),
+                                   backend=args.backend)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*64)
+    print(f"Trends Analytics ({args.entries:,} entries over {args.days} days)")
+    print("="*64)
+    timing = results['trends']
+    print(f"analytics.trends(): {timing['median_ms']:.1f} ms median, {timing['min_ms']:.1f} ms min")
+    if 'endpoint' in results:
+        endpoint = results['endpoint']
+        print("-"*64)
+        print(f"GET /api/analytics/trends ({endpoint['backend']}): {endpoint['median_ms']:.1f} ms, "
+              f"{endpoint['response_bytes'] / 1024:.1f} KB")
+    print("="*64)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
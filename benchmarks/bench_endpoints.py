@@ -0,0 +1,339 @@
+"""
+Benchmark: end-to-end endpoint latency and throughput
+
+Boots the Flask app on a local port against fake OpenAI (and optionally fake
+Supabase) servers from fake_services.py, then drives concurrent synthetic
+users through journaling sessions: sign up, log in, load the dashboard,
+write entries, search, open the weekly report, chat and export. Results are
+per-endpoint latency percentiles, histograms and requests/sec as JSON.
+
+Usage:
+    python benchmarks/bench_endpoints.py --users 20 --sessions 3
+    python benchmarks/bench_endpoints.py --backend sqlite --openai-latency-ms 800 --openai-failure-rate 0.05
+    python benchmarks/bench_endpoints.py --backend supabase --supabase-latency-ms 30   # needs supabase-py
+    python benchmarks/bench_endpoints.py --output run.json --compare baseline.json --tolerance 0.2
+
+--compare exits with status 1 when any endpoint's p50 or p99 regressed by
+more than --tolerance relative to the baseline run.
+"""
+
+import argparse
+import contextlib
+import http.cookiejar
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_services import FakeOpenAIServer, FakeSupabaseServer, Injector
+
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+ENTRY_TEMPLATES = [
+    "Work was {adj} today. The {thing} took most of the afternoon and I felt {feeling}.",
+    "Went for a {activity} with {person}. Feeling {feeling} and a bit {feeling2}.",
+    "Couldn't sleep well, kept thinking about the {thing}. {feeling} but trying to stay positive.",
+    "Grateful for {person} today. We talked about {thing} and I feel {feeling}.",
+    "Long day. {activity} helped me reset, though the {thing} still makes me {feeling}.",
+]
+WORDS = {
+    'adj': ['busy', 'calm', 'overwhelming', 'productive', 'slow'],
+    'thing': ['deadline', 'project review', 'family dinner', 'exam', 'move', 'presentation'],
+    'feeling': ['happy', 'anxious', 'tired', 'hopeful', 'stressed', 'grateful', 'calm'],
+    'feeling2': ['relieved', 'nervous', 'content', 'restless'],
+    'activity': ['run', 'walk', 'yoga session', 'bike ride', 'swim'],
+    'person': ['my sister', 'an old friend', 'my partner', 'the team', 'mom'],
+}
+SEARCH_TERMS = ['work', 'deadline', 'grateful', 'run', 'sleep', 'family', 'stress', 'walk']
+CHAT_MESSAGES = ['hello', 'show my progress', 'give me tips', 'what patterns do you notice', 'weekly report']
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class HTTPChatClient:
+    """Minimal chat-completions client used when the openai package is not installed"""
+
+    def __init__(self, base_url, timeout=60):
+        self.chat = self
+        self.completions = self
+        self._url = base_url.rstrip('/') + '/chat/completions'
+        self._timeout = timeout
+
+    def create(self, **kwargs):
+        request = urllib.request.Request(self._url, data=json.dumps(kwargs).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        if kwargs.get('stream'):
+            return self._stream(request)
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            payload = json.loads(response.read())
+        message = type('Message', (), {'content': payload['choices'][0]['message']['content']})()
+        choice = type('Choice', (), {'message': message})()
+        usage = type('Usage', (), payload.get('usage', {}))()
+        return type('Completion', (), {'choices': [choice], 'usage': usage})()
+
+    def _stream(self, request):
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            for line in response:
+                line = line.decode('utf-8').strip()
+                if not line.startswith('data: ') or line == 'data: [DONE]':
+                    continue
+                payload = json.loads(line[len('data: '):])
+                choices = [type('Choice', (), {'delta': type('Delta', (), c['delta'])()})()
+                           for c in payload.get('choices', [])]
+                usage = type('Usage', (), payload['usage'])() if payload.get('usage') else None
+                yield type('Chunk', (), {'choices': choices, 'usage': usage})()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, latency_ms, ok):
+        with self._lock:
+            self.samples[endpoint].append(latency_ms)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            histogram = {}
+            for bound in HISTOGRAM_BOUNDS_MS + [float('inf')]:
+                label = f'le_{bound}' if bound != float('inf') else 'le_inf'
+                histogram[label] = sum(1 for s in samples if s <= bound)
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'errors': self.errors[endpoint],
+                'requests_per_sec': round(len(samples) / elapsed, 2),
+                'mean_ms': round(statistics.fmean(samples), 3),
+                'p50_ms': round(percentile(samples, 50), 3),
+                'p90_ms': round(percentile(samples, 90), 3),
+                'p99_ms': round(percentile(samples, 99), 3),
+                'max_ms': round(max(samples), 3),
+                'histogram_ms': histogram,
+            }
+        total = sum(len(s) for s in self.samples.values())
+        return {
+            'elapsed_sec': round(elapsed, 3),
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'requests_per_sec': round(total / elapsed, 2) if elapsed else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+class SyntheticUser:
+    """One browser-like client with its own cookie jar"""
+
+    def __init__(self, base_url, index, recorder, rng):
+        self.base_url = base_url
+        self.email = f'bench-user-{index}-{random.getrandbits(32):08x}@example.com'
+        self.password = 'bench-password-123'
+        self.recorder = recorder
+        self.rng = rng
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(self, endpoint, path, method='GET', payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        status, body = 0, b''
+        try:
+            with self.opener.open(request, timeout=120) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except Exception:
+            status = 0
+        self.recorder.add(endpoint, (time.perf_counter() - start) * 1000, 0 < status < 500)
+        try:
+            return status, json.loads(body) if body else None
+        except ValueError:
+            return status, None
+
+    def call_stream(self, endpoint, path):
+        """Read an SSE response, recording time to the first event and to the end"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            with self.opener.open(self.base_url + path, timeout=120) as response:
+                first = True
+                for line in response:
+                    if first and line.startswith(b'event:'):
+                        self.recorder.add(endpoint + ' (first event)', (time.perf_counter() - start) * 1000, True)
+                        first = False
+                ok = response.status < 500
+        except urllib.error.HTTPError as e:
+            ok = e.code < 500
+        except Exception:
+            ok = False
+        self.recorder.add(endpoint, (time.perf_counter() - start) * 1000, ok)
+
+    def entry_text(self):
+        template = self.rng.choice(ENTRY_TEMPLATES)
+        return template.format(**{key: self.rng.choice(values) for key, values in WORDS.items()})
+
+    def run(self, sessions):
+        self.call('POST /signup', '/signup', 'POST', {'email': self.email, 'password': self.password})
+        for _ in range(sessions):
+            self.call('POST /login', '/login', 'POST', {'email': self.email, 'password': self.password})
+            self.call('GET /api/journal/entries', '/api/journal/entries?limit=10')
+            self.call('GET /api/stats/metrics', '/api/stats/metrics')
+            for _ in range(self.rng.randint(1, 3)):
+                status, body = self.call('POST /api/journal/create', '/api/journal/create', 'POST',
+                                         {'content': self.entry_text()})
+                if status == 202 and body and body.get('analysis_url'):
+                    self.call('GET /api/journal/analysis', body['analysis_url'])
+            self.call('GET /api/journal/search', f'/api/journal/search?limit=20&q={self.rng.choice(SEARCH_TERMS)}')
+            if self.rng.random() < 0.5:
+                self.call('GET /api/weekly-report', '/api/weekly-report')
+            else:
+                self.call_stream('GET /api/weekly-report/stream', '/api/weekly-report/stream')
+            self.call('GET /api/weekly-comparison', '/api/weekly-comparison')
+            self.call('POST /api/chat/reflect', '/api/chat/reflect', 'POST',
+                      {'message': self.rng.choice(CHAT_MESSAGES)})
+            roll = self.rng.random()
+            if roll < 0.2:
+                self.call('GET /api/export/json', '/api/export/json')
+            elif roll < 0.3:
+                self.call('GET /api/export/json?format=ndjson', '/api/export/json?format=ndjson')
+            elif roll < 0.4:
+                self.call('GET /api/export/pdf', '/api/export/pdf')
+            self.call('GET /logout', '/logout')
+
+
+def boot_app(args, openai_server, supabase_server):
+    """Configure the environment, import app and serve it on a free local port"""
+    os.environ['OPENAI_API_KEY'] = 'sk-bench-fake'
+    os.environ['OPENAI_BASE_URL'] = openai_server.url + '/v1'
+    os.environ.setdefault('FLASK_SECRET_KEY', 'bench-secret')
+    if supabase_server:
+        os.environ['MODE'] = 'cloud'
+        os.environ['SUPABASE_URL'] = supabase_server.url
+        os.environ['SUPABASE_KEY'] = 'bench.fake.key'
+        os.environ['STORAGE_BACKEND'] = 'supabase'
+    else:
+        os.environ['MODE'] = 'local'
+        os.environ['STORAGE_BACKEND'] = args.backend
+        # The SQLite file (and anything else relative) lands in a scratch directory
+        os.chdir(tempfile.mkdtemp(prefix='bench-endpoints-'))
+    os.environ.setdefault('ANALYSIS_CACHE_TTL', '3600')
+
+    import app as journal_app
+    if journal_app.openai_client is None:
+        journal_app.openai_client = journal_app.metrics.trace_openai(HTTPChatClient(openai_server.url + '/v1'))
+    if supabase_server and journal_app.entry_store is None:
+        raise SystemExit('supabase-py is required for --backend supabase')
+
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, journal_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def compare(current, baseline, tolerance):
+    """Endpoints whose p50/p99 grew by more than `tolerance` (fraction)"""
+    regressions = []
+    for endpoint, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if before[metric] > 0 and now[metric] > before[metric] * (1 + tolerance):
+                regressions.append({'endpoint': endpoint, 'metric': metric, 'baseline': before[metric],
+                                    'current': now[metric], 'change': round(now[metric] / before[metric] - 1, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API endpoints against fake OpenAI/Supabase services')
+    parser.add_argument('--backend', choices=['memory', 'sqlite', 'supabase'], default='memory')
+    parser.add_argument('--users', type=int, default=10, help='concurrent synthetic users')
+    parser.add_argument('--sessions', type=int, default=3, help='journaling sessions per user')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--openai-latency-ms', type=float, default=400.0)
+    parser.add_argument('--openai-jitter-ms', type=float, default=150.0)
+    parser.add_argument('--openai-failure-rate', type=float, default=0.0)
+    parser.add_argument('--openai-token-ms', type=float, default=0.0, help='delay per streamed token')
+    parser.add_argument('--supabase-latency-ms', type=float, default=25.0)
+    parser.add_argument('--supabase-jitter-ms', type=float, default=10.0)
+    parser.add_argument('--supabase-failure-rate', type=float, default=0.0)
+    parser.add_argument('--output', help='write results JSON to this file')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p50/p99 growth vs baseline')
+    args = parser.parse_args()
+
+    openai_server = FakeOpenAIServer(Injector(args.openai_latency_ms, args.openai_jitter_ms,
+                                              args.openai_failure_rate, args.seed),
+                                     token_delay_ms=args.openai_token_ms).start()
+    supabase_server = None
+    if args.backend == 'supabase':
+        supabase_server = FakeSupabaseServer(Injector(args.supabase_latency_ms, args.supabase_jitter_ms,
+                                                      args.supabase_failure_rate, args.seed + 1)).start()
+
+    # App logging goes to stderr so stdout carries only the results JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        server, base_url = boot_app(args, openai_server, supabase_server)
+
+        recorder = Recorder()
+        users = [SyntheticUser(base_url, i, recorder, random.Random(args.seed * 1000 + i))
+                 for i in range(args.users)]
+        threads = [threading.Thread(target=user.run, args=(args.sessions,)) for user in users]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+    results = recorder.summary(elapsed)
+    results['config'] = {
+        'backend': args.backend, 'users': args.users, 'sessions': args.sessions, 'seed': args.seed,
+        'analysis_async': os.getenv('ANALYSIS_ASYNC', 'false'), 'analysis_engine': os.getenv('ANALYSIS_ENGINE', 'gpt'),
+    }
+    results['fakes'] = {'openai': openai_server.injector.stats()}
+    if supabase_server:
+        results['fakes']['supabase'] = supabase_server.injector.stats()
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            results['regressions'] = compare(results, json.load(f), args.tolerance)
+        exit_code = 1 if results['regressions'] else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    openai_server.stop()
+    if supabase_server:
+        supabase_server.stop()
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark: bulk import vs replaying entries through /api/journal/create
+
+Seeds one user's journal, downloads it with /api/export/json and restores it
+into fresh accounts:
+- replay: one POST /api/journal/create per entry (the only way to restore a
+  backup before /api/journal/import existed; analysis runs for every entry)
+- import: one streamed POST /api/journal/import (analysis fields reused,
+  batched inserts)
+- re-import: the same upload again, every entry skipped as a duplicate
+Reports entries per second for each. The replay runs on a sample of entries
+(--replay) and is extrapolated, since it is slow at large counts.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --backend memory --entries 20000 --json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_payload import boot_app, seed
+
+
+def login_new_user(client, email):
+    client.get('/logout')
+    client.post('/signup', json={'email': email, 'password': 'bench-password'})
+    client.post('/login', json={'email': email, 'password': 'bench-password'})
+
+
+def timed_import(client, body, batch_size):
+    start = time.perf_counter()
+    response = client.post('/api/journal/import', data=body, content_type='application/json',
+                           headers={'Accept-Encoding': 'identity'})
+    elapsed = time.perf_counter() - start
+    result = response.get_json()
+    if response.status_code != 200:
+        raise SystemExit(f"import returned {response.status_code}: {result}")
+    return {
+        'seconds': round(elapsed, 3),
+        'imported': result['imported'],
+        'duplicates': result['duplicates'],
+        'entries_per_second': round(result['processed'] / elapsed)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare bulk import with per-entry replay')
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='sqlite')
+    parser.add_argument('--entries', type=int, default=5000, help='entries in the exported journal')
+    parser.add_argument('--replay', type=int, default=300, help='entries replayed through /api/journal/create')
+    parser.add_argument('--batch-size', type=int, default=500, help='IMPORT_BATCH_SIZE')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    os.environ['IMPORT_BATCH_SIZE'] = str(args.batch_size)
+    with contextlib.redirect_stdout(sys.stderr):
+        journal_app = boot_app(args.backend)
+        client = journal_app.app.test_client()
+        seed(journal_app, client, args.entries, args.seed)
+        body = client.get('/api/export/json', headers={'Accept-Encoding': 'identity'}).get_data()
+        entries = json.loads(body)['entries']
+
+        login_new_user(client, 'replay@bench.local')
+        sample = entries[:args.replay]
+        start = time.perf_counter()
+        for entry in sample:
+            client.post('/api/journal/create', json={'content': entry['content']})
+        replay_seconds = time.perf_counter() - start
+
+        login_new_user(client, 'import@bench.local')
+        first = timed_import(client, body, args.batch_size)
+        again = timed_import(client, body, args.batch_size)
+
+    replay_rate = len(sample) / replay_seconds if replay_seconds else 0.0
+    results = {
+        'backend': args.backend,
+        'entries': args.entries,
+        'upload_bytes': len(body),
+        'batch_size': args.batch_size,
+        'replay': {
+            'entries': len(sample),
+            'entries_per_second': round(replay_rate),
+            'estimated_seconds': round(args.entries / replay_rate, 3) if replay_rate else None
+        },
+        'import': first,
+        'reimport': again,
+        'speedup': round(first['entries_per_second'] / replay_rate, 1) if replay_rate else None
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*64)
+    print(f"Journal Restore ({args.backend}, {args.entries} entries, "
+          f"{len(body) / 1024:.0f} KB upload, batches of {args.batch_size})")
+    print("="*64)
+    print(f"{'method':<28} {'seconds':>10} {'entries/s':>10} {'inserted':>9}")
+    replay = results['replay']
+    print(f"{'replay (create per entry)':<28} {replay['estimated_seconds']:>10.2f} "
+          f"{replay['entries_per_second']:>10,} {'(est.)':>9}")
+    for name, label in (('import', 'import'), ('reimport', 're-import (all duplicates)')):
+        r = results[name]
+        print(f"{label:<28} {r['seconds']:>10.2f} {r['entries_per_second']:>10,} {r['imported']:>9,}")
+    print("-"*64)
+    print(f"Import speedup over replay: {results['speedup']}x")
+    print("="*64)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Benchmark: chat intent routing, substring if/elif chain vs the compiled router
+
+Generates a corpus of chat inputs (the assistant's own suggested prompts,
+templated questions and free-form small talk) and measures messages/sec for
+the old routing, which ran `any(word in message for word in [...])` per
+branch and stopped at the first hit, against chat_intents.IntentRouter, which
+scans each message once with a single trie-factored regex and scores every
+intent. 'legacy, all branches' runs the substring checks for every branch,
+which is what scoring intents that way would cost. Also lists messages the
+old chain and the router route differently, mostly substring misfires of the
+old chain ('hi' in 'this', 'how' in 'show').
+
+Usage:
+    python benchmarks/bench_intents.py
+    python benchmarks/bench_intents.py --messages 50000 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chat_intents
+
+# The if/elif chain generate_assistant_response used, in branch order
+LEGACY_CHAIN = [
+    ('greeting', ['hello', 'hi', 'hey', 'greetings']),
+    ('progress', ['progress', 'stats', 'how am i doing', 'track']),
+    ('tips', ['how', 'start', 'begin', 'tips', 'help', 'guide']),
+    ('topics', ['write about', 'topics', 'ideas', 'prompts']),
+    ('wellness', ['wellness', 'mental health', 'self-care', 'anxiety', 'stress', 'depressed']),
+    ('consistency', ['consistent', 'habit', 'daily', 'routine', 'streak']),
+    ('patterns', ['pattern', 'insight', 'trend', 'notice', 'learn']),
+    ('motivation', ['motivate', 'encourage', 'inspire', 'why journal']),
+    ('weekly_report', ['week', 'report', 'summary']),
+    ('export', ['export', 'download', 'backup', 'save']),
+]
+
+TEMPLATES = [
+    'can you {verb} my {thing}', 'i want to {verb} my {thing} please', '{greeting} {filler}',
+    'what is this {thing} about', 'i feel {feeling} today, {filler}', 'any {thing} for me?',
+    'please show the {thing}', '{filler} {filler}', 'why should i keep a journal',
+    'is there a way to {verb} everything', 'i have been {feeling} this week',
+]
+WORDS = {
+    'verb': ['see', 'export', 'track', 'download', 'understand', 'improve', 'review', 'save'],
+    'thing': ['progress', 'weekly report', 'mood patterns', 'journal', 'entries', 'streak',
+              'writing prompts', 'ideas', 'summary', 'trends', 'stats', 'habits'],
+    'greeting': ['hello', 'hi', 'hey there', 'good morning', 'greetings'],
+    'feeling': ['stressed', 'anxious', 'motivated', 'tired', 'happy', 'overwhelmed', 'calm'],
+    'filler': ['thanks', 'ok', 'that makes sense', 'this is nice', 'whatever you think', 'show me',
+               'tell me something', 'i am not sure', 'sounds good', 'whatsoever'],
+}
+
+
+def legacy_route(message):
+    for name, words in LEGACY_CHAIN:
+        if any(word in message for word in words):
+            return name
+    return 'default'
+
+
+def legacy_all_branches(message):
+    return [name for name, words in LEGACY_CHAIN if any(word in message for word in words)]
+
+
+def build_corpus(router, size, seed):
+    rng = random.Random(seed)
+    suggestions = [s.lower() for intent in router.intents.values()
+                   for response in intent['responses'] for s in response['suggestions']]
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.3:
+            corpus.append(rng.choice(suggestions))
+            continue
+        # Chat inputs are often a few sentences long
+        sentences = []
+        for _ in range(1 if rng.random() < 0.6 else rng.randint(2, 4)):
+            template = rng.choice(TEMPLATES)
+            sentences.append(template.format(**{key: rng.choice(values) for key, values in WORDS.items()}))
+        corpus.append(' '.join(sentences))
+    return corpus
+
+
+def throughput(routes, corpus, repeat):
+    """Best-of-`repeat` messages/sec per route, alternating routes to share machine noise"""
+    best = {name: float('inf') for name in routes}
+    for _ in range(repeat):
+        for name, route in routes.items():
+            start = time.perf_counter()
+            for message in corpus:
+                route(message)
+            best[name] = min(best[name], time.perf_counter() - start)
+    return {name: round(len(corpus) / seconds, 1) for name, seconds in best.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chat intent routing')
+    parser.add_argument('--messages', type=int, default=20000, help='corpus size')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    router = chat_intents.IntentRouter.from_file()
+    corpus = build_corpus(router, args.messages, args.seed)
+
+    disagreements = {}
+    for message in set(corpus):
+        old, new = legacy_route(message), router.match(message)
+        if old != new:
+            disagreements[message] = {'legacy': old, 'router': new}
+
+    rates = throughput({'legacy': legacy_route, 'legacy_all': legacy_all_branches, 'router': router.match},
+                       corpus, args.repeat)
+    results = {
+        'messages': len(corpus),
+        'avg_words': round(sum(len(m.split()) for m in corpus) / len(corpus), 1),
+        'legacy_messages_per_sec': rates['legacy'],
+        'legacy_all_branches_messages_per_sec': rates['legacy_all'],
+        'router_messages_per_sec': rates['router'],
+        'distinct_messages': len(set(corpus)),
+        'routed_differently': len(disagreements),
+        'examples': dict(sorted(disagreements.items(), key=lambda item: (len(item[0]), item[0]))[:15]),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*60)
+    print(f"Chat Intent Routing ({results['messages']} messages, {results['avg_words']} words avg)")
+    print("="*60)
+    print(f"legacy if/elif chain  {results['legacy_messages_per_sec']:>12,.0f} msg/s")
+    print(f"legacy, all branches  {results['legacy_all_branches_messages_per_sec']:>12,.0f} msg/s")
+    print(f"compiled router       {results['router_messages_per_sec']:>12,.0f} msg/s")
+    print(f"Routed differently: {results['routed_differently']} of {results['distinct_messages']} distinct messages")
+    print("-"*60)
+    for message, routes in results['examples'].items():
+        print(f"{message[:38]:<38} {routes['legacy']:>9} -> {routes['router']}")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Benchmark: local sentiment engine vs recorded GPT-4o analyses
+
+Loads entries that were analyzed by GPT-4o (from the local SQLite database or
+a JSONL file of {"content", "sentiment_score", "emotions"} records), re-scores
+them with local_sentiment and reports latency, single vs batch throughput and
+agreement with GPT-4o.
+
+Usage:
+    python benchmarks/bench_local_sentiment.py
+    python benchmarks/bench_local_sentiment.py --input recorded.jsonl --json
+    python benchmarks/bench_local_sentiment.py --threshold 0.6
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import local_sentiment
+
+
+def _as_list(value):
+    return json.loads(value) if isinstance(value, str) else (value or [])
+
+
+def _bucket(score):
+    return 'positive' if score > 0.3 else 'negative' if score < -0.3 else 'neutral'
+
+
+def load_sqlite(path):
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    rows = db.execute('SELECT content, sentiment_score, emotions FROM journal_entries').fetchall()
+    db.close()
+    records = []
+    for row in rows:
+        emotions = _as_list(row['emotions'])
+        # Skip placeholder rows written while GPT-4o was unavailable
+        if row['sentiment_score'] == 0 and emotions == ['reflective']:
+            continue
+        records.append({'content': row['content'], 'sentiment_score': row['sentiment_score'], 'emotions': emotions})
+    return records
+
+
+def load_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def pearson(xs, ys):
+    if len(xs) < 2 or statistics.pstdev(xs) == 0 or statistics.pstdev(ys) == 0:
+        return 0.0
+    mx, my = statistics.fmean(xs), statistics.fmean(ys)
+    cov = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    return cov / math.sqrt(sum((x - mx) ** 2 for x in xs) * sum((y - my) ** 2 for y in ys))
+
+
+def agreement(records, results):
+    gpt = [float(r['sentiment_score']) for r in records]
+    local = [a['sentiment_score'] for a, _ in results]
+    bucket_matches = sum(_bucket(g) == _bucket(l) for g, l in zip(gpt, local))
+    emotion_overlap = sum(
+        bool(set(map(str.lower, _as_list(r['emotions']))) & set(a['emotions']))
+        for r, (a, _) in zip(records, results)
+    )
+    n = len(records)
+    return {
+        'entries': n,
+        'bucket_agreement': round(bucket_matches / n, 4) if n else 0.0,
+        'mean_abs_error': round(sum(abs(g - l) for g, l in zip(gpt, local)) / n, 4) if n else 0.0,
+        'pearson_r': round(pearson(gpt, local), 4),
+        'emotion_overlap': round(emotion_overlap / n, 4) if n else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the local sentiment engine against GPT-4o outputs')
+    parser.add_argument('--database', default='journal.db')
+    parser.add_argument('--input', help='JSONL file of recorded GPT-4o analyses (overrides --database)')
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('LOCAL_CONFIDENCE_THRESHOLD', '0.5')),
+                        help='tiered-mode confidence threshold')
+    parser.add_argument('--repeat', type=int, default=20, help='timing repetitions over the corpus')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    records = load_jsonl(args.input) if args.input else load_sqlite(args.database)
+    if not records:
+        print("❌ No recorded GPT-4o analyses found")
+        return 1
+    texts = [r['content'] for r in records]
+
+    analyzer = local_sentiment.LocalSentimentAnalyzer()
+
+    # Per-entry latency
+    latencies = []
+    for _ in range(args.repeat):
+        for text in texts:
+            start = time.perf_counter()
+            analyzer.analyze_scored(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # Throughput: one analyze_scored() call per entry vs analyze_batch_scored()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        singles = [analyzer.analyze_scored(text) for text in texts]
+    single_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        results = analyzer.analyze_batch_scored(texts)
+    batch_seconds = time.perf_counter() - start
+
+    confident = [(r, res) for r, res in zip(records, results) if res[1] >= args.threshold]
+    report = {
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 4),
+            'p50': round(percentile(latencies, 50), 4),
+            'p99': round(percentile(latencies, 99), 4),
+        },
+        'single_entries_per_sec': round(len(texts) * args.repeat / single_seconds, 1),
+        'batch_entries_per_sec': round(len(texts) * args.repeat / batch_seconds, 1),
+        'batch_speedup': round(single_seconds / batch_seconds, 2),
+        'batch_matches_single': results == singles,
+        'agreement': agreement(records, results),
+        'tiered': {
+            'threshold': args.threshold,
+            'served_locally': round(len(confident) / len(records), 4),
+            'agreement_when_local': agreement([c[0] for c in confident], [c[1] for c in confident]),
+        },
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("="*60)
+    print("Local Sentiment Engine Benchmark")
+    print("="*60)
+    print(f"Entries:              {len(records)}")
+    print(f"Latency mean/p50/p99: {report['latency_ms']['mean']:.3f} / {report['latency_ms']['p50']:.3f} / {report['latency_ms']['p99']:.3f} ms")
+    print(f"Single throughput:    {report['single_entries_per_sec']:.0f} entries/sec")
+    print(f"Batch throughput:     {report['batch_entries_per_sec']:.0f} entries/sec "
+          f"({report['batch_speedup']:.2f}x, results {'match' if report['batch_matches_single'] else 'DIFFER'})")
+    print(f"Bucket agreement:     {report['agreement']['bucket_agreement']:.1%}")
+    print(f"Mean abs error:       {report['agreement']['mean_abs_error']:.3f}")
+    print(f"Pearson r:            {report['agreement']['pearson_r']:.3f}")
+    print(f"Emotion overlap:      {report['agreement']['emotion_overlap']:.1%}")
+    print(f"Tiered @ {args.threshold:.2f}:         {report['tiered']['served_locally']:.1%} served locally, "
+          f"{report['tiered']['agreement_when_local']['bucket_agreement']:.1%} bucket agreement")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
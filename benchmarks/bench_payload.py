@@ -0,0 +1,163 @@
+"""
+Benchmark: full-row vs summary listing payloads
+
+Seeds one user's journal with entries of realistic length (a few hundred to
+several thousand characters) and requests the dashboard listings both ways:
+full rows (`view=full`, the old responses) and the summary projection
+(`view=summary`: id, timestamp, score, labels and a server-truncated preview).
+Reports response bytes (raw and gzip-compressed) and latency percentiles per
+endpoint, plus the cost of loading one full entry via /api/journal/entry/<id>.
+
+Usage:
+    python benchmarks/bench_payload.py
+    python benchmarks/bench_payload.py --backend memory --entries 2000 --requests 200 --json
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_endpoints import ENTRY_TEMPLATES, WORDS
+
+EMOTIONS = ['happy', 'anxious', 'tired', 'hopeful', 'stressed', 'grateful', 'calm', 'sad']
+THEMES = ['work', 'family', 'health', 'sleep', 'friends', 'exercise', 'study']
+
+
+def entry_text(rng):
+    # Sentence count is log-normal: most entries are a few paragraphs, some are long
+    sentences = max(2, int(rng.lognormvariate(2.8, 0.6)))
+    return ' '.join(
+        rng.choice(ENTRY_TEMPLATES).format(**{key: rng.choice(values) for key, values in WORDS.items()})
+        for _ in range(sentences)
+    )
+
+
+def boot_app(backend):
+    os.environ['MODE'] = 'local'
+    os.environ['STORAGE_BACKEND'] = backend
+    os.environ['ANALYSIS_ENGINE'] = 'local'
+    os.environ.pop('OPENAI_API_KEY', None)
+    os.environ.setdefault('FLASK_SECRET_KEY', 'bench-secret')
+    os.chdir(tempfile.mkdtemp(prefix='bench-payload-'))
+    import app as journal_app
+    return journal_app
+
+
+def seed(journal_app, client, count, seed_value):
+    rng = random.Random(seed_value)
+    client.post('/signup', json={'email': 'payload@bench.local', 'password': 'bench-password'})
+    client.post('/login', json={'email': 'payload@bench.local', 'password': 'bench-password'})
+    with client.session_transaction() as sess:
+        user_id = sess['user']['id']
+    start = datetime.utcnow() - timedelta(days=25)
+    lengths = []
+    for i in range(count):
+        content = entry_text(rng)
+        lengths.append(len(content))
+        journal_app.entry_store.insert({
+            'user_id': user_id,
+            'content': content,
+            'sentiment_score': round(rng.uniform(-1, 1), 2),
+            'emotions': rng.sample(EMOTIONS, 3),
+            'key_themes': rng.sample(THEMES, 2),
+            'created_at': (start + timedelta(minutes=i * 25 * 24 * 60 // count)).isoformat(sep=' ')
+        })
+    return lengths
+
+
+def measure(client, path, requests):
+    timings = []
+    body = b''
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        body = response.get_data()
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"{path} returned {response.status_code}: {body[:200]!r}")
+    timings.sort()
+    return {
+        'bytes': len(body),
+        'gzip_bytes': len(gzip.compress(body)),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full-row and summary listing payloads')
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='sqlite')
+    parser.add_argument('--entries', type=int, default=500, help='entries in the seeded journal')
+    parser.add_argument('--requests', type=int, default=100, help='requests per endpoint')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        journal_app = boot_app(args.backend)
+        client = journal_app.app.test_client()
+        lengths = seed(journal_app, client, args.entries, args.seed)
+
+    listings = {
+        'entries?limit=10': '/api/journal/entries?limit=10',
+        'entries?limit=50': '/api/journal/entries?limit=50',
+        'search?sentiment=positive': '/api/journal/search?limit=20&sentiment=positive',
+        'search?q=work': '/api/journal/search?limit=20&q=work',
+    }
+    endpoints = {}
+    for name, path in listings.items():
+        full = measure(client, path + '&view=full', args.requests)
+        summary = measure(client, path + '&view=summary', args.requests)
+        endpoints[name] = {
+            'full': full,
+            'summary': summary,
+            'bytes_saved': round(1 - summary['bytes'] / full['bytes'], 3) if full['bytes'] else 0.0
+        }
+    first_id = client.get('/api/journal/entries?limit=1&view=summary').get_json()['entries'][0]['id']
+    single = measure(client, f'/api/journal/entry/{first_id}', args.requests)
+
+    results = {
+        'backend': args.backend,
+        'entries': args.entries,
+        'avg_content_chars': round(statistics.mean(lengths)),
+        'requests': args.requests,
+        'endpoints': endpoints,
+        'single_entry': single
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*72)
+    print(f"Listing Payloads ({args.backend}, {args.entries} entries, "
+          f"{results['avg_content_chars']} chars avg, {args.requests} requests each)")
+    print("="*72)
+    print(f"{'endpoint':<27} {'view':<8} {'bytes':>9} {'gzip':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, result in endpoints.items():
+        for view in ('full', 'summary'):
+            r = result[view]
+            print(f"{name if view == 'full' else '':<27} {view:<8} {r['bytes']:>9,} {r['gzip_bytes']:>8,} "
+                  f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f}")
+        print(f"{'':<27} {'saved':<8} {result['bytes_saved']:>9.0%}")
+    print("-"*72)
+    print(f"{'entry/<id> (full content)':<36} {single['bytes']:>9,} {single['gzip_bytes']:>8,} "
+          f"{single['p50_ms']:>8.2f} {single['p95_ms']:>8.2f}")
+    print("="*72)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
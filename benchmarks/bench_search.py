@@ -0,0 +1,147 @@
+"""
+Benchmark: full-text search vs ILIKE '%q%' scans as the corpus grows
+
+Builds synthetic journal corpora of increasing size in an in-memory SQLite
+database (same schema, triggers and FTS5 index as the app) and times the old
+leading-wildcard LIKE scan against the ranked FTS5 query from search_index.
+
+Usage:
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --sizes 1000,10000,100000 --json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search_index
+
+# Topic words searched for; each appears in only a small share of entries,
+# like real searches, while filler text follows a Zipf-like vocabulary
+TOPICS = (
+    'working stressful grateful family running overwhelmed therapy helped '
+    'deadline anxious meditation sleepless promotion argument hiking birthday'
+).split()
+QUERIES = ['work', 'stress', 'grateful family', 'run', 'overwhel', 'therapy helped']
+TOPIC_RATE = 0.02
+
+
+def build_corpus(size, users, seed):
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnoprstuvy', k=rng.randint(3, 9))) for _ in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def entry_text():
+        words = rng.choices(vocabulary, weights, k=rng.randint(30, 120))
+        for topic in TOPICS:
+            if rng.random() < TOPIC_RATE:
+                words.insert(rng.randrange(len(words)), topic)
+        return ' '.join(words)
+
+    db = sqlite3.connect(':memory:')
+    db.row_factory = sqlite3.Row
+    db.execute('''
+        CREATE TABLE journal_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            sentiment_score REAL NOT NULL,
+            emotions TEXT,
+            key_themes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    db.execute('CREATE INDEX idx_journal_entries_user_created_id ON journal_entries (user_id, created_at DESC, id DESC)')
+    search_index.install_sqlite(db)
+    db.executemany(
+        'INSERT INTO journal_entries (user_id, content, sentiment_score, emotions, key_themes, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (rng.randrange(users), entry_text(),
+             round(rng.uniform(-1, 1), 2), '[]', '[]',
+             f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00')
+            for _ in range(size)
+        )
+    )
+    db.commit()
+    return db
+
+
+def like_search(db, user_id, query, limit):
+    return db.execute(
+        'SELECT * FROM journal_entries WHERE user_id = ? AND content LIKE ? '
+        'ORDER BY created_at DESC, id DESC LIMIT ?',
+        (user_id, f'%{query}%', limit)
+    ).fetchall()
+
+
+def fts_search(db, user_id, query, limit):
+    return search_index.sqlite_search(db, user_id, search_index.parse_terms(query), limit=limit)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def time_queries(search, db, users, limit, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for user_id in range(min(users, 5)):
+            for query in QUERIES:
+                start = time.perf_counter()
+                search(db, user_id, query, limit)
+                latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50': round(percentile(latencies, 50), 3),
+        'p99': round(percentile(latencies, 99), 3),
+        'mean': round(statistics.fmean(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FTS5 search against LIKE scans')
+    parser.add_argument('--sizes', default='1000,10000,50000,100000', help='comma-separated corpus sizes')
+    parser.add_argument('--users', type=int, default=10, help='users the corpus is spread across')
+    parser.add_argument('--limit', type=int, default=20, help='page size')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(',') if s]:
+        db = build_corpus(size, args.users, args.seed)
+        results.append({
+            'entries': size,
+            'like_ms': time_queries(like_search, db, args.users, args.limit, args.repeat),
+            'fts_ms': time_queries(fts_search, db, args.users, args.limit, args.repeat),
+        })
+        db.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*60)
+    print("Search Latency vs Corpus Size (SQLite)")
+    print("="*60)
+    print(f"{'entries':>10}  {'LIKE p50/p99 ms':>18}  {'FTS5 p50/p99 ms':>18}")
+    for r in results:
+        like, fts = r['like_ms'], r['fts_ms']
+        print(f"{r['entries']:>10}  {like['p50']:>8.3f} / {like['p99']:<7.3f}  {fts['p50']:>8.3f} / {fts['p99']:<7.3f}")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
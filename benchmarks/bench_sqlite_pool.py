@@ -0,0 +1,161 @@
+"""
+Benchmark: per-request sqlite3.connect vs the pooled WAL connection manager
+
+Runs a request-shaped workload (user lookup, recent entries, rollup read and
+an occasional entry insert) from several threads against a temporary
+database, first opening a fresh default-configured connection per request
+(the old get_db) and then using db_pool.ConnectionPool.
+
+Usage:
+    python benchmarks/bench_sqlite_pool.py
+    python benchmarks/bench_sqlite_pool.py --threads 16 --requests 2000 --json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import ConnectionPool
+
+SCHEMA = [
+    'CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL)',
+    '''CREATE TABLE journal_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, content TEXT NOT NULL,
+        sentiment_score REAL NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+    'CREATE INDEX idx_journal_entries_user_created_id ON journal_entries (user_id, created_at DESC, id DESC)',
+]
+
+
+def build_database(path, users, entries):
+    db = sqlite3.connect(path)
+    for statement in SCHEMA:
+        db.execute(statement)
+    db.executemany('INSERT INTO users (email, password_hash) VALUES (?, ?)',
+                   [(f'user{i}@example.com', 'x' * 64) for i in range(users)])
+    rng = random.Random(1)
+    db.executemany('INSERT INTO journal_entries (user_id, content, sentiment_score) VALUES (?, ?, ?)',
+                   [(rng.randint(1, users), 'entry text ' * 20, rng.uniform(-1, 1)) for _ in range(entries)])
+    db.commit()
+    db.close()
+
+
+def unpooled_connect(path):
+    def get_db():
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        return db
+    return get_db
+
+
+def handle_request(get_db, rng, users, write_ratio):
+    db = get_db()
+    try:
+        user_id = rng.randint(1, users)
+        db.execute('SELECT * FROM users WHERE email = ?', (f'user{user_id - 1}@example.com',)).fetchone()
+        db.execute('SELECT * FROM journal_entries WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 10',
+                   (user_id,)).fetchall()
+        db.execute('SELECT COUNT(*), AVG(sentiment_score) FROM journal_entries WHERE user_id = ?',
+                   (user_id,)).fetchone()
+        if rng.random() < write_ratio:
+            db.execute('INSERT INTO journal_entries (user_id, content, sentiment_score) VALUES (?, ?, ?)',
+                       (user_id, 'new entry', 0.1))
+            db.commit()
+    finally:
+        db.close()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(get_db, threads, requests, users, write_ratio):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(seed, count):
+        rng = random.Random(seed)
+        local = []
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                handle_request(get_db, rng, users, write_ratio)
+            except sqlite3.Error as e:
+                errors.append(str(e))
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    per_thread = requests // threads
+    workers = [threading.Thread(target=worker, args=(i, per_thread)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled SQLite connections under concurrent load')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='share of requests that insert an entry')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Separate files so the baseline keeps the default rollback journal
+        baseline_path = os.path.join(tmp, 'baseline.db')
+        pooled_path = os.path.join(tmp, 'pooled.db')
+        build_database(baseline_path, args.users, args.entries)
+        build_database(pooled_path, args.users, args.entries)
+
+        results['baseline'] = run(unpooled_connect(baseline_path), args.threads, args.requests,
+                                  args.users, args.write_ratio)
+        pool = ConnectionPool(pooled_path, max_connections=args.threads)
+        results['pooled'] = run(pool.acquire, args.threads, args.requests, args.users, args.write_ratio)
+        results['pool_stats'] = pool.stats()
+        pool.close_all()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*60)
+    print(f"SQLite Connection Benchmark ({args.threads} threads, {args.write_ratio:.0%} writes)")
+    print("="*60)
+    for name in ('baseline', 'pooled'):
+        r = results[name]
+        print(f"{name:<10} {r['requests_per_sec']:>9.0f} req/s   p50 {r['p50_ms']:.3f} ms   "
+              f"p99 {r['p99_ms']:.3f} ms   errors {r['errors']}")
+    speedup = results['pooled']['requests_per_sec'] / max(results['baseline']['requests_per_sec'], 1e-9)
+    print(f"Throughput: {speedup:.2f}x")
+    print("="*60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
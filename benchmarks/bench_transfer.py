@@ -0,0 +1,131 @@
+"""
+Benchmark: bytes transferred per dashboard load
+
+Replays what a browser fetches for GET /dashboard: the HTML, the CSS/JS it
+links from /static and the API calls dashboard.js makes on load. Compares
+- before: plain /static/<file> URLs (Flask's default caching) and identity
+  encoding, as served before assets were fingerprinted and compressed
+- after: fingerprinted /static/dist/ URLs and gzip/brotli negotiation
+for a first visit (empty browser cache) and a repeat visit (assets and API
+responses cached; immutable assets are not requested again, everything
+else is revalidated with If-None-Match). Third-party CDN assets (Chart.js,
+web fonts) are not counted.
+
+Usage:
+    python benchmarks/bench_transfer.py
+    python benchmarks/bench_transfer.py --entries 200 --json
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import re
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_payload import boot_app, seed
+
+LOAD_API_CALLS = [
+    '/api/journal/entries?limit=10&view=summary',
+    '/api/stats/metrics',
+    '/api/weekly-comparison',
+]
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+
+def decode(response):
+    body = response.get_data()
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        body = gzip.decompress(body)
+    elif encoding == 'br':
+        import brotli
+        body = brotli.decompress(body)
+    return body.decode('utf-8')
+
+
+def visit(client, journal_app, fingerprinted, accept_encoding, cache):
+    """One dashboard load; `cache` maps URL -> (ETag, Cache-Control) from earlier visits"""
+    headers = {'Accept-Encoding': accept_encoding}
+    totals = {'requests': 0, 'bytes': 0, 'not_modified': 0, 'skipped': 0}
+
+    def fetch(url):
+        cached = cache.get(url)
+        if cached and 'immutable' in (cached[1] or ''):
+            totals['skipped'] += 1
+            return None
+        request_headers = dict(headers)
+        if cached and cached[0]:
+            request_headers['If-None-Match'] = cached[0]
+        response = client.get(url, headers=request_headers)
+        totals['requests'] += 1
+        totals['bytes'] += len(response.get_data())
+        if response.status_code == 304:
+            totals['not_modified'] += 1
+        else:
+            cache[url] = (response.headers.get('ETag'), response.headers.get('Cache-Control'))
+        return response
+
+    page = client.get('/dashboard', headers=headers)
+    totals['requests'] += 1
+    totals['bytes'] += len(page.get_data())
+    # Before: the plain URL the template produced before assets were fingerprinted
+    manifest = journal_app.asset_manifest
+    logical = {} if fingerprinted else {'/static/' + manifest.url_path(name): '/static/' + name
+                                        for name in manifest.manifest}
+    for url in ASSET_RE.findall(decode(page)):
+        fetch(logical.get(url, url))
+    for url in LOAD_API_CALLS:
+        fetch(url)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure bytes transferred per dashboard load')
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='sqlite')
+    parser.add_argument('--entries', type=int, default=100, help='entries in the seeded journal')
+    parser.add_argument('--accept-encoding', default='gzip, deflate, br', help="the browser's Accept-Encoding")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        journal_app = boot_app(args.backend)
+        client = journal_app.app.test_client()
+        seed(journal_app, client, args.entries, args.seed)
+
+    results = {'entries': args.entries, 'encodings': list(journal_app.compression.available_encodings())}
+    for name, fingerprinted, accept in (('before', False, 'identity'), ('after', True, args.accept_encoding)):
+        cache = {}
+        results[name] = {
+            'first_visit': visit(client, journal_app, fingerprinted, accept, cache),
+            'repeat_visit': visit(client, journal_app, fingerprinted, accept, cache)
+        }
+    first_before = results['before']['first_visit']['bytes']
+    results['first_visit_bytes_saved'] = round(1 - results['after']['first_visit']['bytes'] / first_before, 3)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("="*64)
+    print(f"Dashboard Load Transfer ({args.entries} entries, server encodings: {', '.join(results['encodings'])})")
+    print("="*64)
+    print(f"{'':<8} {'visit':<8} {'requests':>9} {'304s':>6} {'not sent':>9} {'bytes':>10}")
+    for name in ('before', 'after'):
+        for visit_name in ('first_visit', 'repeat_visit'):
+            r = results[name][visit_name]
+            print(f"{name if visit_name == 'first_visit' else '':<8} {visit_name.split('_')[0]:<8} "
+                  f"{r['requests']:>9} {r['not_modified']:>6} {r['skipped']:>9} {r['bytes']:>10,}")
+    print("-"*64)
+    print(f"First visit bytes saved: {results['first_visit_bytes_saved']:.0%}")
+    print("="*64)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
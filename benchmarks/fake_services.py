@@ -0,0 +1,547 @@
+"""
+Local stand-ins for the OpenAI and Supabase HTTP APIs used by the benchmarks
+
+FakeOpenAIServer answers POST /v1/chat/completions with sentiment analyses
+(scored by local_sentiment) or weekly reports. FakeSupabaseServer implements
+the subset of PostgREST (/rest/v1) and GoTrue (/auth/v1) that the app uses,
+over in-memory tables. Both inject configurable latency and failure rates.
+
+Run standalone to point a manually started app at them:
+    python benchmarks/fake_services.py --openai-port 8701 --supabase-port 8702
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_stats
+import local_sentiment
+import storage
+
+
+class Injector:
+    """Latency and failure injection shared by the fake services"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def apply(self):
+        """Sleep for the injected latency; True when this request should fail"""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        if delay:
+            time.sleep(delay / 1000)
+        return fail
+
+    def stats(self):
+        return {'requests': self.requests, 'injected_failures': self.failures,
+                'latency_ms': self.latency_ms, 'jitter_ms': self.jitter_ms, 'failure_rate': self.failure_rate}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw) if raw else None
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server:
+    handler = None
+
+    def __init__(self, injector=None, host='127.0.0.1', port=0):
+        self.injector = injector or Injector()
+        handler = type('Handler', (self.handler,), {'service': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ----------------------------------------------------------------------------
+# OpenAI
+# ----------------------------------------------------------------------------
+
+_ENTRY_RE = re.compile(r'Journal Entry:\n"(.*)"\n\nRespond', re.DOTALL)
+
+
+class _OpenAIHandler(_Handler):
+
+    def do_POST(self):
+        payload = self._body() or {}
+        if self.service.injector.apply():
+            return self._send(500, {'error': {'message': 'injected failure', 'type': 'server_error'}})
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self._send(404, {'error': {'message': 'not found'}})
+
+        prompt = payload.get('messages', [{}])[-1].get('content', '')
+        content = json.dumps(self.service.complete(prompt))
+        if payload.get('stream'):
+            return self._stream(payload, prompt, content)
+        self._send(200, {
+            'id': f'chatcmpl-{uuid.uuid4().hex[:12]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4o'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                      'total_tokens': (len(prompt) + len(content)) // 4}
+        })
+
+    def _stream(self, payload, prompt, content):
+        """Chat completion chunks as SSE, ~4 characters per token"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        base = {'id': f'chatcmpl-{uuid.uuid4().hex[:12]}', 'object': 'chat.completion.chunk',
+                'created': int(time.time()), 'model': payload.get('model', 'gpt-4o')}
+        for i in range(0, len(content), 4):
+            if self.service.token_delay_ms:
+                time.sleep(self.service.token_delay_ms / 1000)
+            chunk = dict(base, choices=[{'index': 0, 'delta': {'content': content[i:i + 4]}, 'finish_reason': None}])
+            self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+            self.wfile.flush()
+        if (payload.get('stream_options') or {}).get('include_usage'):
+            usage = {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                     'total_tokens': (len(prompt) + len(content)) // 4}
+            self.wfile.write(f'data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n'.encode('utf-8'))
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(_Server):
+    """Chat completions endpoint returning analysis / weekly report JSON"""
+
+    handler = _OpenAIHandler
+
+    def __init__(self, injector=None, host='127.0.0.1', port=0, token_delay_ms=0.0):
+        super().__init__(injector, host, port)
+        self.token_delay_ms = token_delay_ms
+
+    def complete(self, prompt):
+        if 'weekly analysis' in prompt:
+            return {
+                'overall_mood': 'Balanced',
+                'trajectory': 'Steady',
+                'key_insights': ['You journaled consistently this week', 'Work themes came up often'],
+                'recommendations': ['Keep writing daily', 'Take short breaks', 'Note what helped']
+            }
+        match = _ENTRY_RE.search(prompt)
+        analysis = local_sentiment.analyze(match.group(1) if match else prompt)
+        return {
+            'sentiment_score': analysis['sentiment_score'],
+            'emotions': analysis['emotions'],
+            'key_themes': analysis['key_themes'],
+            'brief_insight': analysis['brief_insight']
+        }
+
+
+# ----------------------------------------------------------------------------
+# Supabase (PostgREST + GoTrue subset)
+# ----------------------------------------------------------------------------
+
+PRIMARY_KEYS = {
+    'journal_entries': ('id',),
+    'analysis_cache': ('cache_key',),
+    'weekly_reports': ('user_id', 'window_start'),
+}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split_top(text, sep=','):
+    """Split on `sep` outside parentheses and double quotes"""
+    parts, depth, quoted, current = [], 0, False, ''
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append(current)
+            current = ''
+        else:
+            current += ch
+    parts.append(current)
+    return parts
+
+
+def _unquote(value):
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _coerce(actual, value):
+    if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(actual, op, value):
+    if op == 'is':
+        return actual is None if value == 'null' else str(actual).lower() == value
+    if actual is None:
+        return False
+    if op == 'in':
+        return str(actual) in [_unquote(v) for v in _split_top(value.strip('()'))]
+    if op in ('like', 'ilike'):
+        pattern = '^' + re.escape(value).replace(r'\*', '.*').replace('%', '.*') + '$'
+        return re.match(pattern, str(actual), re.IGNORECASE if op == 'ilike' else 0) is not None
+    value = _coerce(actual, _unquote(value))
+    actual = actual if isinstance(value, float) else str(actual)
+    return {
+        'eq': actual == value, 'neq': actual != value,
+        'gt': actual > value, 'gte': actual >= value,
+        'lt': actual < value, 'lte': actual <= value,
+    }[op]
+
+
+def _condition(expr):
+    """Predicate for 'col.op.value', 'and(...)' or 'or(...)'"""
+    for group in ('and', 'or'):
+        if expr.startswith(group + '('):
+            parts = [_condition(p) for p in _split_top(expr[len(group) + 1:-1])]
+            combine = all if group == 'and' else any
+            return lambda row, parts=parts, combine=combine: combine(p(row) for p in parts)
+    column, op, value = expr.split('.', 2)
+    negate = op == 'not'
+    if negate:
+        op, value = value.split('.', 1)
+    return lambda row: _compare(_value(row, column), op, value) != negate
+
+
+def _value(row, column):
+    if column == 'content_sha256':
+        # Generated column in setup.sql
+        return storage.content_digest(row.get('content') or '')
+    return row.get(column)
+
+
+class _SupabaseHandler(_Handler):
+
+    def _route(self, method):
+        parsed = urlparse(self.path)
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        body = self._body() if method in ('POST', 'PATCH') else None
+        if self.service.injector.apply():
+            return self._send(503, {'message': 'injected failure', 'code': 'PGRST000'})
+        path = parsed.path
+        try:
+            if path.startswith('/auth/v1/'):
+                return self._send(*self.service.auth(path[len('/auth/v1/'):], params, body))
+            if path.startswith('/rest/v1/rpc/'):
+                return self._send(*self.service.rpc(path[len('/rest/v1/rpc/'):], body or {}))
+            if path.startswith('/rest/v1/'):
+                prefer = self.headers.get('Prefer', '')
+                return self._send(*self.service.rest(method, path[len('/rest/v1/'):], params, body, prefer))
+            self._send(404, {'message': 'not found'})
+        except Exception as e:
+            self._send(400, {'message': str(e), 'code': 'PGRST100'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+
+class FakeSupabaseServer(_Server):
+    """In-memory PostgREST tables plus password auth"""
+
+    handler = _SupabaseHandler
+
+    def __init__(self, injector=None, host='127.0.0.1', port=0):
+        super().__init__(injector, host, port)
+        self.tables = {}
+        self.users = {}
+        self._lock = threading.Lock()
+
+    # -- auth -----------------------------------------------------------------
+
+    def _user_payload(self, user):
+        return {'id': user['id'], 'email': user['email'], 'aud': 'authenticated', 'role': 'authenticated',
+                'created_at': user['created_at'], 'app_metadata': {'provider': 'email'}, 'user_metadata': {}}
+
+    def _session_payload(self, user):
+        return {'access_token': f'fake.{uuid.uuid4().hex}.token', 'token_type': 'bearer', 'expires_in': 3600,
+                'expires_at': int(time.time()) + 3600, 'refresh_token': uuid.uuid4().hex,
+                'user': self._user_payload(user)}
+
+    def auth(self, action, params, body):
+        body = body or {}
+        email, password = body.get('email'), body.get('password')
+        with self._lock:
+            if action == 'signup':
+                if email in self.users:
+                    return 400, {'msg': 'User already registered', 'code': 400}
+                user = {'id': str(uuid.uuid4()), 'email': email, 'password': password, 'created_at': _now()}
+                self.users[email] = user
+                return 200, self._session_payload(user)
+            if action == 'token':
+                user = self.users.get(email)
+                if not user or user['password'] != password:
+                    return 400, {'error': 'invalid_grant', 'error_description': 'Invalid login credentials'}
+                return 200, self._session_payload(user)
+        if action == 'logout':
+            return 204, {}
+        return 404, {'msg': 'not found'}
+
+    # -- rest -----------------------------------------------------------------
+
+    def _rows(self, table):
+        if table == 'daily_user_stats':
+            # Maintained by triggers in Postgres; derived on read here
+            entries = self.tables.get('journal_entries', [])
+            return [
+                {'user_id': uid, 'day': day, 'entry_count': s['entry_count'], 'sentiment_sum': s['sentiment_sum'],
+                 'sentiment_min': s['sentiment_min'], 'sentiment_max': s['sentiment_max'],
+                 'positive_count': s['positive_count'], 'negative_count': s['negative_count'],
+                 'emotion_counts': dict(s['emotions']), 'theme_counts': dict(s['themes'])}
+                for (uid, day), s in daily_stats.build_day_rows(entries).items()
+            ]
+        return self.tables.setdefault(table, [])
+
+    def _filtered(self, table, params):
+        predicates = []
+        for key, value in params:
+            if key in ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns'):
+                continue
+            if key in ('or', 'and'):
+                predicates.append(_condition(f'{key}{value}'))
+            else:
+                predicates.append(_condition(f'{key}.{value}'))
+        return [row for row in self._rows(table) if all(p(row) for p in predicates)]
+
+    def _shape(self, rows, params):
+        params_dict = {}
+        orders = []
+        for key, value in params:
+            if key == 'order':
+                orders.extend(value.split(','))
+            params_dict[key] = value
+        for spec in reversed(orders):
+            column, _, direction = spec.partition('.')
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)),
+                          reverse=direction.startswith('desc'))
+        offset = int(params_dict.get('offset', 0))
+        if 'limit' in params_dict:
+            rows = rows[offset:offset + int(params_dict['limit'])]
+        select = params_dict.get('select', '*')
+        if select != '*':
+            columns = [c.strip() for c in select.split(',')]
+            rows = [{c: self._column(row, c) for c in columns} for row in rows]
+        return [dict(row) for row in rows]
+
+    def _column(self, row, column):
+        if column == 'content_preview':
+            # Generated column in setup.sql
+            return (row.get('content') or '')[:storage.PREVIEW_LENGTH + 1]
+        return row.get(column)
+
+    def _new_row(self, table, values):
+        row = dict(values)
+        if table == 'journal_entries':
+            row.setdefault('id', str(uuid.uuid4()))
+            row.setdefault('created_at', _now())
+            row.setdefault('updated_at', row['created_at'])
+            row.setdefault('emotions', [])
+            row.setdefault('key_themes', [])
+            row.setdefault('analysis_status', 'complete')
+        return row
+
+    def _bump_versions(self, table, rows):
+        # Trigger on journal_entries in setup.sql
+        if table != 'journal_entries':
+            return
+        versions = self.tables.setdefault('user_data_versions', [])
+        for user_id in {row.get('user_id') for row in rows}:
+            current = next((v for v in versions if v['user_id'] == user_id), None)
+            if current is None:
+                versions.append({'user_id': user_id, 'version': time.time_ns() // 1000})
+            else:
+                current['version'] = max(current['version'] + 1, time.time_ns() // 1000)
+
+    def rest(self, method, table, params, body, prefer):
+        with self._lock:
+            if method == 'GET':
+                return 200, self._shape(self._filtered(table, params), params)
+
+            rows = self._rows(table)
+            if method == 'POST':
+                records = body if isinstance(body, list) else [body]
+                keys = dict(params).get('on_conflict')
+                keys = keys.split(',') if keys else PRIMARY_KEYS.get(table, ('id',))
+                upsert = 'merge-duplicates' in prefer
+                written = []
+                for record in records:
+                    existing = None
+                    if upsert:
+                        existing = next((r for r in rows if all(r.get(k) == record.get(k) for k in keys)), None)
+                    if existing is not None:
+                        existing.update(record)
+                        written.append(existing)
+                    else:
+                        row = self._new_row(table, record)
+                        rows.append(row)
+                        written.append(row)
+                self._bump_versions(table, written)
+                return 201, [dict(r) for r in written]
+
+            matched = self._filtered(table, params)
+            if method == 'PATCH':
+                for row in matched:
+                    row.update(body or {})
+                    if table == 'journal_entries':
+                        row['updated_at'] = _now()
+                self._bump_versions(table, matched)
+                return 200, [dict(r) for r in matched]
+            if method == 'DELETE':
+                ids = {id(r) for r in matched}
+                self.tables[table] = [r for r in rows if id(r) not in ids]
+                self._bump_versions(table, matched)
+                return 200, [dict(r) for r in matched]
+        return 405, {'message': 'method not allowed'}
+
+    # -- rpc ------------------------------------------------------------------
+
+    def rpc(self, name, args):
+        if name == 'rebuild_daily_user_stats':
+            return 200, None
+        if name == 'update_journal_entries_batch':
+            with self._lock:
+                rows = {str(r['id']): r for r in self.tables.get('journal_entries', [])
+                        if r.get('user_id') == args.get('target_user')}
+                matched = []
+                for update in args.get('updates') or []:
+                    row = rows.get(str(update.get('id')))
+                    if row is not None:
+                        row.update({k: v for k, v in update.items() if k != 'id' and v is not None})
+                        row['updated_at'] = _now()
+                        matched.append(row)
+                self._bump_versions('journal_entries', matched)
+            return 200, [{'id': row['id']} for row in matched]
+        if name != 'search_journal_entries':
+            return 404, {'message': f'function {name} not found'}
+
+        prefixes = [term.split(':')[0] for term in args.get('search_query', '').split('&') if term.strip()]
+        prefixes = [p.strip().lower() for p in prefixes if p.strip()]
+        bounds = {'positive': lambda s: s > 0.3, 'negative': lambda s: s < -0.3,
+                  'neutral': lambda s: -0.3 <= s <= 0.3}
+        test = bounds.get(args.get('sentiment_filter'))
+        after = None
+        if args.get('after_rank') is not None:
+            after = (float(args['after_rank']), args['after_created_at'], str(args['after_id']))
+        start, stop = args.get('highlight_start', '<mark>'), args.get('highlight_stop', '</mark>')
+
+        matches = []
+        with self._lock:
+            for row in self._rows('journal_entries'):
+                if row.get('user_id') != args.get('search_user'):
+                    continue
+                if args.get('start_date') and row['created_at'] < args['start_date']:
+                    continue
+                if args.get('end_date') and row['created_at'] >= args['end_date']:
+                    continue
+                if test and not test(float(row['sentiment_score'])):
+                    continue
+                words = row['content'].split()
+                hit = [any(w.lower().strip('.,!?;:').startswith(p) for w in words) for p in prefixes]
+                if not prefixes or not all(hit):
+                    continue
+                rank = float(sum(w.lower().strip('.,!?;:').startswith(tuple(prefixes)) for w in words))
+                if after and (rank, row['created_at'], str(row['id'])) >= after:
+                    continue
+                snippet = ' '.join(
+                    f'{start}{w}{stop}' if w.lower().strip('.,!?;:').startswith(tuple(prefixes)) else w
+                    for w in words[:30]
+                )
+                matches.append(dict(row, rank=rank, snippet=snippet))
+        matches.sort(key=lambda r: (r['rank'], r['created_at'], str(r['id'])), reverse=True)
+        return 200, matches[:int(args.get('result_limit', 20))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run fake OpenAI and Supabase servers')
+    parser.add_argument('--openai-port', type=int, default=8701)
+    parser.add_argument('--supabase-port', type=int, default=8702)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    openai_server = FakeOpenAIServer(Injector(args.latency_ms, failure_rate=args.failure_rate),
+                                     port=args.openai_port).start()
+    supabase_server = FakeSupabaseServer(Injector(args.latency_ms, failure_rate=args.failure_rate),
+                                         port=args.supabase_port).start()
+    print(f"OPENAI_BASE_URL={openai_server.url}/v1")
+    print(f"SUPABASE_URL={supabase_server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Cold-start profile for the serverless entry point
+
+Imports api/index.py (the Vercel entry) in fresh interpreters, the same way a
+cold start does, and reports:
+- wall-clock import time (median of --runs fresh processes)
+- time to serve the first request (GET /login by default)
+- import time per top-level package from a `python -X importtime` run
+
+With --budget-ms the command exits non-zero when the median import time goes
+over budget, so it can gate CI.
+
+Usage:
+    python benchmarks/profile_startup.py
+    python benchmarks/profile_startup.py --mode cloud --budget-ms 600
+    python benchmarks/profile_startup.py --runs 10 --top 25 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+MARKER = '-- entry import --'
+
+CHILD = '''
+import json, sys, time
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+import {module} as entry
+imported = time.perf_counter()
+first_request_ms = None
+if {path!r}:
+    with entry.app.test_client() as client:
+        client.get({path!r})
+    first_request_ms = (time.perf_counter() - imported) * 1000
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'first_request_ms': first_request_ms}}),
+      file=sys.__stderr__)
+'''
+
+
+def child_env(mode):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    env['MODE'] = mode
+    env.pop('VERCEL', None)
+    if mode == 'cloud':
+        # Placeholders: clients are lazy, so nothing connects during startup
+        env.setdefault('SUPABASE_URL', 'https://profile.supabase.co')
+        env.setdefault('SUPABASE_KEY', 'profile-key')
+        env.setdefault('OPENAI_API_KEY', 'sk-profile')
+    return env
+
+
+def run_child(module, path, mode, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', CHILD.format(module=module, path=path, marker=MARKER)]
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(command, cwd=cwd, env=child_env(mode), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Startup run failed:\n{result.stderr}")
+    timing = None
+    packages = {}
+    started = False
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match and started:
+            # Self time summed per top-level package (interpreter startup excluded)
+            package = packages.setdefault(match.group(4).split('.')[0], {'self_ms': 0.0, 'modules': 0})
+            package['self_ms'] += int(match.group(1)) / 1000
+            package['modules'] += 1
+        elif line == MARKER:
+            started = True
+        elif line.startswith('{'):
+            timing = json.loads(line)
+    return timing, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile cold-start import time of the Vercel entry point')
+    parser.add_argument('--module', default='api.index', help='module a cold start imports')
+    parser.add_argument('--path', default='/login', help="first request to serve ('' to skip)")
+    parser.add_argument('--mode', choices=['local', 'cloud'], default='cloud')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest packages to list')
+    parser.add_argument('--budget-ms', type=float, help='fail when the median import time exceeds this')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    runs = [run_child(args.module, args.path, args.mode)[0] for _ in range(args.runs)]
+    _, packages = run_child(args.module, '', args.mode, importtime=True)
+
+    import_ms = [r['import_ms'] for r in runs]
+    first_ms = [r['first_request_ms'] for r in runs if r['first_request_ms'] is not None]
+    slowest = sorted(({'package': name, 'self_ms': round(p['self_ms'], 1), 'modules': p['modules']}
+                      for name, p in packages.items()),
+                     key=lambda p: p['self_ms'], reverse=True)[:args.top]
+    results = {
+        'module': args.module,
+        'mode': args.mode,
+        'runs': args.runs,
+        'import_ms': {
+            'median': round(statistics.median(import_ms), 1),
+            'min': round(min(import_ms), 1),
+            'max': round(max(import_ms), 1)
+        },
+        'first_request_ms': round(statistics.median(first_ms), 1) if first_ms else None,
+        'slowest_imports': slowest,
+        'budget_ms': args.budget_ms,
+        'within_budget': args.budget_ms is None or statistics.median(import_ms) <= args.budget_ms
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("="*60)
+        print(f"Cold Start Profile: import {args.module} ({args.mode} mode, {args.runs} runs)")
+        print("="*60)
+        r = results['import_ms']
+        print(f"Import time:    median {r['median']:.1f} ms   (min {r['min']:.1f}, max {r['max']:.1f})")
+        if results['first_request_ms'] is not None:
+            print(f"First request:  GET {args.path} {results['first_request_ms']:.1f} ms")
+        print("-"*60)
+        print(f"{'package (importtime)':<36} {'self':>10} {'modules':>9}")
+        for p in slowest:
+            print(f"{p['package']:<36} {p['self_ms']:>7.1f} ms {p['modules']:>9}")
+        if args.budget_ms is not None:
+            print("-"*60)
+            verdict = 'OK' if results['within_budget'] else 'OVER BUDGET'
+            print(f"Budget {args.budget_ms:.0f} ms: {verdict}")
+        print("="*60)
+    return 0 if results['within_budget'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Per-user context snapshots for the wellness chat assistant
+
+A chat turn only needs a few numbers about the user's journal: entry count,
+recent average sentiment and the recent emotions/themes. They are folded
+from the daily_user_stats rollup of the active backend once and kept in a
+bounded LRU, so follow-up messages do no database I/O. Journal writes drop
+the user's snapshot (invalidate_user_caches); the TTL bounds staleness from
+writes served by other processes.
+"""
+
+import threading
+import time
+
+import daily_stats
+from analysis_cache import LRUCache
+
+RECENT_ENTRIES = 10
+RECENT_DAYS = 7
+TOP_LABELS = 5
+
+
+def build_snapshot(days):
+    """Chat context from a user's day rows (oldest first)"""
+    recent = daily_stats.recent_summary(days, min_entries=RECENT_ENTRIES)
+    return {
+        'total_entries': sum(d['entry_count'] for d in days),
+        'avg_sentiment': recent['avg_sentiment'],
+        'recent_entries': recent['entry_count'],
+        'recent_emotions': list(recent['emotion_counts'])[:TOP_LABELS],
+        'recent_themes': list(recent['theme_counts'])[:TOP_LABELS],
+        'last_entry_day': days[-1]['day'] if days else None,
+        'recent_days': days[-RECENT_DAYS:],
+        'built_at': time.time()
+    }
+
+
+class ChatContextCache:
+    """LRU of chat context snapshots, built from a daily stats store on a miss"""
+
+    def __init__(self, stats_store, max_users=1000, ttl_seconds=300):
+        self.stats_store = stats_store
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lru = LRUCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a snapshot built while a write landed
+        # is returned but not cached, so it cannot outlive the write
+        self._epoch = 0
+
+    def get(self, user_id):
+        snapshot = self._lru.get(user_id)
+        with self._lock:
+            if snapshot is not None:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            epoch = self._epoch
+        snapshot = build_snapshot(self.stats_store.fetch(user_id))
+        with self._lock:
+            if epoch == self._epoch:
+                self._lru.set(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += 1
+        self._lru.delete(user_id)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'size': len(self._lru),
+            'evictions': self._lru.evictions
+        }
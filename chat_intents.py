@@ -0,0 +1,147 @@
+"""
+Compiled intent router for the wellness chat assistant
+
+Intents, their keywords and reply templates live in chat_intents.json. All
+keywords are compiled into one regex, factored as a character trie
+('h(?:ey|i|ow...)') so the engine does a handful of comparisons per position
+instead of trying every keyword; the message is scanned once, whole words
+only, longest keyword first. Each hit adds the keyword's weight to its
+intent; the highest-scoring intent wins, ties go to the intent listed first,
+and a message without hits gets the fallback intent.
+
+Keyword syntax: a trailing '*' matches any word suffix ('pattern*' matches
+'patterns'); spaces in multi-word keywords match any run of whitespace.
+"""
+
+import json
+import os
+import re
+
+INTENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_intents.json')
+
+# Distinct matched words remembered by the hit cache
+HIT_CACHE_SIZE = 50000
+
+
+def _normalize(keyword):
+    return ' '.join(keyword.lower().split())
+
+
+def _trie_pattern(keywords):
+    """Regex matching any of `keywords`, longest first, factored by shared prefixes"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [(r'\s+' if ch == ' ' else re.escape(ch)) + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+def response_context(total_entries, avg_sentiment):
+    """Values available to reply templates"""
+    return {
+        'total_entries': total_entries,
+        'avg_sentiment': avg_sentiment,
+        'mood_desc': "positive" if avg_sentiment > 0.3 else "challenging" if avg_sentiment < -0.3 else "balanced",
+        'mood_emoji': "😊" if avg_sentiment > 0.3 else "😔" if avg_sentiment < -0.3 else "😐",
+        'progress_encouragement': 'Keep up the great work!' if avg_sentiment > 0 else
+            'Remember, tough times are temporary. Keep journaling to track your journey.',
+        'pattern_note': 'You tend to be optimistic!' if avg_sentiment > 0.3 else
+            'You face challenges with resilience.' if avg_sentiment < -0.3 else 'Your emotions are balanced.'
+    }
+
+
+# Conditions a response variant can be gated on ("when" in the table)
+CONDITIONS = {
+    'no_entries': lambda total_entries: total_entries == 0,
+    'few_entries': lambda total_entries: total_entries < 5,
+}
+
+
+class IntentRouter:
+    """Single-pass keyword scoring over a table of intents"""
+
+    def __init__(self, intents, fallback):
+        self.intents = {intent['name']: intent for intent in intents}
+        self.order = [intent['name'] for intent in intents]
+        self.fallback = fallback
+        if fallback not in self.intents:
+            raise ValueError(f"Fallback intent '{fallback}' is not defined")
+
+        # keyword text -> (keyword, intent, weight)
+        self._exact = {}
+        self._prefixes = {}
+        for intent in intents:
+            unknown = {r['when'] for r in intent['responses'] if 'when' in r} - set(CONDITIONS)
+            if unknown:
+                raise ValueError(f"Unknown condition(s) {sorted(unknown)} in intent '{intent['name']}'")
+            for keyword, weight in intent.get('keywords', {}).items():
+                text = _normalize(keyword.rstrip('*'))
+                target = (keyword, intent['name'], float(weight))
+                (self._prefixes if keyword.endswith('*') else self._exact)[text] = target
+        keywords = set(self._exact) | set(self._prefixes)
+        trie = _trie_pattern(keywords)
+        # The scan returns whole words; _split separates keyword and suffix on a cache miss
+        self._pattern = re.compile(r'\b(?:' + trie + r')\w*') if keywords else None
+        self._split = re.compile('(' + trie + r')(\w*)')
+        self._hits = {}
+
+    def _resolve(self, word):
+        """Keyword target for a scanned word, or None (e.g. 'hint' starts with 'hi')"""
+        body, suffix = self._split.fullmatch(word).groups()
+        text = _normalize(body)
+        if not suffix and text in self._exact:
+            return self._exact[text]
+        return self._prefixes.get(text)
+
+    @classmethod
+    def from_file(cls, path=INTENTS_PATH):
+        with open(path, encoding='utf-8') as f:
+            table = json.load(f)
+        return cls(table['intents'], table.get('fallback', 'default'))
+
+    def scores(self, message):
+        """{intent: score}; each distinct keyword counts once"""
+        scores = {}
+        if self._pattern is None:
+            return scores
+        seen = set()
+        hits = self._hits
+        for word in self._pattern.findall(message.lower()):
+            target = hits.get(word)
+            if target is None:
+                target = self._resolve(word) or False
+                if len(hits) >= HIT_CACHE_SIZE:
+                    hits.clear()
+                hits[word] = target
+            if target and target[0] not in seen:
+                seen.add(target[0])
+                scores[target[1]] = scores.get(target[1], 0.0) + target[2]
+        return scores
+
+    def match(self, message):
+        """Name of the best intent for `message`"""
+        scores = self.scores(message)
+        if len(scores) < 2:
+            return next(iter(scores), self.fallback)
+        best = max(scores.values())
+        return next(name for name in self.order if scores.get(name) == best)
+
+    def respond(self, intent, total_entries, avg_sentiment):
+        """(reply, suggested_prompts) from the first response variant whose condition holds"""
+        context = response_context(total_entries, avg_sentiment)
+        for response in self.intents[intent]['responses']:
+            condition = response.get('when')
+            if condition is None or CONDITIONS[condition](total_entries):
+                return response['reply'].format(**context), list(response['suggestions'])
+        raise ValueError(f"Intent '{intent}' has no response for this context")
@@ -0,0 +1,70 @@
+"""
+Lazily constructed Supabase and OpenAI clients
+
+Importing supabase-py or openai (and building their HTTP clients) dominates
+a serverless cold start, yet many requests (GET /login, static assets, local
+analysis) never touch either. LazyClient defers the import and construction
+to the first attribute access and then forwards everything to the real client.
+"""
+
+import importlib.util
+import threading
+
+
+def is_installed(module):
+    """True when `module` can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyClient:
+    """Proxy that builds its target with `factory()` on first use (once, thread-safe)"""
+
+    def __init__(self, factory, name):
+        self._factory = factory
+        self._name = name
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._client is not None
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = self._factory()
+                    except Exception as e:
+                        print(f"[ERROR] {self._name} client creation failed: {e}")
+                        raise
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def supabase_factory(url, key, timeout=None):
+    def create():
+        from supabase import create_client
+        if timeout is None:
+            return create_client(url, key)
+        # PostgREST calls take no per-call timeout; this caps every one of them
+        from supabase.lib.client_options import ClientOptions
+        return create_client(url, key, options=ClientOptions(postgrest_client_timeout=timeout))
+    return create
+
+
+def openai_factory(api_key, timeout=None, max_retries=None):
+    def create():
+        from openai import OpenAI
+        options = {}
+        if timeout is not None:
+            options['timeout'] = timeout
+        if max_retries is not None:
+            options['max_retries'] = max_retries
+        return OpenAI(api_key=api_key, **options)
+    return create
@@ -0,0 +1,72 @@
+"""
+Response compression: gzip always, brotli when the `brotli` package is installed
+
+negotiate() picks an encoding from the request's Accept-Encoding header,
+compress() encodes a whole body and compress_stream() encodes a streamed
+body (exports) chunk by chunk, so a download is never buffered in memory.
+"""
+
+import functools
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Text-like types worth compressing (images, fonts and archives are already compressed)
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'text/javascript',
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'image/svg+xml'
+}
+
+# Dynamic responses favour speed; build-time asset compression uses the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def negotiate(accept_encodings, available=None):
+    """Best encoding both sides support, by the client's q-values (server order breaks ties)"""
+    best, best_quality = None, 0
+    for encoding in available or available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, best=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output reproducible (stable ETags and build artifacts)
+        return gzip.compress(data, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def compress_stream(chunks, encoding, flush=False):
+    """
+    Encode an iterable of str/bytes chunks, yielding compressed output as it becomes available
+    flush=True emits every chunk right away (live progress) at some cost in ratio
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress_chunk, sync, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress_chunk, finish = compressor.compress, compressor.flush
+        sync = functools.partial(compressor.flush, zlib.Z_SYNC_FLUSH)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compress_chunk(chunk)
+        if flush:
+            data += sync()
+        if data:
+            yield data
+    yield finish()
@@ -0,0 +1,341 @@
+"""
+Per-user daily rollups of journal activity
+
+`daily_user_stats` holds one small row per user per (UTC) day: entry count,
+sentiment sum/min/max, positive/negative counts and emotion/theme counts.
+Rows are maintained incrementally by triggers on journal_entries (see
+SQLITE_SCHEMA below and database/setup.sql), so every write path keeps the
+rollup current. Readers aggregate a handful of day rows instead of scanning
+entries.
+
+Rebuild (repair) the rollup with:
+    python daily_stats.py rebuild [--user USER_ID] [--mode local|cloud]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+
+
+def _label_delta_sql(counts_column, labels, delta):
+    """SQLite expression merging a JSON label array into a JSON {label: count} object"""
+    return f'''(
+        SELECT json_group_object(key, n) FROM (
+            SELECT key, SUM(n) AS n FROM (
+                SELECT key, value AS n FROM json_each({counts_column})
+                UNION ALL
+                SELECT value, {delta} FROM json_each(CASE WHEN json_valid({labels}) THEN {labels} ELSE '[]' END)
+            ) GROUP BY key HAVING SUM(n) > 0
+        )
+    )'''
+
+
+def _sqlite_add_sql(row):
+    return f'''
+        INSERT OR IGNORE INTO daily_user_stats (user_id, day) VALUES ({row}.user_id, date({row}.created_at));
+        UPDATE daily_user_stats SET
+            entry_count = entry_count + 1,
+            sentiment_sum = sentiment_sum + {row}.sentiment_score,
+            sentiment_min = MIN(COALESCE(sentiment_min, {row}.sentiment_score), {row}.sentiment_score),
+            sentiment_max = MAX(COALESCE(sentiment_max, {row}.sentiment_score), {row}.sentiment_score),
+            positive_count = positive_count + ({row}.sentiment_score > {POSITIVE_THRESHOLD}),
+            negative_count = negative_count + ({row}.sentiment_score < {NEGATIVE_THRESHOLD}),
+            emotion_counts = {_label_delta_sql('daily_user_stats.emotion_counts', row + '.emotions', 1)},
+            theme_counts = {_label_delta_sql('daily_user_stats.theme_counts', row + '.key_themes', 1)}
+        WHERE user_id = {row}.user_id AND day = date({row}.created_at);'''
+
+
+def _sqlite_remove_sql(row):
+    # min/max cannot be decremented, so they are recomputed from the day's
+    # remaining entries only when the removed score was a boundary value
+    day_range = (f"user_id = {row}.user_id AND created_at >= date({row}.created_at) "
+                 f"AND created_at < date({row}.created_at, '+1 day')")
+    return f'''
+        UPDATE daily_user_stats SET
+            entry_count = entry_count - 1,
+            sentiment_sum = sentiment_sum - {row}.sentiment_score,
+            sentiment_min = CASE WHEN {row}.sentiment_score <= sentiment_min
+                THEN (SELECT MIN(sentiment_score) FROM journal_entries WHERE {day_range})
+                ELSE sentiment_min END,
+            sentiment_max = CASE WHEN {row}.sentiment_score >= sentiment_max
+                THEN (SELECT MAX(sentiment_score) FROM journal_entries WHERE {day_range})
+                ELSE sentiment_max END,
+            positive_count = positive_count - ({row}.sentiment_score > {POSITIVE_THRESHOLD}),
+            negative_count = negative_count - ({row}.sentiment_score < {NEGATIVE_THRESHOLD}),
+            emotion_counts = {_label_delta_sql('daily_user_stats.emotion_counts', row + '.emotions', -1)},
+            theme_counts = {_label_delta_sql('daily_user_stats.theme_counts', row + '.key_themes', -1)}
+        WHERE user_id = {row}.user_id AND day = date({row}.created_at);
+        DELETE FROM daily_user_stats
+        WHERE user_id = {row}.user_id AND day = date({row}.created_at) AND entry_count <= 0;'''
+
+
+SQLITE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS daily_user_stats (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        entry_count INTEGER NOT NULL DEFAULT 0,
+        sentiment_sum REAL NOT NULL DEFAULT 0,
+        sentiment_min REAL,
+        sentiment_max REAL,
+        positive_count INTEGER NOT NULL DEFAULT 0,
+        negative_count INTEGER NOT NULL DEFAULT 0,
+        emotion_counts TEXT NOT NULL DEFAULT '{}',
+        theme_counts TEXT NOT NULL DEFAULT '{}',
+        PRIMARY KEY (user_id, day)
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_daily_user_stats_insert
+    AFTER INSERT ON journal_entries
+    BEGIN {_sqlite_add_sql('NEW')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_daily_user_stats_delete
+    AFTER DELETE ON journal_entries
+    BEGIN {_sqlite_remove_sql('OLD')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_daily_user_stats_update
+    AFTER UPDATE OF user_id, sentiment_score, emotions, key_themes, created_at ON journal_entries
+    BEGIN {_sqlite_remove_sql('OLD')}
+    {_sqlite_add_sql('NEW')}
+    END
+    ''',
+]
+
+
+def install_sqlite(db):
+    """Create the rollup table and triggers; rebuilds when the table is new"""
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_user_stats'"
+    ).fetchone()
+    for statement in SQLITE_SCHEMA:
+        db.execute(statement)
+    if not exists:
+        rebuild_sqlite(db)
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def build_day_rows(entries):
+    """Fold entry rows into {(user_id, day): stats} rollup values"""
+    days = {}
+    for entry in entries:
+        key = (entry['user_id'], str(entry['created_at'])[:10])
+        stats = days.setdefault(key, {
+            'entry_count': 0, 'sentiment_sum': 0.0, 'sentiment_min': None, 'sentiment_max': None,
+            'positive_count': 0, 'negative_count': 0, 'emotions': Counter(), 'themes': Counter()
+        })
+        score = float(entry['sentiment_score'])
+        stats['entry_count'] += 1
+        stats['sentiment_sum'] += score
+        stats['sentiment_min'] = score if stats['sentiment_min'] is None else min(stats['sentiment_min'], score)
+        stats['sentiment_max'] = score if stats['sentiment_max'] is None else max(stats['sentiment_max'], score)
+        stats['positive_count'] += score > POSITIVE_THRESHOLD
+        stats['negative_count'] += score < NEGATIVE_THRESHOLD
+        stats['emotions'].update(_as_list(entry.get('emotions')))
+        stats['themes'].update(_as_list(entry.get('key_themes')))
+    return days
+
+
+def rebuild_sqlite(db, user_id=None):
+    """Recompute rollup rows from journal_entries (all users or one user)"""
+    where, params = ('WHERE user_id = ?', (user_id,)) if user_id is not None else ('', ())
+    days = build_day_rows(
+        dict(zip(('user_id', 'created_at', 'sentiment_score', 'emotions', 'key_themes'), row))
+        for row in db.execute(
+            f'SELECT user_id, date(created_at), sentiment_score, emotions, key_themes FROM journal_entries {where}',
+            params
+        )
+    )
+
+    db.execute(f'DELETE FROM daily_user_stats {where}', params)
+    db.executemany(
+        'INSERT INTO daily_user_stats (user_id, day, entry_count, sentiment_sum, sentiment_min, sentiment_max, '
+        'positive_count, negative_count, emotion_counts, theme_counts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [
+            (uid, day, s['entry_count'], s['sentiment_sum'], s['sentiment_min'], s['sentiment_max'],
+             s['positive_count'], s['negative_count'], json.dumps(s['emotions']), json.dumps(s['themes']))
+            for (uid, day), s in days.items()
+        ]
+    )
+    db.commit()
+    return len(days)
+
+
+def _parse_row(row):
+    row = dict(row)
+    for key in ('emotion_counts', 'theme_counts'):
+        if isinstance(row.get(key), str):
+            row[key] = json.loads(row[key])
+    row['day'] = str(row['day'])[:10]
+    return row
+
+
+class SQLiteDailyStats:
+    """Reads rollup rows from the local SQLite database"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+
+    def fetch(self, user_id, start_day=None, end_day=None):
+        sql = 'SELECT * FROM daily_user_stats WHERE user_id = ?'
+        params = [user_id]
+        if start_day:
+            sql += ' AND day >= ?'
+            params.append(str(start_day))
+        if end_day:
+            sql += ' AND day <= ?'
+            params.append(str(end_day))
+        db = self._get_db()
+        try:
+            return [_parse_row(row) for row in db.execute(sql + ' ORDER BY day', params)]
+        finally:
+            db.close()
+
+    def rebuild(self, user_id=None):
+        db = self._get_db()
+        try:
+            return rebuild_sqlite(db, user_id)
+        finally:
+            db.close()
+
+
+class SupabaseDailyStats:
+    """Reads rollup rows from Supabase (maintained by triggers in setup.sql)"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def fetch(self, user_id, start_day=None, end_day=None):
+        query = self._client.table('daily_user_stats').select('*').eq('user_id', user_id)
+        if start_day:
+            query = query.gte('day', str(start_day))
+        if end_day:
+            query = query.lte('day', str(end_day))
+        return [_parse_row(row) for row in query.order('day', desc=False).execute().data]
+
+    def rebuild(self, user_id=None):
+        return self._client.rpc('rebuild_daily_user_stats', {'target_user': user_id}).execute().data
+
+
+class RepositoryDailyStats:
+    """Day rows computed on read from an entry repository (in-memory backend)"""
+
+    def __init__(self, entries):
+        self._entries = entries
+
+    def fetch(self, user_id, start_day=None, end_day=None):
+        rows = self._entries.range(
+            user_id,
+            since=str(start_day) if start_day else None,
+            until=str(end_day + timedelta(days=1)) if end_day else None,
+            descending=False,
+            columns='user_id, sentiment_score, emotions, key_themes, created_at'
+        )
+        return [
+            {'user_id': uid, 'day': day, 'entry_count': s['entry_count'], 'sentiment_sum': s['sentiment_sum'],
+             'sentiment_min': s['sentiment_min'], 'sentiment_max': s['sentiment_max'],
+             'positive_count': s['positive_count'], 'negative_count': s['negative_count'],
+             'emotion_counts': dict(s['emotions']), 'theme_counts': dict(s['themes'])}
+            for (uid, day), s in sorted(build_day_rows(rows).items(), key=lambda item: item[0][1])
+        ]
+
+    def rebuild(self, user_id=None):
+        return 0
+
+
+def summarize(days):
+    """Fold day rows into totals: count, average, min/max, pos/neg and label counts"""
+    count = sum(d['entry_count'] for d in days)
+    total = sum(float(d['sentiment_sum']) for d in days)
+    mins = [float(d['sentiment_min']) for d in days if d.get('sentiment_min') is not None]
+    maxs = [float(d['sentiment_max']) for d in days if d.get('sentiment_max') is not None]
+    emotions = Counter()
+    themes = Counter()
+    for d in days:
+        emotions.update(d.get('emotion_counts') or {})
+        themes.update(d.get('theme_counts') or {})
+    return {
+        'entry_count': count,
+        'avg_sentiment': total / count if count else 0,
+        'sentiment_min': min(mins) if mins else None,
+        'sentiment_max': max(maxs) if maxs else None,
+        'positive_count': sum(d['positive_count'] for d in days),
+        'negative_count': sum(d['negative_count'] for d in days),
+        'emotion_counts': dict(emotions.most_common()),
+        'theme_counts': dict(themes.most_common())
+    }
+
+
+def recent_summary(days, min_entries=10):
+    """Summarize the most recent day rows covering at least `min_entries` entries"""
+    selected = []
+    covered = 0
+    for d in sorted(days, key=lambda d: d['day'], reverse=True):
+        selected.append(d)
+        covered += d['entry_count']
+        if covered >= min_entries:
+            break
+    return summarize(selected)
+
+
+def current_streak(days, today=None):
+    """Consecutive days with entries ending today (or yesterday, if today is empty)"""
+    active = {d['day'] for d in days if d['entry_count'] > 0}
+    cursor = today or date.today()
+    if cursor.isoformat() not in active:
+        cursor -= timedelta(days=1)
+    streak = 0
+    while cursor.isoformat() in active:
+        streak += 1
+        cursor -= timedelta(days=1)
+    return streak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the daily_user_stats rollup')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--user', help='only rebuild rows for this user id')
+    parser.add_argument('--mode', choices=['local', 'cloud'], default=os.getenv('MODE', 'local').lower())
+    parser.add_argument('--database', default='journal.db', help='SQLite database path (local mode)')
+    args = parser.parse_args()
+
+    if args.mode == 'cloud':
+        from dotenv import load_dotenv
+        from supabase import create_client
+        load_dotenv()
+        stats = SupabaseDailyStats(create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY')))
+        result = stats.rebuild(args.user)
+    else:
+        import sqlite3
+        db = sqlite3.connect(os.path.abspath(args.database))
+        try:
+            install_sqlite(db)
+            user = int(args.user) if args.user and args.user.isdigit() else args.user
+            result = rebuild_sqlite(db, user)
+        finally:
+            db.close()
+
+    print(f"✅ Rebuilt daily_user_stats ({result} day rows)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
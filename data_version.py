@@ -0,0 +1,145 @@
+"""
+Per-user data versions for conditional GETs
+
+Every insert, update or delete of a user's journal entries bumps the user's
+version (database triggers in SQLite and Supabase, see SQLITE_SCHEMA below
+and database/setup.sql). Read endpoints derive their ETag from it, so an
+unchanged journal is answered with 304 Not Modified after a one-row version
+lookup instead of the full query. VersionCache keeps lookups for a few
+seconds to tag fresh responses, but a revalidation (If-None-Match) always
+reads the store: a cached version may predate a write made by another
+worker, and answering 304 from it would serve stale entries.
+
+Versions are never lowered: a bump sets MAX(version + 1, now in microseconds),
+so a recreated database does not hand out versions an old ETag may carry.
+"""
+
+import threading
+import time
+
+from analysis_cache import LRUCache
+
+_SQLITE_NOW_US = "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"
+
+
+def _sqlite_bump_sql(row):
+    return f'''
+        INSERT INTO user_data_versions (user_id, version) VALUES ({row}.user_id, {_SQLITE_NOW_US})
+        ON CONFLICT (user_id) DO UPDATE SET version = MAX(version + 1, excluded.version);'''
+
+
+SQLITE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS user_data_versions (
+        user_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_user_data_versions_insert
+    AFTER INSERT ON journal_entries
+    BEGIN {_sqlite_bump_sql('NEW')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_user_data_versions_update
+    AFTER UPDATE ON journal_entries
+    BEGIN {_sqlite_bump_sql('OLD')}
+    {_sqlite_bump_sql('NEW')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_user_data_versions_delete
+    AFTER DELETE ON journal_entries
+    BEGIN {_sqlite_bump_sql('OLD')}
+    END
+    ''',
+]
+
+
+def install_sqlite(db):
+    """Create the versions table and its triggers"""
+    for statement in SQLITE_SCHEMA:
+        db.execute(statement)
+
+
+class SQLiteVersions:
+    """Versions from the local SQLite `user_data_versions` table"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+
+    def get(self, user_id):
+        db = self._get_db()
+        try:
+            row = db.execute('SELECT version FROM user_data_versions WHERE user_id = ?', (user_id,)).fetchone()
+        finally:
+            db.close()
+        return row['version'] if row else 0
+
+    def bump(self, user_id):
+        pass
+
+
+class SupabaseVersions:
+    """Versions from the Supabase `user_data_versions` table"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, user_id):
+        result = self._client.table('user_data_versions')\
+            .select('version')\
+            .eq('user_id', user_id)\
+            .limit(1)\
+            .execute()
+        return int(result.data[0]['version']) if result.data else 0
+
+    def bump(self, user_id):
+        pass
+
+
+class MemoryVersions:
+    """Process-local versions for the in-memory backend, bumped by the app on writes"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id):
+        with self._lock:
+            self._versions[user_id] = max(self._versions.get(user_id, 0) + 1, time.time_ns() // 1000)
+
+
+class VersionCache:
+    """Short-lived in-process copy of version lookups; local writes drop the user's entry
+    Only good for tagging a response that is computed anyway; pass fresh=True
+    when the version decides a 304"""
+
+    def __init__(self, store, max_users=10000, ttl_seconds=5):
+        self.store = store
+        self._lru = LRUCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a lookup that overlapped a write is not cached
+        self._epoch = 0
+
+    def get(self, user_id, fresh=False):
+        version = None if fresh else self._lru.get(user_id)
+        if version is not None:
+            return version
+        with self._lock:
+            epoch = self._epoch
+        version = self.store.get(user_id)
+        with self._lock:
+            if epoch == self._epoch:
+                self._lru.set(user_id, version)
+        return version
+
+    def invalidate(self, user_id):
+        self.store.bump(user_id)
+        with self._lock:
+            self._epoch += 1
+        self._lru.delete(user_id)
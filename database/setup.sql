@@ -13,9 +13,98 @@ CREATE TABLE IF NOT EXISTS journal_entries (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Async analysis marker: entries are stored as 'pending' and analyzed in the background
+ALTER TABLE journal_entries
+    ADD COLUMN IF NOT EXISTS analysis_status TEXT NOT NULL DEFAULT 'complete'
+    CHECK (analysis_status IN ('pending', 'complete', 'failed'));
+
 -- Create index for faster queries
 CREATE INDEX IF NOT EXISTS idx_journal_entries_user_id ON journal_entries(user_id);
 CREATE INDEX IF NOT EXISTS idx_journal_entries_created_at ON journal_entries(created_at DESC);
+-- Keyset pagination: each page is a range scan on (user_id, created_at, id)
+CREATE INDEX IF NOT EXISTS idx_journal_entries_user_created_id
+    ON journal_entries(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_journal_entries_pending ON journal_entries(created_at)
+    WHERE analysis_status = 'pending';
+
+-- Full-text search: stemmed English tsvector kept in sync by Postgres, GIN-indexed
+ALTER TABLE journal_entries
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+CREATE INDEX IF NOT EXISTS idx_journal_entries_search ON journal_entries USING GIN (search_vector);
+
+-- Listing projection: the first 201 characters of content (storage.PREVIEW_LENGTH + 1),
+-- so entry lists and charts can be served without shipping full entry bodies
+ALTER TABLE journal_entries
+    ADD COLUMN IF NOT EXISTS content_preview TEXT
+    GENERATED ALWAYS AS (left(content, 201)) STORED;
+
+-- Content hash for guarded write-backs: the async analysis worker only writes a result
+-- if the row still holds the text it analyzed (storage.content_digest computes the same)
+ALTER TABLE journal_entries
+    ADD COLUMN IF NOT EXISTS content_sha256 TEXT
+    GENERATED ALWAYS AS (encode(sha256(content::bytea), 'hex')) STORED;
+
+-- Relevance-ranked search with highlighted snippets (called by the app via rpc)
+-- search_query is a prefix tsquery such as 'work:* & stress:*'; pages continue
+-- strictly after (after_rank, after_created_at, after_id); end_date is exclusive
+CREATE OR REPLACE FUNCTION search_journal_entries(
+    search_user UUID,
+    search_query TEXT,
+    start_date TIMESTAMPTZ DEFAULT NULL,
+    end_date TIMESTAMPTZ DEFAULT NULL,
+    sentiment_filter TEXT DEFAULT NULL,
+    after_rank REAL DEFAULT NULL,
+    after_created_at TIMESTAMPTZ DEFAULT NULL,
+    after_id UUID DEFAULT NULL,
+    result_limit INTEGER DEFAULT 20,
+    highlight_start TEXT DEFAULT '<mark>',
+    highlight_stop TEXT DEFAULT '</mark>'
+)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    content TEXT,
+    sentiment_score DECIMAL(3,2),
+    emotions JSONB,
+    key_themes JSONB,
+    analysis_status TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    rank REAL,
+    snippet TEXT
+) AS $$
+    WITH q AS (
+        SELECT to_tsquery('english', search_query) AS query
+    ),
+    page AS (
+        SELECT e.*, ts_rank_cd(e.search_vector, q.query) AS rank, q.query
+        FROM journal_entries e, q
+        WHERE e.user_id = search_user
+          AND e.search_vector @@ q.query
+          AND (start_date IS NULL OR e.created_at >= start_date)
+          AND (end_date IS NULL OR e.created_at < end_date)
+          AND CASE sentiment_filter
+                  WHEN 'positive' THEN e.sentiment_score > 0.3
+                  WHEN 'negative' THEN e.sentiment_score < -0.3
+                  WHEN 'neutral' THEN e.sentiment_score BETWEEN -0.3 AND 0.3
+                  ELSE TRUE
+              END
+          AND (after_rank IS NULL
+               OR (ts_rank_cd(e.search_vector, q.query), e.created_at, e.id)
+                  < (after_rank, after_created_at, after_id))
+        ORDER BY rank DESC, e.created_at DESC, e.id DESC
+        LIMIT result_limit
+    )
+    -- Headlines are computed only for the rows on this page
+    SELECT p.id, p.user_id, p.content, p.sentiment_score, p.emotions, p.key_themes,
+           p.analysis_status, p.created_at, p.updated_at, p.rank,
+           ts_headline('english', p.content, p.query,
+               format('StartSel=%s, StopSel=%s, MaxFragments=2, MaxWords=20, MinWords=5',
+                      highlight_start, highlight_stop))
+    FROM page p
+    ORDER BY p.rank DESC, p.created_at DESC, p.id DESC;
+$$ LANGUAGE sql STABLE;
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE journal_entries ENABLE ROW LEVEL SECURITY;
@@ -64,6 +153,324 @@ CREATE TRIGGER update_journal_entries_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Backfill write-back (backfill.py): sets only the analysis columns, and only on rows
+-- whose updated_at still matches the value read with the batch; a row edited while
+-- its batch was being analyzed is left alone. Returns the number of rows written.
+CREATE OR REPLACE FUNCTION apply_backfill_results(results JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    applied INTEGER;
+BEGIN
+    UPDATE journal_entries AS e
+    SET sentiment_score = (r->>'sentiment_score')::DECIMAL(3,2),
+        emotions = r->'emotions',
+        key_themes = r->'key_themes',
+        analysis_status = 'complete'
+    FROM jsonb_array_elements(results) AS r
+    WHERE e.id = (r->>'id')::UUID
+      AND e.updated_at IS NOT DISTINCT FROM (r->>'updated_at')::TIMESTAMPTZ;
+
+    GET DIAGNOSTICS applied = ROW_COUNT;
+    RETURN applied;
+END;
+$$ LANGUAGE plpgsql SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION apply_backfill_results(JSONB) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION apply_backfill_results(JSONB) TO authenticated, service_role;
+
+-- Batch content edits (/api/journal/batch/update): one UPDATE for many rows, each with its
+-- own values; fields missing from an element keep their value. UPDATE-only, so a row
+-- deleted concurrently stays deleted. Runs as the caller, so RLS still scopes the rows.
+CREATE OR REPLACE FUNCTION update_journal_entries_batch(target_user UUID, updates JSONB)
+RETURNS TABLE (id UUID) AS $$
+    UPDATE journal_entries AS e
+    SET content = COALESCE(u.content, e.content),
+        sentiment_score = COALESCE(u.sentiment_score, e.sentiment_score),
+        emotions = COALESCE(u.emotions, e.emotions),
+        key_themes = COALESCE(u.key_themes, e.key_themes),
+        analysis_status = COALESCE(u.analysis_status, e.analysis_status)
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID, content TEXT, sentiment_score DECIMAL(3,2),
+        emotions JSONB, key_themes JSONB, analysis_status TEXT
+    )
+    WHERE e.id = u.id AND e.user_id = target_user
+    RETURNING e.id;
+$$ LANGUAGE sql SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION update_journal_entries_batch(UUID, JSONB) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION update_journal_entries_batch(UUID, JSONB) TO authenticated, service_role;
+
+-- Content-addressed cache for GPT-4o analysis results
+-- Keyed on sha256(prompt/model version + normalized entry text)
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    cache_key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    result JSONB NOT NULL,
+    created_at DOUBLE PRECISION NOT NULL
+);
+
+ALTER TABLE analysis_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Authenticated users can read analysis cache" ON analysis_cache;
+DROP POLICY IF EXISTS "Authenticated users can write analysis cache" ON analysis_cache;
+DROP POLICY IF EXISTS "Authenticated users can refresh analysis cache" ON analysis_cache;
+
+-- Server-only: rows are shared across users and trusted for everyone's entries, so no
+-- policies are defined (RLS denies anon/authenticated) and only the service role,
+-- which bypasses RLS, reads or writes them (SUPABASE_SERVICE_KEY in the app)
+REVOKE ALL ON analysis_cache FROM anon, authenticated;
+GRANT ALL ON analysis_cache TO service_role;
+
+-- Materialized weekly reports, keyed per user and week window
+-- fingerprint = sha256 of the contributing entries' (id, updated_at) pairs
+CREATE TABLE IF NOT EXISTS weekly_reports (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    window_start DATE NOT NULL,
+    fingerprint TEXT NOT NULL,
+    report JSONB NOT NULL,
+    generated_at DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (user_id, window_start)
+);
+
+ALTER TABLE weekly_reports ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can manage their own weekly reports" ON weekly_reports;
+
+CREATE POLICY "Users can manage their own weekly reports"
+    ON weekly_reports
+    FOR ALL
+    USING (auth.uid() = user_id)
+    WITH CHECK (auth.uid() = user_id);
+
+-- Per-user daily rollup, maintained incrementally by triggers on journal_entries
+CREATE TABLE IF NOT EXISTS daily_user_stats (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    sentiment_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sentiment_min DOUBLE PRECISION,
+    sentiment_max DOUBLE PRECISION,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    emotion_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    theme_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (user_id, day)
+);
+
+ALTER TABLE daily_user_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own daily stats" ON daily_user_stats;
+
+CREATE POLICY "Users can view their own daily stats"
+    ON daily_user_stats
+    FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- Merge a JSON array of labels into a {label: count} object (delta = 1 or -1)
+CREATE OR REPLACE FUNCTION merge_label_counts(counts JSONB, labels JSONB, delta INTEGER)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(key, n), '{}'::jsonb)
+    FROM (
+        SELECT key, SUM(n)::int AS n
+        FROM (
+            SELECT key, value::int AS n FROM jsonb_each_text(COALESCE(counts, '{}'::jsonb))
+            UNION ALL
+            SELECT value, delta FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(labels) = 'array' THEN labels ELSE '[]'::jsonb END
+            )
+        ) AS merged
+        GROUP BY key
+        HAVING SUM(n) > 0
+    ) AS totals;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION apply_daily_user_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_day DATE;
+    new_day DATE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_day := (OLD.created_at AT TIME ZONE 'UTC')::date;
+
+        UPDATE daily_user_stats SET
+            entry_count = entry_count - 1,
+            sentiment_sum = sentiment_sum - OLD.sentiment_score,
+            positive_count = positive_count - (OLD.sentiment_score > 0.3)::int,
+            negative_count = negative_count - (OLD.sentiment_score < -0.3)::int,
+            emotion_counts = merge_label_counts(emotion_counts, OLD.emotions, -1),
+            theme_counts = merge_label_counts(theme_counts, OLD.key_themes, -1)
+        WHERE user_id = OLD.user_id AND day = old_day;
+
+        -- min/max cannot be decremented; recompute only when a boundary value was removed
+        UPDATE daily_user_stats s SET
+            sentiment_min = agg.min_score,
+            sentiment_max = agg.max_score
+        FROM (
+            SELECT MIN(sentiment_score) AS min_score, MAX(sentiment_score) AS max_score
+            FROM journal_entries
+            WHERE user_id = OLD.user_id
+              AND created_at >= (old_day::timestamp AT TIME ZONE 'UTC')
+              AND created_at < ((old_day + 1)::timestamp AT TIME ZONE 'UTC')
+        ) AS agg
+        WHERE s.user_id = OLD.user_id AND s.day = old_day
+          AND (OLD.sentiment_score <= s.sentiment_min OR OLD.sentiment_score >= s.sentiment_max);
+
+        DELETE FROM daily_user_stats
+        WHERE user_id = OLD.user_id AND day = old_day AND entry_count <= 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_day := (NEW.created_at AT TIME ZONE 'UTC')::date;
+
+        INSERT INTO daily_user_stats (
+            user_id, day, entry_count, sentiment_sum, sentiment_min, sentiment_max,
+            positive_count, negative_count, emotion_counts, theme_counts
+        ) VALUES (
+            NEW.user_id, new_day, 1, NEW.sentiment_score, NEW.sentiment_score, NEW.sentiment_score,
+            (NEW.sentiment_score > 0.3)::int, (NEW.sentiment_score < -0.3)::int,
+            merge_label_counts('{}'::jsonb, NEW.emotions, 1),
+            merge_label_counts('{}'::jsonb, NEW.key_themes, 1)
+        )
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            entry_count = daily_user_stats.entry_count + 1,
+            sentiment_sum = daily_user_stats.sentiment_sum + EXCLUDED.sentiment_sum,
+            sentiment_min = LEAST(daily_user_stats.sentiment_min, EXCLUDED.sentiment_min),
+            sentiment_max = GREATEST(daily_user_stats.sentiment_max, EXCLUDED.sentiment_max),
+            positive_count = daily_user_stats.positive_count + EXCLUDED.positive_count,
+            negative_count = daily_user_stats.negative_count + EXCLUDED.negative_count,
+            emotion_counts = merge_label_counts(daily_user_stats.emotion_counts, NEW.emotions, 1),
+            theme_counts = merge_label_counts(daily_user_stats.theme_counts, NEW.key_themes, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS maintain_daily_user_stats ON journal_entries;
+CREATE TRIGGER maintain_daily_user_stats
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, sentiment_score, emotions, key_themes, created_at
+    ON journal_entries
+    FOR EACH ROW
+    EXECUTE FUNCTION apply_daily_user_stats();
+
+-- Repair command: recompute rollup rows from journal_entries
+-- Authenticated users may only rebuild their own rows; only the service role (or the
+-- SQL editor, where there is no request JWT) may rebuild all users
+CREATE OR REPLACE FUNCTION rebuild_daily_user_stats(target_user UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    IF auth.uid() IS NOT NULL THEN
+        IF target_user IS NOT NULL AND target_user <> auth.uid() THEN
+            RAISE EXCEPTION 'Cannot rebuild stats for another user';
+        END IF;
+        target_user := auth.uid();
+    ELSIF auth.role() IS NOT NULL AND auth.role() <> 'service_role' THEN
+        RAISE EXCEPTION 'Not allowed to rebuild stats';
+    END IF;
+
+    DELETE FROM daily_user_stats WHERE target_user IS NULL OR user_id = target_user;
+
+    WITH entries AS (
+        SELECT user_id, (created_at AT TIME ZONE 'UTC')::date AS day, sentiment_score, emotions, key_themes
+        FROM journal_entries
+        WHERE target_user IS NULL OR user_id = target_user
+    ),
+    days AS (
+        SELECT user_id, day,
+               COUNT(*) AS entry_count,
+               SUM(sentiment_score) AS sentiment_sum,
+               MIN(sentiment_score) AS sentiment_min,
+               MAX(sentiment_score) AS sentiment_max,
+               COUNT(*) FILTER (WHERE sentiment_score > 0.3) AS positive_count,
+               COUNT(*) FILTER (WHERE sentiment_score < -0.3) AS negative_count
+        FROM entries
+        GROUP BY user_id, day
+    ),
+    emotions AS (
+        SELECT user_id, day, jsonb_object_agg(label, n) AS counts
+        FROM (
+            SELECT user_id, day, label, COUNT(*) AS n
+            FROM entries, jsonb_array_elements_text(emotions) AS label
+            GROUP BY user_id, day, label
+        ) AS per_label
+        GROUP BY user_id, day
+    ),
+    themes AS (
+        SELECT user_id, day, jsonb_object_agg(label, n) AS counts
+        FROM (
+            SELECT user_id, day, label, COUNT(*) AS n
+            FROM entries, jsonb_array_elements_text(key_themes) AS label
+            GROUP BY user_id, day, label
+        ) AS per_label
+        GROUP BY user_id, day
+    )
+    INSERT INTO daily_user_stats (
+        user_id, day, entry_count, sentiment_sum, sentiment_min, sentiment_max,
+        positive_count, negative_count, emotion_counts, theme_counts
+    )
+    SELECT d.user_id, d.day, d.entry_count, d.sentiment_sum, d.sentiment_min, d.sentiment_max,
+           d.positive_count, d.negative_count,
+           COALESCE(e.counts, '{}'::jsonb), COALESCE(t.counts, '{}'::jsonb)
+    FROM days d
+    LEFT JOIN emotions e USING (user_id, day)
+    LEFT JOIN themes t USING (user_id, day);
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Functions are executable by PUBLIC by default, which would expose this one to anon via /rpc
+REVOKE EXECUTE ON FUNCTION rebuild_daily_user_stats(UUID) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION rebuild_daily_user_stats(UUID) TO authenticated, service_role;
+
+-- Backfill the rollup for entries that existed before it was introduced
+SELECT rebuild_daily_user_stats();
+
+-- Per-user data version for conditional GETs (ETag / 304), bumped by every entry write.
+-- A bump never lowers the version: MAX(version + 1, now in microseconds)
+CREATE TABLE IF NOT EXISTS user_data_versions (
+    user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+ALTER TABLE user_data_versions ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own data version" ON user_data_versions;
+
+CREATE POLICY "Users can view their own data version"
+    ON user_data_versions
+    FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION bump_user_data_version()
+RETURNS TRIGGER AS $$
+DECLARE
+    now_us BIGINT := (extract(epoch FROM clock_timestamp()) * 1000000)::bigint;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO user_data_versions (user_id, version) VALUES (OLD.user_id, now_us)
+        ON CONFLICT (user_id) DO UPDATE
+            SET version = GREATEST(user_data_versions.version + 1, EXCLUDED.version);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO user_data_versions (user_id, version) VALUES (NEW.user_id, now_us)
+        ON CONFLICT (user_id) DO UPDATE
+            SET version = GREATEST(user_data_versions.version + 1, EXCLUDED.version);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS maintain_user_data_versions ON journal_entries;
+CREATE TRIGGER maintain_user_data_versions
+    AFTER INSERT OR UPDATE OR DELETE ON journal_entries
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_user_data_version();
+
 -- Optional: Create a view for weekly statistics (users can only see their own stats)
 CREATE OR REPLACE VIEW weekly_sentiment_stats AS
 SELECT 
@@ -0,0 +1,188 @@
+"""
+Pooled SQLite connections for local mode
+
+Connections are opened once, tuned (WAL, synchronous=NORMAL, page cache,
+mmap, busy timeout) and reused. A thread keeps the same connection while it
+holds it, so nested get_db() calls inside one request share a connection;
+closing the outermost handle returns it to a bounded idle pool instead of
+closing the file. Idle connections are health-checked before reuse.
+"""
+
+import sqlite3
+import threading
+import time
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool"""
+
+    _pool = None
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        else:
+            self._pool.release(self)
+
+    def _close(self):
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of thread-affine SQLite connections"""
+
+    def __init__(self, path, max_connections=8, timeout=10.0, cache_kib=16384,
+                 mmap_bytes=64 * 1024 * 1024, cached_statements=256, busy_timeout_ms=5000):
+        self.path = path
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache_kib = cache_kib
+        self.mmap_bytes = mmap_bytes
+        self.cached_statements = cached_statements
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = []
+        # id()s of idle and checked-out connections, so a stray second release is ignored
+        self._idle_ids = set()
+        self._checked_out = set()
+        self._open = 0
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.waits = 0
+
+    def _connect(self):
+        db = sqlite3.connect(
+            self.path,
+            factory=PooledConnection,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        db.row_factory = sqlite3.Row
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(f'PRAGMA cache_size=-{int(self.cache_kib)}')
+        db.execute(f'PRAGMA mmap_size={int(self.mmap_bytes)}')
+        db.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        db._pool = self
+        return db
+
+    def _healthy(self, db):
+        try:
+            db.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Connection for the calling thread; re-entrant within a thread"""
+        held = getattr(self._local, 'db', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    db = self._idle.pop()
+                    self._idle_ids.discard(id(db))
+                    if self._healthy(db):
+                        self.reused += 1
+                        break
+                    self._discard(db)
+                else:
+                    db = None
+                if db is not None:
+                    break
+                if self._open < self.max_connections:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError('Timed out waiting for a pooled SQLite connection')
+                self.waits += 1
+                self._cond.wait(remaining)
+
+        if db is None:
+            try:
+                db = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            self.created += 1
+
+        with self._cond:
+            self._checked_out.add(id(db))
+        self._local.db = db
+        self._local.depth = 1
+        return db
+
+    def release(self, db):
+        """Return the thread's connection once its outermost holder closes it"""
+        if getattr(self._local, 'db', None) is not db:
+            with self._cond:
+                # Already back in the pool (double release) or held by another thread:
+                # pushing it onto the idle list again would let two threads share it
+                if id(db) in self._idle_ids or id(db) in self._checked_out:
+                    return
+                # Never pooled: close outright
+                self._discard(db)
+            return
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.db = None
+        try:
+            if db.in_transaction:
+                db.rollback()
+        except sqlite3.Error:
+            with self._cond:
+                self._checked_out.discard(id(db))
+                self._discard(db)
+            return
+        with self._cond:
+            self._checked_out.discard(id(db))
+            self._idle.append(db)
+            self._idle_ids.add(id(db))
+            self._cond.notify()
+
+    def release_thread(self):
+        """Force-release whatever the calling thread still holds (request teardown)"""
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            self._local.depth = 1
+            self.release(db)
+
+    def _discard(self, db):
+        # Caller holds self._cond
+        try:
+            db._close()
+        except Exception:
+            pass
+        self._open = max(0, self._open - 1)
+        self.discarded += 1
+        self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (application shutdown)"""
+        with self._cond:
+            while self._idle:
+                db = self._idle.pop()
+                self._idle_ids.discard(id(db))
+                self._discard(db)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'open': self._open,
+                'idle': len(self._idle),
+                'max_connections': self.max_connections,
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded,
+                'waits': self.waits
+            }
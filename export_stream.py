@@ -0,0 +1,47 @@
+"""
+Streaming journal exports
+
+Entries are pulled page by page (keyset order, newest first) and written out
+as they arrive, so memory stays bounded by one page and the download starts
+with the first page instead of after the whole history has been fetched.
+"""
+
+import json
+
+EXPORT_PAGE_SIZE = 500
+
+
+def iter_pages(fetch_page, page_size=EXPORT_PAGE_SIZE):
+    """Yield entries from fetch_page(cursor, limit) until a short page is returned"""
+    cursor = None
+    while True:
+        rows = fetch_page(cursor, page_size)
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        cursor = (str(rows[-1]['created_at']), rows[-1]['id'])
+
+
+def repository_page_fetcher(entries, user_id, columns='*'):
+    """fetch_page(cursor, limit) over a user's entries in a storage backend"""
+    def fetch_page(cursor, limit):
+        return entries.range(user_id, cursor=cursor, limit=limit, columns=columns)
+    return fetch_page
+
+
+def iter_json(header, entries):
+    """Chunks of one JSON document: header fields, the entries array, then total_entries"""
+    head = json.dumps(header)
+    yield head[:-1] + (', ' if header else '') + '"entries": ['
+    total = 0
+    for entry in entries:
+        yield (',\n' if total else '\n') + json.dumps(entry, default=str)
+        total += 1
+    yield f'\n], "total_entries": {total}}}\n'
+
+
+def iter_ndjson(entries):
+    """One JSON entry per line"""
+    for entry in entries:
+        yield json.dumps(entry, default=str) + '\n'
@@ -0,0 +1,268 @@
+"""
+Streaming journal imports
+
+The counterpart of export_stream: reads a JSON export ({..., "entries": [...]},
+or a bare array) or NDJSON one chunk at a time and yields entries as soon as
+each one is complete, so memory stays bounded by one batch however large the
+upload is (a single entry may not exceed MAX_ENTRY_SIZE characters). Entries
+are normalized (analysis fields carried over when present), deduplicated by
+content hash + timestamp against the rows already stored (which include the
+earlier batches of the same upload) and within each batch, and inserted in
+batches.
+"""
+
+import codecs
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+
+import storage
+
+IMPORT_BATCH_SIZE = 500
+READ_SIZE = 64 * 1024
+# Longest single entry (or NDJSON line, or export header) accepted, in characters
+MAX_ENTRY_SIZE = 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+ANALYSIS_STATUSES = ('complete', 'failed')
+_ENTRIES_RE = re.compile(r'"entries"\s*:\s*\[')
+_WHITESPACE = ' \t\r\n'
+
+
+def _chunks(read, size=READ_SIZE):
+    """Decoded text chunks from a binary read(size) callable"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    while True:
+        data = read(size)
+        if not data:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(data)
+        if text:
+            yield text
+
+
+def iter_json(read):
+    """Entries of a JSON export document (or top-level array), decoded one at a time"""
+    decoder = json.JSONDecoder()
+    chunks = _chunks(read)
+    buffer = ''
+    exhausted = False
+
+    def more():
+        nonlocal buffer, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            return False
+        buffer += chunk
+        return True
+
+    # Find the start of the entries array
+    while True:
+        stripped = buffer.lstrip(_WHITESPACE)
+        if stripped.startswith('['):
+            pos = len(buffer) - len(stripped) + 1
+            break
+        match = _ENTRIES_RE.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if len(buffer) > MAX_ENTRY_SIZE:
+            raise ValueError('No "entries" array found in the upload')
+        if not more():
+            raise ValueError('No "entries" array found in the upload')
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ',':
+            pos += 1
+        if pos >= len(buffer):
+            buffer, pos = '', 0
+            if not more():
+                raise ValueError('Upload ended inside the "entries" array')
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            entry, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # Most likely the entry continues in the next chunk
+            buffer, pos = buffer[pos:], 0
+            if len(buffer) > MAX_ENTRY_SIZE:
+                raise ValueError(f'Malformed or oversized entry in upload (over {MAX_ENTRY_SIZE} characters)')
+            if exhausted or not more():
+                raise ValueError(f'Malformed entry in upload: {e.msg}')
+            continue
+        yield entry
+        pos = end
+        if pos > READ_SIZE:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_ndjson(read):
+    """Entries of an NDJSON upload, one JSON object per line"""
+    buffer = ''
+    for chunk in _chunks(read):
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+        if len(buffer) > MAX_ENTRY_SIZE:
+            raise ValueError(f'Line longer than {MAX_ENTRY_SIZE} characters in upload')
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        # Reported per entry by normalize() instead of aborting the import
+        return InvalidLine(str(e))
+
+
+class InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON"""
+
+    def __init__(self, reason):
+        self.reason = reason
+
+
+def parse_timestamp(value):
+    """Stored form of an exported timestamp: naive UTC 'YYYY-MM-DD HH:MM:SS[.ffffff]'"""
+    if not value:
+        return None
+    text = str(value).strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat(sep=' ')
+
+
+def dedupe_key(content, created_at):
+    return (hashlib.sha256(content.encode('utf-8')).digest(), created_at)
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    return None
+
+
+def reusable_analysis(raw):
+    """The entry's own analysis fields, or None when it was never (successfully) analyzed"""
+    if raw.get('analysis_status', 'complete') not in ANALYSIS_STATUSES:
+        return None
+    score = raw.get('sentiment_score')
+    if isinstance(score, str):
+        try:
+            score = float(score)
+        except ValueError:
+            return None
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not -1 <= score <= 1:
+        return None
+    emotions = _as_list(raw.get('emotions', []))
+    key_themes = _as_list(raw.get('key_themes', []))
+    if emotions is None or key_themes is None:
+        return None
+    return {
+        'sentiment_score': float(score),
+        'emotions': emotions,
+        'key_themes': key_themes,
+        'analysis_status': raw.get('analysis_status', 'complete')
+    }
+
+
+def normalize(raw, user_id, now):
+    """Row to insert for an uploaded entry (analysis fields only when reusable); raises ValueError"""
+    if isinstance(raw, InvalidLine):
+        raise ValueError(f'invalid JSON: {raw.reason}')
+    if not isinstance(raw, dict):
+        raise ValueError('entry is not an object')
+    content = raw.get('content')
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError('content is required')
+    try:
+        created_at = parse_timestamp(raw.get('created_at')) or now
+        updated_at = parse_timestamp(raw.get('updated_at')) or created_at
+    except (TypeError, ValueError):
+        raise ValueError('created_at/updated_at is not an ISO timestamp')
+
+    row = {'user_id': user_id, 'content': content, 'created_at': created_at, 'updated_at': updated_at}
+    row.update(reusable_analysis(raw) or {})
+    return row
+
+
+def existing_keys(entries, user_id, rows):
+    """Dedupe keys of stored entries in the timestamp span of a batch"""
+    timestamps = [row['created_at'] for row in rows]
+    stored = entries.range(
+        user_id, since=min(timestamps), until=storage.exclusive_end(max(timestamps)),
+        columns='content, created_at'
+    )
+    return {dedupe_key(row['content'], parse_timestamp(row['created_at'])) for row in stored}
+
+
+class Importer:
+    """Normalizes, deduplicates and batch-inserts one user's uploaded entries"""
+
+    def __init__(self, entries, user_id, analyze, batch_size=IMPORT_BATCH_SIZE):
+        self.entries = entries
+        self.user_id = user_id
+        self.analyze = analyze
+        self.batch_size = batch_size
+        self.now = datetime.utcnow().isoformat(sep=' ')
+        self.counts = {'processed': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0, 'analyzed': 0}
+        self.errors = []
+
+    def run(self, uploaded):
+        """Import entries from an iterable; yields the running counts after every batch"""
+        batch = []
+        for raw in uploaded:
+            self.counts['processed'] += 1
+            try:
+                row = normalize(raw, self.user_id, self.now)
+            except ValueError as e:
+                self.counts['invalid'] += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({'index': self.counts['processed'] - 1, 'error': str(e)})
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+                yield dict(self.counts)
+        if batch:
+            self._flush(batch)
+            yield dict(self.counts)
+
+    def _flush(self, rows):
+        # Earlier batches are already stored, so the range lookup covers them;
+        # only duplicates within this batch need tracking (memory stays O(batch))
+        stored = existing_keys(self.entries, self.user_id, rows)
+        fresh = []
+        for row in rows:
+            key = dedupe_key(row['content'], row['created_at'])
+            if key in stored:
+                self.counts['duplicates'] += 1
+                continue
+            stored.add(key)
+            if 'sentiment_score' not in row:
+                analysis = self.analyze(row['content'])
+                row.update({name: analysis[name] for name in ('sentiment_score', 'emotions', 'key_themes')})
+                row['analysis_status'] = analysis.get('analysis_status', 'complete')
+                self.counts['analyzed'] += 1
+            fresh.append(row)
+        if fresh:
+            self.counts['imported'] += self.entries.insert_many(fresh)
@@ -0,0 +1,418 @@
+"""
+Local, dependency-free sentiment engine
+
+A lexicon/rule-based scorer (in the spirit of VADER) that produces the same
+{sentiment_score, emotions, key_themes, brief_insight} shape as the GPT-4o
+analysis. Used as the fast path in tiered mode and as a real fallback when
+OpenAI is slow or unavailable, instead of a constant neutral result.
+"""
+
+import math
+import re
+
+# Word valences on a -4..4 scale
+VALENCE = {
+    # positive
+    'good': 1.9, 'great': 3.1, 'amazing': 2.8, 'awesome': 3.1, 'wonderful': 2.7,
+    'fantastic': 2.6, 'excellent': 2.7, 'happy': 2.7, 'happier': 2.4, 'joy': 2.8,
+    'joyful': 2.9, 'glad': 2.0, 'love': 3.2, 'loved': 2.9, 'loving': 2.9,
+    'grateful': 2.5, 'thankful': 2.3, 'gratitude': 2.3, 'blessed': 2.4,
+    'hopeful': 2.0, 'hope': 1.9, 'optimistic': 2.3, 'excited': 2.2, 'exciting': 2.2,
+    'proud': 2.1, 'accomplished': 2.1, 'achieved': 1.8, 'success': 2.7,
+    'successful': 2.8, 'calm': 1.3, 'peaceful': 2.2, 'relaxed': 2.2, 'relaxing': 2.0,
+    'rested': 1.4, 'content': 1.5, 'confident': 2.2, 'motivated': 1.8,
+    'inspired': 2.2, 'energized': 2.0, 'fun': 2.3, 'enjoyed': 2.3, 'enjoy': 2.2,
+    'nice': 1.8, 'better': 1.9, 'best': 3.2, 'beautiful': 2.9, 'smile': 1.5,
+    'smiled': 1.5, 'laugh': 2.6, 'laughed': 2.0, 'productive': 1.7, 'supported': 1.7,
+    'support': 1.7, 'safe': 1.9, 'strong': 2.3, 'healthy': 1.7, 'progress': 1.8,
+    'win': 2.8, 'won': 2.7, 'celebrate': 2.7, 'celebrated': 2.6, 'kind': 2.4,
+    'friendly': 2.2, 'appreciate': 1.9, 'appreciated': 2.3, 'satisfied': 1.8,
+    'relieved': 1.6, 'relief': 1.7, 'refreshed': 1.9, 'cheerful': 2.5,
+    # negative
+    'bad': -2.5, 'terrible': -2.1, 'awful': -2.0, 'horrible': -2.5, 'sad': -2.1,
+    'sadness': -1.9, 'unhappy': -1.8, 'depressed': -2.3, 'depressing': -1.6,
+    'miserable': -2.2, 'cry': -2.1, 'cried': -1.6, 'crying': -2.1, 'lonely': -1.5,
+    'alone': -1.0, 'anxious': -1.0, 'anxiety': -0.7, 'worried': -1.2, 'worry': -1.9,
+    'nervous': -1.1, 'scared': -1.9, 'afraid': -2.0, 'fear': -2.2, 'panic': -2.3,
+    'stressed': -1.4, 'stress': -1.8, 'stressful': -1.9, 'overwhelmed': -1.5,
+    'overwhelming': -1.4, 'tired': -1.9, 'exhausted': -1.5, 'drained': -1.5,
+    'angry': -2.3, 'anger': -2.7, 'mad': -2.2, 'furious': -2.7, 'annoyed': -1.6,
+    'irritated': -1.8, 'frustrated': -1.5, 'frustrating': -1.9, 'upset': -1.6,
+    'hurt': -2.4, 'pain': -2.3, 'painful': -2.4, 'sick': -1.9, 'ill': -1.7,
+    'hate': -2.7, 'hated': -3.2, 'failed': -2.3, 'failure': -2.4, 'fail': -2.5,
+    'lost': -1.3, 'lose': -1.3, 'guilty': -1.8, 'guilt': -1.9, 'ashamed': -2.1,
+    'shame': -1.9, 'disappointed': -1.9, 'disappointing': -2.2, 'hopeless': -2.0,
+    'worthless': -1.9, 'broken': -1.8, 'struggle': -1.3, 'struggling': -1.4,
+    'difficult': -1.5, 'hard': -0.4, 'problem': -1.7, 'problems': -1.7,
+    'conflict': -1.3, 'argument': -1.5, 'fight': -1.6, 'fought': -1.6,
+    'bored': -1.1, 'boring': -1.3, 'jealous': -2.0, 'regret': -1.8, 'insecure': -1.8,
+    'restless': -1.1, 'sleepless': -1.6, 'insomnia': -1.5, 'grief': -2.2,
+    'grieving': -2.3, 'confused': -1.3, 'numb': -1.0, 'empty': -1.3,
+}
+
+NEGATIONS = {
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor',
+    'without', 'cannot', 'hardly', 'barely', 'isnt', 'wasnt', 'dont', 'didnt',
+    'doesnt', 'cant', 'couldnt', 'wont', 'wouldnt', 'shouldnt', 'arent', 'werent',
+    'havent', 'hasnt', 'hadnt', 'aint',
+}
+
+# Multipliers applied to the next sentiment-bearing word
+INTENSIFIERS = {
+    'very': 1.3, 'really': 1.3, 'extremely': 1.5, 'incredibly': 1.5, 'so': 1.25,
+    'super': 1.3, 'totally': 1.3, 'completely': 1.4, 'absolutely': 1.4,
+    'deeply': 1.4, 'truly': 1.3, 'especially': 1.2, 'quite': 1.1, 'too': 1.2,
+    'slightly': 0.6, 'somewhat': 0.7, 'kinda': 0.7, 'kindof': 0.7, 'little': 0.7,
+    'barely': 0.5, 'mildly': 0.6,
+}
+
+POSITIVE_EMOTIONS = {'happy', 'grateful', 'hopeful', 'excited', 'proud', 'calm', 'peaceful', 'motivated', 'loved', 'content'}
+
+# Words that mark a contrast; the clause after them dominates
+CONTRASTS = {'but', 'however', 'though', 'although', 'yet'}
+
+EMOTION_LEXICON = {
+    'happy': {'happy', 'happier', 'joy', 'joyful', 'glad', 'cheerful', 'fun', 'laugh', 'laughed', 'smile', 'smiled', 'enjoyed'},
+    'grateful': {'grateful', 'thankful', 'gratitude', 'blessed', 'appreciate', 'appreciated'},
+    'hopeful': {'hopeful', 'hope', 'optimistic', 'looking forward'},
+    'excited': {'excited', 'exciting', 'thrilled', 'celebrate', 'celebrated'},
+    'proud': {'proud', 'accomplished', 'achieved', 'success', 'successful', 'win', 'won'},
+    'calm': {'calm', 'relaxed', 'relaxing', 'rested', 'refreshed'},
+    'peaceful': {'peaceful', 'peace', 'content', 'serene'},
+    'motivated': {'motivated', 'inspired', 'energized', 'productive', 'determined'},
+    'loved': {'love', 'loved', 'loving', 'supported', 'support'},
+    'anxious': {'anxious', 'anxiety', 'nervous', 'worried', 'worry', 'panic', 'scared', 'afraid', 'fear'},
+    'stressed': {'stressed', 'stress', 'stressful', 'overwhelmed', 'overwhelming', 'pressure', 'deadline'},
+    'sad': {'sad', 'sadness', 'unhappy', 'cry', 'cried', 'crying', 'miserable', 'depressed', 'grief', 'grieving'},
+    'lonely': {'lonely', 'alone', 'isolated'},
+    'angry': {'angry', 'anger', 'mad', 'furious', 'hate', 'hated'},
+    'frustrated': {'frustrated', 'frustrating', 'annoyed', 'irritated'},
+    'tired': {'tired', 'exhausted', 'drained', 'sleepless', 'insomnia'},
+    'disappointed': {'disappointed', 'disappointing', 'regret', 'failed', 'failure'},
+    'guilty': {'guilty', 'guilt', 'ashamed', 'shame'},
+    'confused': {'confused', 'uncertain', 'unsure', 'lost'},
+}
+
+THEME_LEXICON = {
+    'work': {'work', 'job', 'boss', 'office', 'meeting', 'meetings', 'project', 'deadline', 'career', 'coworker', 'coworkers', 'colleague', 'colleagues', 'promotion'},
+    'relationships': {'friend', 'friends', 'partner', 'boyfriend', 'girlfriend', 'husband', 'wife', 'relationship', 'date', 'dating', 'love'},
+    'family': {'family', 'mom', 'dad', 'mother', 'father', 'parents', 'sister', 'brother', 'kids', 'children', 'son', 'daughter'},
+    'health': {'health', 'sick', 'ill', 'doctor', 'exercise', 'workout', 'gym', 'run', 'running', 'pain', 'therapy', 'diet'},
+    'sleep': {'sleep', 'slept', 'insomnia', 'tired', 'rest', 'rested', 'nap', 'sleepless'},
+    'school': {'school', 'class', 'exam', 'exams', 'study', 'studying', 'homework', 'college', 'university', 'teacher'},
+    'finances': {'money', 'rent', 'bills', 'debt', 'salary', 'budget', 'finances', 'paycheck'},
+    'personal growth': {'growth', 'learn', 'learned', 'learning', 'goal', 'goals', 'habit', 'habits', 'improve', 'progress', 'meditation', 'meditate', 'journaling'},
+}
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;]")
+_CLAUSE_BREAKS = {'.', '!', '?', ';'}
+NEGATION_SCOPE = 3
+NEGATION_FACTOR = -0.74
+CONTRAST_BEFORE = 0.5
+CONTRAST_AFTER = 1.5
+NORMALIZATION_ALPHA = 15.0
+
+
+def _build_index(lexicon):
+    """Invert {label: words} into single-word and two-word phrase lookups"""
+    words = {}
+    phrases = {}
+    for label, terms in lexicon.items():
+        for term in terms:
+            parts = term.split()
+            if len(parts) == 1:
+                words.setdefault(term, label)
+            else:
+                phrases.setdefault(tuple(parts), label)
+    return words, phrases
+
+
+_EMOTION_WORDS, _EMOTION_PHRASES = _build_index(EMOTION_LEXICON)
+_THEME_WORDS, _THEME_PHRASES = _build_index(THEME_LEXICON)
+
+# Batch scoring: one table answering every rule for a token in a single lookup,
+# (kind, valence or multiplier, emotion word, theme word, starts a phrase).
+# Tokens absent from it only advance the negation windows.
+_PLAIN, _BREAK, _CONTRAST, _NEGATION, _INTENSIFIER = range(5)
+
+
+def _build_lookup():
+    phrase_starts = {words[0] for words in list(_EMOTION_PHRASES) + list(_THEME_PHRASES)}
+    vocabulary = (set(VALENCE) | NEGATIONS | set(INTENSIFIERS) | CONTRASTS | _CLAUSE_BREAKS
+                  | set(_EMOTION_WORDS) | set(_THEME_WORDS) | phrase_starts)
+    lookup = {}
+    for token in vocabulary:
+        # Same precedence as score_tokens
+        if token in _CLAUSE_BREAKS:
+            kind, value = _BREAK, None
+        elif token in CONTRASTS:
+            kind, value = _CONTRAST, None
+        elif token in NEGATIONS:
+            kind, value = _NEGATION, None
+        elif token in INTENSIFIERS:
+            kind, value = _INTENSIFIER, INTENSIFIERS[token]
+        else:
+            kind, value = _PLAIN, VALENCE.get(token)
+        lookup[token] = (kind, value, _EMOTION_WORDS.get(token), _THEME_WORDS.get(token),
+                         token in phrase_starts)
+    return lookup
+
+
+_LOOKUP = _build_lookup()
+# \x00 separates entries when a whole batch is tokenized in one call
+_BATCH_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;]|\x00")
+
+
+def tokenize(text):
+    """Lowercase word/punctuation tokens with contractions folded (don't -> dont)"""
+    return [t.replace("'", '') for t in _TOKEN_RE.findall((text or '').lower())]
+
+
+def tokenize_batch(texts):
+    """tokenize() for every text, with one lowercase and one regex pass over the batch"""
+    joined = '\x00'.join((text or '').replace('\x00', ' ') for text in texts).lower()
+    tokens = _BATCH_TOKEN_RE.findall(joined)
+    if "'" in joined:
+        tokens = [t.replace("'", '') for t in tokens]
+    batches = []
+    start = 0
+    for _ in range(len(texts) - 1):
+        end = tokens.index('\x00', start)
+        batches.append(tokens[start:end])
+        start = end + 1
+    if texts:
+        batches.append(tokens[start:])
+    return batches
+
+
+def _rank(counts, first_seen, limit):
+    return [label for label, _ in sorted(counts.items(), key=lambda kv: (-kv[1], first_seen[kv[0]]))][:limit]
+
+
+class LocalSentimentAnalyzer:
+    """Rule-based scorer with negation, intensifier and contrast handling"""
+
+    def score_tokens(self, tokens):
+        """Return (valence_sum, absolute_sum, sentiment_hits) for a token list"""
+        hits = 0
+        negate_left = 0
+        boost = 1.0
+        contrast = 1.0
+        weighted = []
+        clause = []
+
+        for token in tokens:
+            if token in _CLAUSE_BREAKS:
+                if token == '!' and clause:
+                    clause[-1] *= 1.1
+                weighted.extend(clause)
+                clause = []
+                negate_left = 0
+                boost = 1.0
+                contrast = 1.0
+                continue
+            if token in CONTRASTS:
+                # Earlier clause carries less weight than the one after the contrast
+                weighted.extend(v * CONTRAST_BEFORE for v in clause)
+                clause = []
+                negate_left = 0
+                boost = 1.0
+                contrast = CONTRAST_AFTER
+                continue
+            if token in NEGATIONS:
+                negate_left = NEGATION_SCOPE
+                continue
+            if token in INTENSIFIERS:
+                boost *= INTENSIFIERS[token]
+                continue
+
+            valence = VALENCE.get(token)
+            if valence is not None:
+                value = valence * boost * contrast
+                if negate_left:
+                    value *= NEGATION_FACTOR
+                clause.append(value)
+                hits += 1
+                boost = 1.0
+            if negate_left:
+                negate_left -= 1
+
+        weighted.extend(clause)
+        return sum(weighted), sum(abs(v) for v in weighted), hits
+
+    def _labels(self, tokens, words, phrases, limit, skip_negated=False):
+        counts = {}
+        first_seen = {}
+        negate_left = 0
+        for i, token in enumerate(tokens):
+            if token in _CLAUSE_BREAKS:
+                negate_left = 0
+                continue
+            if token in NEGATIONS:
+                negate_left = NEGATION_SCOPE
+                continue
+            label = None
+            if i + 1 < len(tokens):
+                label = phrases.get((token, tokens[i + 1]))
+            if label is None:
+                label = words.get(token)
+            if label is not None and not (skip_negated and negate_left):
+                counts[label] = counts.get(label, 0) + 1
+                first_seen.setdefault(label, i)
+            if negate_left:
+                negate_left -= 1
+        return _rank(counts, first_seen, limit)
+
+    def _scan(self, tokens):
+        """
+        score_tokens() and both _labels() passes fused into one loop with one lookup per token
+        Returns (valence_sum, absolute_sum, sentiment_hits, emotions, themes)
+        """
+        hits = 0
+        negate_left = 0   # score_tokens' window (reset by contrasts, skips intensifiers)
+        label_left = 0    # _labels' window
+        boost = 1.0
+        contrast = 1.0
+        weighted = []
+        clause = []
+        emotion_counts, emotion_seen = {}, {}
+        theme_counts, theme_seen = {}, {}
+        last = len(tokens) - 1
+        lookup = _LOOKUP
+
+        for i, token in enumerate(tokens):
+            entry = lookup.get(token)
+            if entry is None:
+                if negate_left:
+                    negate_left -= 1
+                if label_left:
+                    label_left -= 1
+                continue
+            kind, value, emotion, theme, phrased = entry
+
+            if kind == _BREAK:
+                if token == '!' and clause:
+                    clause[-1] *= 1.1
+                weighted.extend(clause)
+                clause = []
+                negate_left = label_left = 0
+                boost = 1.0
+                contrast = 1.0
+                continue
+            if kind == _NEGATION:
+                negate_left = label_left = NEGATION_SCOPE
+                continue
+
+            if phrased and i < last:
+                pair = (token, tokens[i + 1])
+                emotion = _EMOTION_PHRASES.get(pair, emotion)
+                theme = _THEME_PHRASES.get(pair, theme)
+            if emotion is not None and not label_left:
+                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+                emotion_seen.setdefault(emotion, i)
+            if theme is not None:
+                theme_counts[theme] = theme_counts.get(theme, 0) + 1
+                theme_seen.setdefault(theme, i)
+            if label_left:
+                label_left -= 1
+
+            if kind == _CONTRAST:
+                weighted.extend(v * CONTRAST_BEFORE for v in clause)
+                clause = []
+                negate_left = 0
+                boost = 1.0
+                contrast = CONTRAST_AFTER
+                continue
+            if kind == _INTENSIFIER:
+                boost *= value
+                continue
+            if value is not None:
+                scored = value * boost * contrast
+                if negate_left:
+                    scored *= NEGATION_FACTOR
+                clause.append(scored)
+                hits += 1
+                boost = 1.0
+            if negate_left:
+                negate_left -= 1
+
+        weighted.extend(clause)
+        return (sum(weighted), sum(abs(v) for v in weighted), hits,
+                _rank(emotion_counts, emotion_seen, 3), _rank(theme_counts, theme_seen, 2))
+
+    def analyze_scored(self, text):
+        """Analyze one entry; returns (analysis, confidence in [0, 1])"""
+        tokens = tokenize(text)
+        total, magnitude, hits = self.score_tokens(tokens)
+        emotions = self._labels(tokens, _EMOTION_WORDS, _EMOTION_PHRASES, 3, skip_negated=True)
+        themes = self._labels(tokens, _THEME_WORDS, _THEME_PHRASES, 2)
+        return self._result(total, magnitude, hits, emotions, themes)
+
+    def _result(self, total, magnitude, hits, emotions, themes):
+        score = total / math.sqrt(total * total + NORMALIZATION_ALPHA) if total else 0.0
+        score = round(max(-1.0, min(1.0, score)), 2)
+
+        if not emotions:
+            emotions = ['content'] if score > 0.3 else ['low'] if score < -0.3 else ['reflective']
+        themes = themes or ['self-reflection']
+
+        # More evidence and less mixed polarity -> higher confidence
+        if hits:
+            coverage = 1.0 - math.exp(-hits / 3.0)
+            agreement = abs(total) / magnitude if magnitude else 0.0
+            confidence = round(coverage * (0.4 + 0.6 * agreement), 3)
+        else:
+            confidence = 0.0
+
+        analysis = {
+            'sentiment_score': score,
+            'emotions': emotions,
+            'key_themes': themes,
+            'brief_insight': self._insight(score, emotions, themes[0])
+        }
+        return analysis, confidence
+
+    def analyze(self, text):
+        return self.analyze_scored(text)[0]
+
+    def analyze_batch_scored(self, texts):
+        """
+        analyze_scored() for a list of entries: the batch is tokenized in one pass
+        and each entry is scored in a single loop over the combined lookup table
+        """
+        texts = list(texts)
+        return [self._result(*self._scan(tokens)) for tokens in tokenize_batch(texts)]
+
+    def analyze_batch(self, texts):
+        return [analysis for analysis, _ in self.analyze_batch_scored(texts)]
+
+    @staticmethod
+    def _insight(score, emotions, theme):
+        positive = score > 0.3
+        negative = score < -0.3
+        # Name an emotion only when it matches the overall tone of the entry
+        emotion = next((e for e in emotions if (e in POSITIVE_EMOTIONS) == positive), None)
+        topic = f" around {theme}" if theme != 'self-reflection' else ''
+        if positive:
+            feeling = f"feel {emotion}" if emotion else "feel good"
+            return f"There's real positivity in your entry{topic}. Take a moment to notice what helped you {feeling}."
+        if negative:
+            feeling = f"Feeling {emotion}" if emotion else "What you're going through"
+            return f"{feeling}{topic} is hard. Be gentle with yourself and consider one small step that could bring some relief."
+        return f"You're reflecting thoughtfully{topic}. Noticing how you feel is a valuable step in understanding yourself."
+
+
+_default_analyzer = LocalSentimentAnalyzer()
+
+
+def analyze(text):
+    """Analyze a single entry with the shared default analyzer"""
+    return _default_analyzer.analyze(text)
+
+
+def analyze_scored(text):
+    return _default_analyzer.analyze_scored(text)
+
+
+def analyze_batch(texts):
+    return _default_analyzer.analyze_batch(texts)
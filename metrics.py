@@ -0,0 +1,309 @@
+"""
+Request instrumentation: Server-Timing breakdowns and Prometheus metrics
+
+Every request gets a RequestTimings collector (thread-local, begun and ended
+by the Flask hooks in app.py). Outbound Supabase and OpenAI calls go through
+TracedClient proxies, which time each network round trip, add it to the
+process-wide histograms and, when a request is in flight, to that request's
+Server-Timing header (with a resilience.Upstream attached, calls also get
+deadlines, retries and a circuit breaker). render() produces the Prometheus text format served at
+/metrics; collectors registered with add_collector() export gauges computed at
+scrape time (cache hit rates, queue depth, pool stats).
+"""
+
+import threading
+import time
+
+# Seconds; OpenAI calls routinely run past the default Prometheus buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Builder calls that name a Supabase operation: table('x').select(...) -> x.select
+TABLE_CALLS = ('table', 'from_')
+VERB_CALLS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+_local = threading.local()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(tuple(str(v) for v in label_values), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+        for key, (counts, total, count) in items:
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                yield (self.name + '_bucket',
+                       _format_labels(self.labels, key, f'le="{_format_value(bound)}"'), running)
+            yield self.name + '_bucket', _format_labels(self.labels, key, 'le="+Inf"'), count
+            yield self.name + '_sum', _format_labels(self.labels, key), round(total, 6)
+            yield self.name + '_count', _format_labels(self.labels, key), count
+
+
+class Registry:
+    """Named metrics plus scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """collect() -> iterable of (name, help, type, {labels: value} or value)"""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                print(f"[WARN] Metrics collector failed: {e}")
+                continue
+            for name, help_text, kind, values in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                if not isinstance(values, dict):
+                    values = {(): values}
+                for key, value in values.items():
+                    label_names = [k for k, _ in key]
+                    label_values = [v for _, v in key]
+                    lines.append(f'{name}{_format_labels(label_names, label_values)} {_format_value(value or 0)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'journal_http_requests_total', 'HTTP requests by route, method and status',
+    ('route', 'method', 'status'))
+http_latency = registry.histogram(
+    'journal_http_request_duration_seconds', 'Time to produce a response (first byte for streamed bodies)',
+    ('route', 'method'))
+http_exceptions = registry.counter(
+    'journal_http_exceptions_total', 'Unhandled exceptions raised by route handlers', ('route',))
+outbound_latency = registry.histogram(
+    'journal_outbound_request_duration_seconds', 'Outbound Supabase and OpenAI call latency',
+    ('service', 'operation'))
+outbound_errors = registry.counter(
+    'journal_outbound_request_errors_total', 'Outbound calls that raised', ('service', 'operation'))
+openai_tokens = registry.counter(
+    'journal_openai_tokens_total', 'OpenAI token usage reported by completions', ('model', 'type'))
+
+
+class RequestTimings:
+    """Per-request accumulation of outbound call time, grouped by service"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.services = {}
+
+    def add(self, service, seconds):
+        total, count = self.services.get(service, (0.0, 0))
+        self.services[service] = (total + seconds, count + 1)
+
+    def header(self):
+        """Server-Timing value: one metric per service, plus app time and the total"""
+        elapsed = time.perf_counter() - self.started
+        parts = []
+        outbound = 0.0
+        for service, (seconds, count) in sorted(self.services.items()):
+            outbound += seconds
+            parts.append(f'{service};dur={seconds * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"')
+        parts.append(f'app;dur={max(0.0, elapsed - outbound) * 1000:.1f}')
+        parts.append(f'total;dur={elapsed * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def begin_request():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def end_request():
+    timings = getattr(_local, 'timings', None)
+    _local.timings = None
+    return timings
+
+
+def current_request():
+    return getattr(_local, 'timings', None)
+
+
+def record_outbound(service, operation, seconds, failed=False):
+    outbound_latency.observe(seconds, service, operation)
+    if failed:
+        outbound_errors.inc(service, operation)
+    timings = current_request()
+    if timings is not None:
+        timings.add(service, seconds)
+
+
+def record_usage(model, usage):
+    """Count prompt/completion tokens from an OpenAI usage object"""
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            openai_tokens.inc(model or 'unknown', kind[:-len('_tokens')], amount=tokens)
+
+
+class TracedClient:
+    """
+    Transparent proxy over a Supabase or OpenAI client
+
+    Calls named in `outbound` (execute, create, auth methods) are timed and
+    recorded; every other call or attribute returns another proxy so builder
+    chains like client.table('x').select('*').eq(...).execute() stay traced.
+    The operation label is built from the table/rpc name and the verb.
+    """
+
+    def __init__(self, target, service, outbound, operation='', upstream=None):
+        self._target = target
+        self._service = service
+        self._outbound = outbound
+        self._operation = operation
+        self._upstream = upstream
+
+    def _child(self, target, operation):
+        return TracedClient(target, self._service, self._outbound, operation, self._upstream)
+
+    def _timed(self, name, method):
+        operation = self._operation if name == 'execute' else '.'.join(filter(None, (self._operation, name)))
+
+        def attempt(*args, timeout=None, **kwargs):
+            if timeout is not None:
+                kwargs['timeout'] = timeout
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                record_outbound(self._service, operation or name, time.perf_counter() - start, failed=True)
+                raise
+            record_outbound(self._service, operation or name, time.perf_counter() - start)
+            usage = getattr(result, 'usage', None)
+            if usage is not None:
+                record_usage(kwargs.get('model'), usage)
+            return result
+
+        def call(*args, **kwargs):
+            if self._upstream is None:
+                return attempt(*args, **kwargs)
+            # Deadline, retries and circuit breaker (resilience.Upstream); each attempt is timed
+            return self._upstream.call(
+                operation or name, lambda timeout: attempt(*args, timeout=timeout, **kwargs)
+            )
+        return call
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in self._outbound or (self._operation == 'auth' and callable(attr)):
+            return self._timed(name, attr)
+        if not callable(attr):
+            if isinstance(attr, (str, int, float, bool, dict, list, tuple, type(None))):
+                return attr
+            return self._child(attr, '.'.join(filter(None, (self._operation, name))))
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if name in TABLE_CALLS and args:
+                operation = str(args[0])
+            elif name == 'rpc' and args:
+                operation = f'rpc.{args[0]}'
+            elif name in VERB_CALLS:
+                operation = f'{self._operation}.{name}'
+            else:
+                operation = self._operation
+            return self._child(result, operation)
+        return call
+
+
+def trace_supabase(client, upstream=None):
+    return TracedClient(client, 'supabase', ('execute',), upstream=upstream)
+
+
+def trace_openai(client, upstream=None):
+    return TracedClient(client, 'openai', ('create',), upstream=upstream)
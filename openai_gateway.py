@@ -0,0 +1,283 @@
+"""
+Gateway for OpenAI chat completions: coalescing, rate limits and a concurrency cap
+
+Every openai_client.chat.completions.create() call in the app goes through
+OpenAIGateway, which
+- coalesces identical in-flight requests (singleflight): a double-clicked
+  "Generate Weekly Insights" or several tabs loading the same report share
+  one upstream call and its result
+- reserves capacity from requests/min and tokens/min token buckets before
+  calling, so bursts queue briefly instead of being answered with 429s
+  (token reservations are estimated from the prompt and max_tokens, then
+  corrected with the usage OpenAI reports)
+- caps in-flight calls with a semaphore (a streamed completion holds its
+  permit until the stream is consumed or closed)
+- applies the upstream's timeout/retry/breaker policy (resilience.Upstream)
+  around admission, so every attempt, retries included, is charged to the
+  buckets and takes its own slot
+A call that would wait longer than max_wait (or the rest of the request's
+resilience budget) raises GatewayBusy; callers already fall back to the
+local path on any exception.
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+import metrics
+import resilience
+
+# Same rough ratio backfill.py budgets prompts with
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_TOKENS = 512
+
+wait_seconds = metrics.registry.histogram(
+    'journal_openai_gateway_wait_seconds', 'Time OpenAI calls spent queued for rate limits and concurrency',
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+gateway_calls = metrics.registry.counter(
+    'journal_openai_gateway_calls_total',
+    'OpenAI calls by outcome (sent, coalesced onto an identical in-flight call, rejected as busy)',
+    ('outcome',))
+
+
+class GatewayBusy(resilience.Rejected):
+    """Raised when a call would queue longer than the gateway's max_wait"""
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to `capacity`; reservations may run into debt"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take `amount` units now; returns the seconds to wait before using them"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+def estimate_tokens(kwargs):
+    """Prompt tokens (message characters / 4) plus the completion allowance"""
+    chars = sum(len(str(message.get('content', ''))) for message in kwargs.get('messages', []))
+    return chars // CHARS_PER_TOKEN + (kwargs.get('max_tokens') or DEFAULT_MAX_TOKENS)
+
+
+def request_key(kwargs):
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    """One in-flight upstream call that identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class OpenAIGateway:
+    """Proxy exposing client.chat.completions.create() with coalescing, rate limits and a concurrency cap"""
+
+    def __init__(self, client, rpm=0, tpm=0, max_concurrency=8, max_wait=30.0, upstream=None):
+        self._client = client
+        self.upstream = upstream
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.chat = _Namespace(completions=_Namespace(create=self.create))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def create(self, **kwargs):
+        if kwargs.get('stream'):
+            # A stream is consumed once, so it cannot be shared
+            return self._resilient(self._streamed, kwargs)
+
+        key = request_key(kwargs)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            gateway_calls.inc('coalesced')
+            left = resilience.remaining()
+            if not flight.done.wait(None if left is None else max(0.0, left)):
+                raise resilience.DeadlineExceeded('Request budget exhausted waiting for a coalesced OpenAI call')
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._resilient(self._call, kwargs)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _admit(self, kwargs):
+        """Wait for rate-limit capacity and a concurrency slot; returns the reserved token estimate"""
+        started = time.monotonic()
+        estimate = estimate_tokens(kwargs)
+        # Never queue past the current request's budget
+        left = resilience.remaining()
+        max_wait = self.max_wait if left is None else max(0.0, min(self.max_wait, left))
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(estimate))
+        if delay > max_wait:
+            self._release_reservation(estimate)
+            gateway_calls.inc('rejected')
+            raise GatewayBusy(f'OpenAI rate limit: next slot in {delay:.1f}s')
+
+        with self._lock:
+            self.queued += 1
+        try:
+            if delay:
+                time.sleep(delay)
+            if self._slots and not self._slots.acquire(timeout=max(0.0, max_wait - delay)):
+                self._release_reservation(estimate)
+                gateway_calls.inc('rejected')
+                raise GatewayBusy(f'{self.max_concurrency} OpenAI calls already in flight')
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+        wait_seconds.observe(time.monotonic() - started)
+        gateway_calls.inc('sent')
+        with self._lock:
+            self.in_flight += 1
+        return estimate
+
+    def _release_reservation(self, estimate):
+        if self.requests:
+            self.requests.refund(1)
+        if self.tokens:
+            self.tokens.refund(estimate)
+
+    def _finish(self, estimate, usage):
+        with self._lock:
+            self.in_flight -= 1
+        if self._slots:
+            self._slots.release()
+        # Correct the token reservation with what the call actually used
+        used = getattr(usage, 'total_tokens', None)
+        if self.tokens and used is not None:
+            if used < estimate:
+                self.tokens.refund(estimate - used)
+            else:
+                self.tokens.reserve(used - estimate)
+
+    def _resilient(self, attempt, kwargs):
+        """Run attempt(kwargs) under the upstream policy; each retry is admitted again"""
+        if self.upstream is None:
+            return attempt(kwargs)
+
+        def once(timeout):
+            return attempt(kwargs if timeout is None else dict(kwargs, timeout=timeout))
+        return self.upstream.call('chat.completions.create', once)
+
+    def _call(self, kwargs):
+        estimate = self._admit(kwargs)
+        response = None
+        try:
+            response = self._client.chat.completions.create(**kwargs)
+            return response
+        finally:
+            self._finish(estimate, getattr(response, 'usage', None))
+
+    def _streamed(self, kwargs):
+        estimate = self._admit(kwargs)
+        try:
+            stream = self._client.chat.completions.create(**kwargs)
+        except Exception:
+            self._finish(estimate, None)
+            raise
+        return _Stream(stream, lambda usage: self._finish(estimate, usage))
+
+    def stats(self):
+        sent = gateway_calls.value('sent')
+        coalesced = gateway_calls.value('coalesced')
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'max_concurrency': self.max_concurrency,
+            'sent': sent,
+            'coalesced': coalesced,
+            'rejected': gateway_calls.value('rejected'),
+            'coalesce_rate': round(coalesced / (sent + coalesced), 4) if sent + coalesced else 0.0,
+            'requests_available': round(self.requests.available(), 1) if self.requests else None,
+            'tokens_available': round(self.tokens.available()) if self.tokens else None
+        }
+
+
+class _Stream:
+    """Iterator over a streamed completion that hands its slot back when exhausted, closed or dropped"""
+
+    def __init__(self, stream, finish):
+        self._stream = iter(stream)
+        self._finish = finish
+        self._usage = None
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._stream)
+        except BaseException:
+            self.close()
+            raise
+        self._usage = getattr(chunk, 'usage', None) or self._usage
+        return chunk
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._finish(self._usage)
+
+    def __del__(self):
+        self.close()
+
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination helpers for journal listings
+
+Pages are ordered by (created_at DESC, id DESC) and continue strictly after
+the last row of the previous page, so every page is an index range scan on
+(user_id, created_at, id) rather than an OFFSET scan. Cursors are opaque
+URL-safe tokens wrapping that (created_at, id) pair.
+"""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _encode(values):
+    payload = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def encode_cursor(entry):
+    """Opaque cursor pointing just past `entry`"""
+    return _encode([str(entry['created_at']), entry['id']])
+
+
+def decode_cursor(token):
+    """Return (created_at, id) from a cursor; raises ValueError if malformed"""
+    values = _decode(token)
+    if len(values) != 2 or not isinstance(values[0], str) or not isinstance(values[1], (str, int)):
+        raise ValueError('Invalid cursor')
+    return values[0], values[1]
+
+
+def encode_ranked_cursor(entry):
+    """Cursor for relevance-ranked pages ordered by (rank, created_at, id) descending"""
+    return _encode([float(entry['rank']), str(entry['created_at']), entry['id']])
+
+
+def decode_ranked_cursor(token):
+    """Return (rank, created_at, id) from a ranked cursor; raises ValueError if malformed"""
+    values = _decode(token)
+    if (len(values) != 3 or not isinstance(values[0], (int, float))
+            or not isinstance(values[1], str) or not isinstance(values[2], (str, int))):
+        raise ValueError('Invalid cursor')
+    return float(values[0]), values[1], values[2]
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a ?limit= query value into [1, maximum]"""
+    if value in (None, ''):
+        return default
+    try:
+        return max(1, min(int(value), maximum))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+
+
+def supabase_keyset_filter(cursor):
+    """PostgREST `or` filter selecting rows strictly after the cursor (descending order)"""
+    created_at, entry_id = cursor
+    # Quote values: timestamps contain ':' and '+' which are significant in filter syntax
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{entry_id}")'
+
+
+def paginate(rows, limit, encode=encode_cursor):
+    """Split a limit+1 fetch into (page, next_cursor)"""
+    if len(rows) > limit:
+        page = rows[:limit]
+        return page, encode(page[-1])
+    return rows, None
@@ -0,0 +1,151 @@
+"""
+Materialized weekly report cache
+
+Generated weekly reports are stored per user and per week window together
+with a fingerprint of the entries that produced them (ids + updated_at).
+A report is served from the store only while the fingerprint still matches,
+and journal writes drop the user's stored reports outright.
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+
+def entries_fingerprint(entries):
+    """Order-independent hash of the (id, updated_at) pairs of a set of entries"""
+    pairs = sorted(f"{entry['id']}:{entry.get('updated_at') or entry.get('created_at')}" for entry in entries)
+    return hashlib.sha256('|'.join(pairs).encode('utf-8')).hexdigest()
+
+
+class SQLiteReportStore:
+    """Report storage in the local SQLite `weekly_reports` table"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+
+    def get(self, user_id, window_start):
+        db = self._get_db()
+        try:
+            row = db.execute(
+                'SELECT fingerprint, report, generated_at FROM weekly_reports '
+                'WHERE user_id = ? AND window_start = ?',
+                (str(user_id), window_start)
+            ).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        return row['fingerprint'], json.loads(row['report']), row['generated_at']
+
+    def put(self, user_id, window_start, fingerprint, report, generated_at):
+        db = self._get_db()
+        try:
+            db.execute(
+                'INSERT OR REPLACE INTO weekly_reports (user_id, window_start, fingerprint, report, generated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (str(user_id), window_start, fingerprint, json.dumps(report), generated_at)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def invalidate(self, user_id):
+        db = self._get_db()
+        try:
+            db.execute('DELETE FROM weekly_reports WHERE user_id = ?', (str(user_id),))
+            db.commit()
+        finally:
+            db.close()
+
+
+class SupabaseReportStore:
+    """Report storage in the Supabase `weekly_reports` table"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, user_id, window_start):
+        result = self._client.table('weekly_reports')\
+            .select('fingerprint, report, generated_at')\
+            .eq('user_id', user_id)\
+            .eq('window_start', window_start)\
+            .limit(1)\
+            .execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        report = row['report']
+        if isinstance(report, str):
+            report = json.loads(report)
+        return row['fingerprint'], report, float(row['generated_at'])
+
+    def put(self, user_id, window_start, fingerprint, report, generated_at):
+        self._client.table('weekly_reports').upsert({
+            'user_id': user_id,
+            'window_start': window_start,
+            'fingerprint': fingerprint,
+            'report': report,
+            'generated_at': generated_at
+        }).execute()
+
+    def invalidate(self, user_id):
+        self._client.table('weekly_reports').delete().eq('user_id', user_id).execute()
+
+
+class WeeklyReportCache:
+    """Fingerprint-validated report lookups; storage errors never fail a request"""
+
+    def __init__(self, store=None):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, user_id, window_start, fingerprint):
+        """Return (report, age_seconds) when a report for this exact entry set is stored"""
+        if self.store is None:
+            return None
+        try:
+            stored = self.store.get(user_id, window_start)
+        except Exception as e:
+            print(f"[WARN] Weekly report cache read failed: {e}")
+            stored = None
+        if stored is None or stored[0] != fingerprint:
+            self._count('misses')
+            return None
+        self._count('hits')
+        _, report, generated_at = stored
+        return report, max(0.0, time.time() - generated_at)
+
+    def put(self, user_id, window_start, fingerprint, report):
+        if self.store is None:
+            return
+        try:
+            self.store.put(user_id, window_start, fingerprint, report, time.time())
+        except Exception as e:
+            print(f"[WARN] Weekly report cache write failed: {e}")
+
+    def invalidate(self, user_id):
+        if self.store is None:
+            return
+        try:
+            self.store.invalidate(user_id)
+            self._count('invalidations')
+        except Exception as e:
+            print(f"[WARN] Weekly report cache invalidation failed: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,180 @@
+"""
+Streaming weekly reports over Server-Sent Events
+
+GPT-4o writes the weekly report as one JSON object. IncrementalJSONParser
+consumes the completion token by token and reports string fragments as they
+arrive and values as soon as they are complete, so insights and
+recommendations can be shown while the model is still writing the rest.
+"""
+
+import json
+
+WHITESPACE = ' \t\r\n'
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def sse_event(event, data):
+    """One Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for a single JSON object fed in arbitrary chunks
+
+    feed() returns a list of events:
+    - ('delta', path, text): more characters of the string value at `path`
+    - ('value', path, value): the value at `path` is complete
+
+    `path` is a tuple of object keys and array indexes, e.g.
+    ('key_insights', 2). Text before the opening brace (such as a Markdown
+    code fence) and anything after the closing brace is ignored.
+    """
+
+    def __init__(self):
+        self._stack = []      # [container, current key or next index]
+        self._state = 'seek'
+        self._buffer = []
+        self._escape = None
+        self._is_key = False
+        self._delta_start = 0
+        self.result = None
+
+    @property
+    def done(self):
+        return self._state == 'done'
+
+    def _path(self):
+        return tuple(slot for _, slot in self._stack)
+
+    def feed(self, text):
+        events = []
+        for ch in text:
+            self._step(ch, events)
+        if self._state == 'string' and not self._is_key:
+            self._flush_delta(events)
+        return events
+
+    def close(self):
+        """Return the parsed object; ValueError if the document is incomplete"""
+        if self._state != 'done':
+            raise ValueError('Incomplete JSON document')
+        return self.result
+
+    def _flush_delta(self, events):
+        if len(self._buffer) > self._delta_start:
+            events.append(('delta', self._path(), ''.join(self._buffer[self._delta_start:])))
+            self._delta_start = len(self._buffer)
+
+    def _open(self, container):
+        self._stack.append([container, None if isinstance(container, dict) else 0])
+        self._state = 'key' if isinstance(container, dict) else 'value'
+
+    def _close(self, events):
+        container, _ = self._stack.pop()
+        self._store(container, events)
+
+    def _store(self, value, events):
+        if not self._stack:
+            self.result = value
+            self._state = 'done'
+            return
+        container, slot = self._stack[-1]
+        if isinstance(container, dict):
+            container[slot] = value
+        else:
+            container.append(value)
+        events.append(('value', self._path(), value))
+        self._state = 'after'
+
+    def _finish_string(self, events):
+        # Surrogate pairs from \\u escapes are joined here
+        text = ''.join(self._buffer).encode('utf-16', 'surrogatepass').decode('utf-16')
+        if self._is_key:
+            self._stack[-1][1] = text
+            self._state = 'colon'
+        else:
+            self._flush_delta(events)
+            self._store(text, events)
+
+    def _finish_scalar(self, events):
+        self._store(json.loads(''.join(self._buffer)), events)
+
+    def _step(self, ch, events):
+        state = self._state
+        if state == 'string':
+            if self._escape == '\\':
+                if ch == 'u':
+                    self._escape = 'u'
+                else:
+                    self._buffer.append(ESCAPES.get(ch, ch))
+                    self._escape = None
+            elif self._escape:
+                self._escape += ch
+                if len(self._escape) == 5:
+                    self._buffer.append(chr(int(self._escape[1:], 16)))
+                    self._escape = None
+            elif ch == '\\':
+                self._escape = '\\'
+            elif ch == '"':
+                self._finish_string(events)
+            else:
+                self._buffer.append(ch)
+            return
+
+        if state == 'scalar':
+            if ch not in WHITESPACE and ch not in ',}]':
+                self._buffer.append(ch)
+                return
+            self._finish_scalar(events)
+            state = self._state
+
+        if state == 'done' or ch in WHITESPACE:
+            return
+        if state == 'seek':
+            if ch == '{':
+                self._open({})
+            return
+
+        top = self._stack[-1][0]
+        if state == 'key':
+            if ch == '"':
+                self._start_string(is_key=True)
+            elif ch == '}':
+                self._close(events)
+            else:
+                raise ValueError(f'Expected an object key, got {ch!r}')
+        elif state == 'colon':
+            if ch != ':':
+                raise ValueError(f"Expected ':', got {ch!r}")
+            self._state = 'value'
+        elif state == 'value':
+            if ch == '"':
+                self._start_string(is_key=False)
+            elif ch == '{':
+                self._open({})
+            elif ch == '[':
+                self._open([])
+            elif ch == ']' and isinstance(top, list) and not top:
+                self._close(events)
+            else:
+                self._buffer = [ch]
+                self._state = 'scalar'
+        elif state == 'after':
+            if ch == ',':
+                if isinstance(top, dict):
+                    self._state = 'key'
+                else:
+                    self._stack[-1][1] += 1
+                    self._state = 'value'
+            elif (ch == '}' and isinstance(top, dict)) or (ch == ']' and isinstance(top, list)):
+                self._close(events)
+            else:
+                raise ValueError(f'Unexpected {ch!r} after a value')
+
+    def _start_string(self, is_key):
+        self._buffer = []
+        self._delta_start = 0
+        self._escape = None
+        self._is_key = is_key
+        self._state = 'string'
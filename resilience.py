@@ -0,0 +1,195 @@
+"""
+Deadlines, retries and circuit breakers for outbound Supabase and OpenAI calls
+
+Each request gets a time budget (begin_request/end_request, called from the
+Flask hooks in app.py). Every outbound call made through a TracedClient or
+the OpenAI gateway with an Upstream attached
+- gets a timeout of min(the upstream's per-call timeout, what is left of the
+  request budget), and fails at once with DeadlineExceeded when nothing is left
+- is retried, when idempotent (reads), with full-jitter exponential backoff
+  as long as the budget allows; a client that cannot take a per-call
+  timeout (Supabase: a fixed client-level timeout) is only retried while a
+  full `timeout` still fits in what is left, so a retry never overruns it
+- is refused with CircuitOpen while the upstream's breaker is open: once the
+  error rate over the last `window` seconds crosses the threshold, calls fail
+  fast for `cooldown` seconds, then a single probe decides whether to close
+Callers already treat any exception as "use the local/cached path", so an
+outage costs a fast fallback instead of a worker stuck for minutes.
+"""
+
+import random
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before an outbound call could be made"""
+
+
+class CircuitOpen(Exception):
+    """The upstream's circuit breaker is open; the call was not attempted"""
+
+
+class Rejected(Exception):
+    """Refused locally (e.g. by a rate limiter) before reaching the upstream; not a health signal"""
+
+
+def begin_request(budget_seconds):
+    _local.deadline = time.monotonic() + budget_seconds if budget_seconds else None
+
+
+def end_request():
+    _local.deadline = None
+
+
+def remaining():
+    """Seconds left in the current request's budget (None outside a request)"""
+    deadline = getattr(_local, 'deadline', None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_transient(exc):
+    """Whether an error says something about the upstream's health (worth retrying / counting)"""
+    if isinstance(exc, (DeadlineExceeded, CircuitOpen, Rejected)):
+        return False
+    status = getattr(exc, 'status_code', None) or getattr(getattr(exc, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status >= 500 or status in (408, 429)
+    # PostgREST application errors (constraint violations, bad filters) carry a code
+    if getattr(exc, 'code', None) and getattr(exc, 'details', None) is not None:
+        return False
+    return True
+
+
+class CircuitBreaker:
+    """Error-rate breaker over a sliding window of one-second buckets"""
+
+    def __init__(self, name, error_rate=0.5, min_calls=10, window=30, cooldown=15.0):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = None
+        self.short_circuits = 0
+        self.transitions = 0
+        self._buckets = {}
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _counts(self, now):
+        horizon = int(now) - self.window
+        for second in [s for s in self._buckets if s <= horizon]:
+            del self._buckets[second]
+        calls = sum(c for c, _ in self._buckets.values())
+        failures = sum(f for _, f in self._buckets.values())
+        return calls, failures
+
+    def _set_state(self, state, now):
+        if state != self.state:
+            print(f"[WARN] {self.name} circuit {self.state} -> {state}")
+            self.state = state
+            self.transitions += 1
+        self.opened_at = now if state == OPEN else None
+        if state != OPEN:
+            self._probing = False
+
+    def allow(self):
+        """True when a call may go out (in half-open state, only the single probe)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self._set_state(HALF_OPEN, now)
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return True
+            self.short_circuits += 1
+            return False
+
+    def record(self, success):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._buckets.clear()
+                self._set_state(CLOSED if success else OPEN, now)
+                return
+            calls, failures = self._buckets.get(int(now), (0, 0))
+            self._buckets[int(now)] = (calls + 1, failures + (0 if success else 1))
+            calls, failures = self._counts(now)
+            if self.state == CLOSED and calls >= self.min_calls and failures / calls >= self.error_rate:
+                self._set_state(OPEN, now)
+
+    def stats(self):
+        with self._lock:
+            calls, failures = self._counts(time.monotonic())
+            return {
+                'state': self.state,
+                'window_calls': calls,
+                'window_failures': failures,
+                'short_circuits': self.short_circuits,
+                'transitions': self.transitions
+            }
+
+
+class Upstream:
+    """Call policy for one service: per-call timeout, retries for idempotent operations, a breaker"""
+
+    def __init__(self, name, timeout, retries=2, backoff=0.1, max_backoff=2.0,
+                 idempotent=None, timeout_kwarg=False, breaker=None):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idempotent = idempotent or (lambda operation: False)
+        # Whether the client accepts a per-call `timeout=` argument (OpenAI does)
+        self.timeout_kwarg = timeout_kwarg
+        self.breaker = breaker or CircuitBreaker(name)
+        self.retried = 0
+
+    def _timeout(self, operation):
+        left = remaining()
+        if left is None:
+            return self.timeout
+        if left <= 0:
+            raise DeadlineExceeded(f'{self.name} {operation}: request budget exhausted')
+        return min(self.timeout, left)
+
+    def call(self, operation, attempt):
+        """Run attempt(timeout) under the policy; `timeout` is None unless timeout_kwarg is set"""
+        retries = self.retries if self.idempotent(operation) else 0
+        for number in range(retries + 1):
+            timeout = self._timeout(operation)
+            if not self.breaker.allow():
+                raise CircuitOpen(f'{self.name} circuit open, {operation} not attempted')
+            try:
+                result = attempt(timeout if self.timeout_kwarg else None)
+            except Exception as e:
+                transient = is_transient(e)
+                self.breaker.record(not transient)
+                if not transient or number == retries:
+                    raise
+                # Full jitter: anywhere up to the exponential step, never past the budget
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** number))
+                left = remaining()
+                if left is not None and delay >= left:
+                    raise
+                # Without a per-call timeout the next attempt may run the full client timeout
+                if left is not None and not self.timeout_kwarg and left - delay < self.timeout:
+                    raise
+                self.retried += 1
+                time.sleep(delay)
+                continue
+            self.breaker.record(True)
+            return result
+
+    def stats(self):
+        return dict(self.breaker.stats(), retries=self.retried)
@@ -0,0 +1,146 @@
+"""
+Full-text search over journal entries
+
+Cloud mode uses a generated `search_vector` tsvector column with a GIN index
+and the `search_journal_entries` SQL function (database/setup.sql). Local
+mode uses an FTS5 virtual table kept in sync with journal_entries by
+triggers. Both stem terms (English / Porter), treat every term as a prefix,
+rank by relevance and return a highlighted snippet per match.
+"""
+
+import json
+import re
+
+MAX_TERMS = 8
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+
+_TERM_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+SQLITE_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS journal_entries_fts USING fts5(
+        content,
+        content='journal_entries',
+        content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_journal_entries_fts_insert
+    AFTER INSERT ON journal_entries
+    BEGIN
+        INSERT INTO journal_entries_fts (rowid, content) VALUES (NEW.id, NEW.content);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_journal_entries_fts_delete
+    AFTER DELETE ON journal_entries
+    BEGIN
+        INSERT INTO journal_entries_fts (journal_entries_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_journal_entries_fts_update
+    AFTER UPDATE OF content ON journal_entries
+    BEGIN
+        INSERT INTO journal_entries_fts (journal_entries_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        INSERT INTO journal_entries_fts (rowid, content) VALUES (NEW.id, NEW.content);
+    END
+    ''',
+]
+
+
+def install_sqlite(db):
+    """Create the FTS5 index and sync triggers; indexes existing rows when new"""
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'journal_entries_fts'"
+    ).fetchone()
+    for statement in SQLITE_SCHEMA:
+        db.execute(statement)
+    if not exists:
+        db.execute("INSERT INTO journal_entries_fts (journal_entries_fts) VALUES ('rebuild')")
+
+
+def parse_terms(query):
+    """Split a user query into at most MAX_TERMS lowercase word terms"""
+    return _TERM_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def to_tsquery(terms):
+    """Prefix-matching tsquery text, e.g. 'work:* & stress:*'"""
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def to_fts5_match(terms):
+    """Prefix-matching FTS5 MATCH expression, e.g. '"work"* "stress"*'"""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+# Same buckets as the dashboard's sentiment filter
+SENTIMENT_FILTERS = {
+    'positive': 'e.sentiment_score > 0.3',
+    'negative': 'e.sentiment_score < -0.3',
+    'neutral': 'e.sentiment_score BETWEEN -0.3 AND 0.3',
+}
+
+
+def supabase_search(client, user_id, terms, start_date=None, end_date=None,
+                    sentiment=None, limit=20, cursor=None):
+    """Ranked search through the search_journal_entries SQL function"""
+    params = {
+        'search_user': user_id,
+        'search_query': to_tsquery(terms),
+        'start_date': start_date,
+        'end_date': end_date,
+        'sentiment_filter': sentiment,
+        'result_limit': limit,
+        'highlight_start': SNIPPET_START,
+        'highlight_stop': SNIPPET_STOP,
+    }
+    if cursor:
+        params['after_rank'], params['after_created_at'], params['after_id'] = cursor
+    return client.rpc('search_journal_entries', params).execute().data
+
+
+def sqlite_search(db, user_id, terms, start_date=None, end_date=None,
+                  sentiment=None, limit=20, cursor=None):
+    """Ranked search against the local FTS5 index (higher rank = more relevant)"""
+    where = ['journal_entries_fts MATCH ?', 'e.user_id = ?']
+    params = [to_fts5_match(terms), user_id]
+    if start_date:
+        where.append('e.created_at >= ?')
+        params.append(start_date)
+    if end_date:
+        where.append('e.created_at < ?')
+        params.append(end_date)
+    if sentiment in SENTIMENT_FILTERS:
+        where.append(SENTIMENT_FILTERS[sentiment])
+
+    sql = f'''
+        SELECT * FROM (
+            SELECT e.*, -bm25(journal_entries_fts) AS rank,
+                   snippet(journal_entries_fts, 0, ?, ?, '…', 16) AS snippet
+            FROM journal_entries_fts
+            JOIN journal_entries e ON e.id = journal_entries_fts.rowid
+            WHERE {' AND '.join(where)}
+        )
+    '''
+    params = [SNIPPET_START, SNIPPET_STOP] + params
+    if cursor:
+        sql += ' WHERE (rank, created_at, id) < (?, ?, ?)'
+        params.extend(cursor)
+    sql += ' ORDER BY rank DESC, created_at DESC, id DESC LIMIT ?'
+    params.append(limit)
+    return [_parse_row(row) for row in db.execute(sql, params)]
+
+
+def _parse_row(row):
+    row = dict(row)
+    for key in ('emotions', 'key_themes'):
+        if isinstance(row.get(key), str):
+            try:
+                row[key] = json.loads(row[key])
+            except ValueError:
+                row[key] = []
+    return row
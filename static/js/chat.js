@@ -4,7 +4,6 @@
 // Industry Standard Implementation
 // ===================================
 
-let currentChatEntryId = null;
 let chatHistory = [];
 let isChatPanelOpen = false;
 
@@ -67,19 +66,10 @@ async function sendChatMessage() {
     showTypingIndicator();
 
     try {
-        // Get most recent entry if no specific entry selected
-        if (!currentChatEntryId) {
-            const entries = await fetch('/api/journal/entries').then(r => r.json());
-            if (entries.entries && entries.entries.length > 0) {
-                currentChatEntryId = entries.entries[0].id;
-            }
-        }
-
         const response = await fetch("/api/chat/reflect", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({
-                entry_id: currentChatEntryId,
                 message: message,
                 history: chatHistory
             })
@@ -30,8 +30,12 @@ document.getElementById('journalForm').addEventListener('submit', async (e) => {
         const data = await response.json();
 
         if (data.success) {
-            // Show analysis preview
-            displayAnalysis(data.analysis);
+            // Show analysis preview (async mode: poll until the analysis is ready)
+            if (data.analysis_status === 'pending') {
+                pollAnalysis(data.analysis_url);
+            } else {
+                displayAnalysis(data.analysis);
+            }
 
             // Clear form
             document.getElementById('journalContent').value = '';
@@ -57,7 +61,7 @@ function displayAnalysis(analysis) {
 
     const sentimentLabel = getSentimentLabel(analysis.sentiment_score);
     const emotionTags = analysis.emotions.map(e =>
-        `<span class="emotion-tag">${e}</span>`
+        `<span class="emotion-tag">${escapeHtml(e)}</span>`
     ).join('');
 
     preview.innerHTML = `
@@ -72,7 +76,7 @@ function displayAnalysis(analysis) {
             <div class="emotion-tags">${emotionTags}</div>
         </div>
         <div>
-            <strong>Insight:</strong> ${analysis.brief_insight}
+            <strong>Insight:</strong> ${escapeHtml(analysis.brief_insight)}
         </div>
     `;
 
@@ -93,18 +97,39 @@ function displayAnalysis(analysis) {
     }, 15000);
 }
 
+// Poll a pending analysis until the background worker has finished
+async function pollAnalysis(url, attempts = 30) {
+    for (let i = 0; i < attempts; i++) {
+        try {
+            const response = await fetch(url);
+            const data = await response.json();
+
+            if (data.analysis_status && data.analysis_status !== 'pending') {
+                displayAnalysis(data.analysis);
+                await loadRecentEntries();
+                return;
+            }
+
+            await new Promise(resolve => setTimeout(resolve, data.retry_after_ms || 1000));
+        } catch (error) {
+            console.error('Error polling analysis:', error);
+            return;
+        }
+    }
+}
+
 // Load recent entries
 async function loadRecentEntries() {
     const container = document.getElementById('recentEntries');
 
     try {
-        const response = await fetch('/api/journal/entries');
+        const response = await fetch('/api/journal/entries?limit=10&view=summary');
         const data = await response.json();
 
         if (data.entries && data.entries.length > 0) {
             displayEntries(data.entries.slice(0, 10));
-            updateChart(data.entries);
-            updateMetrics(data.entries);
+            loadTrends();
+            loadMetrics();
         } else {
             container.innerHTML = '<div class="loading-state">No entries yet. Start journaling!</div>';
         }
@@ -113,50 +138,27 @@ async function loadRecentEntries() {
     }
 }
 
-// Calculate and Update Metrics
-function updateMetrics(entries) {
-    if (!entries || entries.length === 0) {
-        document.getElementById('totalEntries').textContent = '0';
-        document.getElementById('positiveMood').textContent = '0%';
-        document.getElementById('weeklyEntries').textContent = '0';
-        document.getElementById('currentStreak').textContent = '0 days';
-        return;
-    }
+// Load dashboard metrics (computed server-side from daily rollups)
+async function loadMetrics() {
+    try {
+        const response = await fetch('/api/stats/metrics');
+        const metrics = await response.json();
 
-    // Total Entries
-    document.getElementById('totalEntries').textContent = entries.length;
-
-    // Positive Mood Percentage
-    const positiveCount = entries.filter(e => e.sentiment_score > 0.3).length;
-    const positivePercentage = Math.round((positiveCount / entries.length) * 100);
-    document.getElementById('positiveMood').textContent = `${positivePercentage}%`;
-
-    // This Week Entries
-    const oneWeekAgo = new Date();
-    oneWeekAgo.setDate(oneWeekAgo.getDate() - 7);
-    const weeklyCount = entries.filter(e => new Date(e.created_at) >= oneWeekAgo).length;
-    document.getElementById('weeklyEntries').textContent = weeklyCount;
-
-    // Current Streak (consecutive days with entries)
-    const sortedEntries = [...entries].sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-    let streak = 0;
-    let currentDate = new Date();
-    currentDate.setHours(0, 0, 0, 0);
-
-    for (let entry of sortedEntries) {
-        const entryDate = new Date(entry.created_at);
-        entryDate.setHours(0, 0, 0, 0);
-
-        const daysDiff = Math.floor((currentDate - entryDate) / (1000 * 60 * 60 * 24));
-
-        if (daysDiff === streak) {
-            streak++;
-            currentDate.setDate(currentDate.getDate() - 1);
-        } else if (daysDiff > streak) {
-            break;
+        if (!metrics.error) {
+            updateMetrics(metrics);
         }
+    } catch (error) {
+        console.error('Error loading metrics:', error);
     }
+}
+
+// Update metric cards
+function updateMetrics(metrics) {
+    const streak = metrics.current_streak || 0;
 
+    document.getElementById('totalEntries').textContent = metrics.total_entries || 0;
+    document.getElementById('positiveMood').textContent = `${metrics.positive_mood_percent || 0}%`;
+    document.getElementById('weeklyEntries').textContent = metrics.weekly_entries || 0;
     document.getElementById('currentStreak').textContent = `${streak} day${streak !== 1 ? 's' : ''}`;
 }
 
@@ -175,7 +177,8 @@ function initializeChart() {
                 backgroundColor: 'rgba(99, 102, 241, 0.1)',
                 borderWidth: 2,
                 fill: true,
-                tension: 0.4
+                tension: 0.4,
+                spanGaps: true
             }]
         },
         options: {
@@ -204,19 +207,24 @@ function initializeChart() {
     });
 }
 
-// Update chart with entry data
-function updateChart(entries) {
-    if (!sentimentChart || !entries.length) return;
+// Chart the daily mean sentiment of the last 14 days (days without entries are bridged)
+async function loadTrends() {
+    if (!sentimentChart) return;
 
-    const last7Days = entries.slice(0, 7).reverse();
-
-    sentimentChart.data.labels = last7Days.map(e => {
-        const date = new Date(e.created_at);
-        return date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
-    });
+    try {
+        const response = await fetch('/api/analytics/trends?days=14');
+        if (!response.ok) return;
+        const trends = await response.json();
 
-    sentimentChart.data.datasets[0].data = last7Days.map(e => e.sentiment_score);
-    sentimentChart.update();
+        sentimentChart.data.labels = trends.days.map(day => {
+            const date = new Date(`${day}T00:00:00`);
+            return date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+        });
+        sentimentChart.data.datasets[0].data = trends.daily_mean;
+        sentimentChart.update();
+    } catch (error) {
+        console.error('Failed to load trends:', error);
+    }
 }
 
 // Generate weekly report
@@ -229,8 +237,7 @@ document.getElementById('generateReportBtn').addEventListener('click', async ()
     reportDiv.classList.add('show');
 
     try {
-        const response = await fetch('/api/weekly-report');
-        const data = await response.json();
+        const data = await streamWeeklyReport();
 
         if (data.report) {
             displayWeeklyReport(data.report);
@@ -244,6 +251,80 @@ document.getElementById('generateReportBtn').addEventListener('click', async ()
     }
 });
 
+// Stream the weekly report over SSE: statistics render immediately, GPT-4o text as it is written
+async function streamWeeklyReport() {
+    const response = await fetch('/api/weekly-report/stream');
+    if (!response.ok || !response.body) {
+        return (await fetch('/api/weekly-report')).json();
+    }
+
+    const partial = {
+        overall_mood: '…',
+        trajectory: '',
+        key_insights: [],
+        recommendations: []
+    };
+    let result = null;
+    let renderQueued = false;
+    const render = () => {
+        if (renderQueued) return;
+        renderQueued = true;
+        requestAnimationFrame(() => {
+            renderQueued = false;
+            if (!result) displayWeeklyReport(partial);
+        });
+    };
+
+    const applyText = (path, text, replace) => {
+        const [key, index] = path;
+        if (!(key in partial)) return;
+        if (index === undefined) {
+            if (Array.isArray(partial[key])) return;
+            partial[key] = replace || partial[key] === '…' ? text : partial[key] + text;
+        } else {
+            partial[key][index] = replace ? text : (partial[key][index] || '') + text;
+        }
+    };
+
+    const handleEvent = (event, data) => {
+        if (event === 'stats') {
+            Object.assign(partial, data);
+        } else if (event === 'delta') {
+            applyText(data.path, data.text, false);
+        } else if (event === 'field') {
+            if (typeof data.value === 'string') applyText(data.path, data.value, true);
+        } else if (event === 'done') {
+            result = data;
+            return;
+        }
+        render();
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (!result) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let payload = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) payload += line.slice(6);
+            });
+            if (payload) handleEvent(event, JSON.parse(payload));
+        }
+    }
+
+    if (!result) throw new Error('Report stream ended early');
+    return result;
+}
+
 // Display weekly report
 function displayWeeklyReport(report) {
     const reportDiv = document.getElementById('weeklyReport');
@@ -453,24 +534,38 @@ sentimentFilter.addEventListener('change', () => {
     performSearch();
 });
 
-async function performSearch() {
+// Search results are paged with an opaque cursor ("Load more" fetches the next page)
+let searchResults = [];
+let searchNextCursor = null;
+
+async function performSearch(cursor = null) {
     const query = searchInput.value.trim();
     const sentiment = sentimentFilter.value;
 
     const container = document.getElementById('recentEntries');
-    container.innerHTML = '<div class="loading-state">Searching...</div>';
+    if (!cursor) {
+        container.innerHTML = '<div class="loading-state">Searching...</div>';
+    }
 
     try {
-        let url = '/api/journal/search?';
+        let url = '/api/journal/search?limit=20&view=summary&';
         if (query) url += `q=${encodeURIComponent(query)}&`;
         if (sentiment) url += `sentiment=${sentiment}&`;
+        if (cursor) url += `cursor=${encodeURIComponent(cursor)}&`;
 
         const response = await fetch(url);
         const data = await response.json();
 
         if (data.entries && data.entries.length > 0) {
-            displayEntries(data.entries);
-        } else {
+            searchResults = cursor ? searchResults.concat(data.entries) : data.entries;
+            searchNextCursor = data.next_cursor;
+            displayEntries(searchResults);
+
+            if (searchNextCursor) {
+                container.insertAdjacentHTML('beforeend',
+                    '<button class="btn btn-small btn-secondary" onclick="performSearch(searchNextCursor)">Load more</button>');
+            }
+        } else if (!cursor) {
             container.innerHTML = '<div class="loading-state">No entries found</div>';
         }
     } catch (error) {
@@ -489,7 +584,7 @@ function displayEntries(entries) {
         return `
             <div class="entry-item">
                 <div class="entry-date">${formatDate(date)}</div>
-                <div class="entry-content">${entry.content}</div>
+                <div class="entry-content">${entry.snippet || entry.content_preview || entry.content}</div>
                 <div class="entry-sentiment">
                     <span>Mood:</span>
                     <span class="sentiment-score sentiment-${sentimentLabel.toLowerCase()}">
@@ -502,7 +597,7 @@ function displayEntries(entries) {
                     </div>
                 </div>
                 <div class="entry-actions">
-                    <button class="btn btn-small btn-edit" onclick="openEditModal(${entry.id}, '${entry.content.replace(/'/g, "\\'")}')">
+                    <button class="btn btn-small btn-edit" onclick="openEditModal('${entry.id}')">
                         ✏️ Edit
                     </button>
                     <button class="btn btn-small btn-delete" onclick="deleteEntry(${entry.id})">
@@ -517,15 +612,26 @@ function displayEntries(entries) {
 // Edit Modal Functions
 let currentEditId = null;
 
-function openEditModal(entryId, content) {
-    currentEditId = entryId;
-    const modal = document.getElementById('editModal');
-    const editContent = document.getElementById('editContent');
+// Listings only carry a preview, so the full content is fetched when editing
+async function openEditModal(entryId) {
+    try {
+        const response = await fetch(`/api/journal/entry/${entryId}`);
+        const data = await response.json();
 
-    editContent.value = content;
-    editCharacterCounter.textContent = `${content.length} character${content.length !== 1 ? 's' : ''}`;
+        if (!data.entry) {
+            showNotification(data.error || 'Failed to load entry', 'error');
+            return;
+        }
 
-    modal.classList.add('show');
+        const content = data.entry.content;
+        currentEditId = entryId;
+        document.getElementById('editContent').value = content;
+        editCharacterCounter.textContent = `${content.length} character${content.length !== 1 ? 's' : ''}`;
+
+        document.getElementById('editModal').classList.add('show');
+    } catch (error) {
+        showNotification('An error occurred. Please try again.', 'error');
+    }
 }
 
 function closeEditModal() {
@@ -692,26 +798,6 @@ function displayWeeklyReport(report) {
     `;
 }
 
-// Update loadRecentEntries to use displayEntries
-async function loadRecentEntries() {
-    const container = document.getElementById('recentEntries');
-
-    try {
-        const response = await fetch('/api/journal/entries');
-        const data = await response.json();
-
-        if (data.entries && data.entries.length > 0) {
-            displayEntries(data.entries.slice(0, 10));
-            updateChart(data.entries);
-            updateMetrics(data.entries);
-        } else {
-            container.innerHTML = '<div class="loading-state">No entries yet. Start journaling!</div>';
-        }
-    } catch (error) {
-        container.innerHTML = '<div class="loading-state">Failed to load entries</div>';
-    }
-}
-
 // Make functions global for onclick handlers
 window.openEditModal = openEditModal;
 window.closeEditModal = closeEditModal;
@@ -0,0 +1,751 @@
+"""
+Storage backends for journal entries and users
+
+Routes talk to an entry repository instead of a specific database client:
+
+    insert(entry)                          -> stored row
+    insert_many(entries)                   -> number of rows inserted (one batch/transaction)
+    update(user_id, entry_id, fields, expect_status=None, expect_content=None)
+                                           -> row or None (None also when the row no
+                                              longer has that status / content)
+    delete(user_id, entry_id)              -> deleted row or None
+    delete_many(user_id, ids, since, until, sentiment)
+                                           -> ids deleted by one statement
+    update_many(user_id, fields, ids, since, until, sentiment)
+                                           -> ids given the same `fields` by one statement
+    update_each(user_id, updates)          -> ids updated from {id: fields} in one transaction
+    get(user_id, entry_id, columns='*')    -> row or None
+    range(user_id, since, until, sentiment, cursor, limit, descending, columns)
+                                           -> rows ordered by (created_at, id)
+    search(user_id, terms, start_date, end_date, sentiment, limit, cursor)
+                                           -> rows ranked by relevance, with rank and snippet
+    aggregate(user_id, since, until)       -> entry count and sentiment totals
+    pending(limit)                         -> rows still awaiting analysis (all users)
+
+`until` (and search's `end_date`) is an exclusive upper bound on created_at,
+compared with `<` by every backend; exclusive_end() turns an inclusive end
+date or timestamp from a request into one.
+
+Batch methods select rows by explicit `ids` (ids owned by someone else are
+simply not matched) or, with ids=None, by a created_at range plus sentiment
+bucket.
+
+`columns` may name the virtual `content_preview` column (see SUMMARY_COLUMNS):
+the start of the content cut at a word boundary, with a `truncated` flag, so
+listings do not ship full entry bodies.
+
+Backends: SupabaseEntries (cloud), SQLiteEntries (local file) and
+MemoryEntries (per-user sorted indexes, nothing persisted; for benchmarks
+and network-free local runs). Users live in SQLiteUsers / MemoryUsers;
+cloud mode authenticates through Supabase Auth instead.
+"""
+
+import bisect
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+
+import pagination
+import search_index
+
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+
+ENTRY_FIELDS = ('id', 'user_id', 'content', 'sentiment_score', 'emotions', 'key_themes',
+                'analysis_status', 'created_at', 'updated_at')
+
+# Listing projection: everything the dashboard needs except the full content
+PREVIEW_LENGTH = 200
+SUMMARY_COLUMNS = 'id, created_at, sentiment_score, emotions, key_themes, analysis_status, content_preview'
+# Backends read PREVIEW_LENGTH + 1 characters so a cut can be detected
+_SQLITE_PREVIEW = f'substr(content, 1, {PREVIEW_LENGTH + 1}) AS content_preview'
+
+_SENTIMENT_TESTS = {
+    'positive': lambda score: score > POSITIVE_THRESHOLD,
+    'negative': lambda score: score < NEGATIVE_THRESHOLD,
+    'neutral': lambda score: NEGATIVE_THRESHOLD <= score <= POSITIVE_THRESHOLD,
+}
+
+
+class DuplicateUserError(Exception):
+    """Raised when signing up with an email that is already registered"""
+
+
+def _now():
+    return datetime.utcnow().isoformat(sep=' ')
+
+
+def _local_time(value):
+    """Bring an ISO timestamp ('T' separator) into the 'YYYY-MM-DD HH:MM:SS' form stored locally"""
+    return str(value).replace('T', ' ') if value else value
+
+
+def exclusive_end(value):
+    """Exclusive bound for an inclusive end: the next day for a plain date, the next microsecond for a timestamp"""
+    if not value:
+        return value
+    text = str(value).strip()
+    if len(text) == 10:
+        return (datetime.fromisoformat(text) + timedelta(days=1)).date().isoformat()
+    parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    return (parsed + timedelta(microseconds=1)).isoformat(sep='T' if 'T' in text else ' ')
+
+
+def content_digest(content):
+    """Hex sha256 of an entry's content (matches the content_sha256 column in Supabase)"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _columns(columns):
+    return [c.strip() for c in columns.split(',')] if columns and columns != '*' else list(ENTRY_FIELDS)
+
+
+def make_preview(text, length=PREVIEW_LENGTH):
+    """(preview, truncated): `text` cut to at most `length` characters at a word boundary"""
+    if text is None or len(text) <= length:
+        return text, False
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip() + '…', True
+
+
+def _finish_preview(row):
+    if 'content_preview' in row:
+        row['content_preview'], row['truncated'] = make_preview(row['content_preview'])
+    return row
+
+
+def to_summary(row):
+    """Listing projection of a full row (search ranks and snippets are kept)"""
+    summary = {name: row.get(name) for name in _columns(SUMMARY_COLUMNS) if name != 'content_preview'}
+    summary['content_preview'], summary['truncated'] = make_preview(row.get('content'))
+    for key in ('rank', 'snippet'):
+        if key in row:
+            summary[key] = row[key]
+    return summary
+
+
+def summarize_scores(scores):
+    """Aggregate a sequence of sentiment scores"""
+    scores = [float(s) for s in scores]
+    count = len(scores)
+    return {
+        'entry_count': count,
+        'avg_sentiment': sum(scores) / count if count else 0,
+        'sentiment_min': min(scores) if scores else None,
+        'sentiment_max': max(scores) if scores else None,
+        'positive_count': sum(s > POSITIVE_THRESHOLD for s in scores),
+        'negative_count': sum(s < NEGATIVE_THRESHOLD for s in scores)
+    }
+
+
+class SupabaseEntries:
+    """Entries in the Supabase `journal_entries` table (RLS enforces ownership)"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def _table(self):
+        return self._client.table('journal_entries')
+
+    def _select(self, columns):
+        # '*' would also ship the search_vector and content_preview columns
+        return self._table().select(', '.join(ENTRY_FIELDS) if columns == '*' else columns)
+
+    def insert(self, entry):
+        result = self._table().insert(entry).execute()
+        return result.data[0] if result.data else None
+
+    def insert_many(self, entries):
+        # One multi-row INSERT statement (PostgREST runs it in a single transaction)
+        result = self._table().insert(list(entries)).execute()
+        return len(result.data or [])
+
+    def update(self, user_id, entry_id, fields, expect_status=None, expect_content=None):
+        query = self._table().update(fields).eq('id', entry_id)
+        if user_id is not None:
+            query = query.eq('user_id', user_id)
+        if expect_status:
+            query = query.eq('analysis_status', expect_status)
+        if expect_content is not None:
+            # Compared through the generated content_sha256 column, not the text in the URL
+            query = query.eq('content_sha256', content_digest(expect_content))
+        result = query.execute()
+        return result.data[0] if result.data else None
+
+    def delete(self, user_id, entry_id):
+        result = self._table()\
+            .delete()\
+            .eq('id', entry_id)\
+            .eq('user_id', user_id)\
+            .execute()
+        return result.data[0] if result.data else None
+
+    def get(self, user_id, entry_id, columns='*'):
+        result = self._select(columns)\
+            .eq('id', entry_id)\
+            .eq('user_id', user_id)\
+            .limit(1)\
+            .execute()
+        return _finish_preview(result.data[0]) if result.data else None
+
+    def _where(self, query, user_id, ids=None, since=None, until=None, sentiment=None):
+        query = query.eq('user_id', user_id)
+        if ids is not None:
+            query = query.in_('id', list(ids))
+        if since:
+            query = query.gte('created_at', since)
+        if until:
+            query = query.lt('created_at', until)
+        if sentiment == 'positive':
+            query = query.gt('sentiment_score', POSITIVE_THRESHOLD)
+        elif sentiment == 'negative':
+            query = query.lt('sentiment_score', NEGATIVE_THRESHOLD)
+        elif sentiment == 'neutral':
+            query = query.gte('sentiment_score', NEGATIVE_THRESHOLD).lte('sentiment_score', POSITIVE_THRESHOLD)
+        return query
+
+    def delete_many(self, user_id, ids=None, since=None, until=None, sentiment=None):
+        query = self._where(self._table().delete(), user_id, ids, since, until, sentiment)
+        return [row['id'] for row in query.execute().data]
+
+    def update_many(self, user_id, fields, ids=None, since=None, until=None, sentiment=None):
+        query = self._where(self._table().update(fields), user_id, ids, since, until, sentiment)
+        return [row['id'] for row in query.execute().data]
+
+    def update_each(self, user_id, updates):
+        # One UPDATE ... FROM jsonb_to_recordset statement (update_journal_entries_batch);
+        # never an upsert, which would re-insert a row deleted since it was selected
+        result = self._client.rpc('update_journal_entries_batch', {
+            'target_user': user_id,
+            'updates': [dict(fields, id=str(entry_id)) for entry_id, fields in updates.items()]
+        }).execute()
+        return [row['id'] for row in result.data]
+
+    def range(self, user_id, since=None, until=None, sentiment=None, cursor=None,
+              limit=None, descending=True, columns='*'):
+        query = self._where(self._select(columns), user_id, since=since, until=until, sentiment=sentiment)
+        if cursor:
+            # Keyset continuation (descending pages only)
+            query = query.or_(pagination.supabase_keyset_filter(cursor))
+        query = query\
+            .order('created_at', desc=descending)\
+            .order('id', desc=descending)
+        if limit is not None:
+            query = query.limit(limit)
+        return [_finish_preview(row) for row in query.execute().data]
+
+    def search(self, user_id, terms, start_date=None, end_date=None, sentiment=None, limit=20, cursor=None):
+        return search_index.supabase_search(
+            self._client, user_id, terms, start_date, end_date, sentiment, limit, cursor
+        )
+
+    def aggregate(self, user_id, since=None, until=None):
+        rows = self.range(user_id, since=since, until=until, columns='sentiment_score')
+        return summarize_scores(row['sentiment_score'] for row in rows)
+
+    def pending(self, limit=None):
+        query = self._table()\
+            .select('id, content')\
+            .eq('analysis_status', 'pending')\
+            .order('created_at', desc=False)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data
+
+
+def _decode_row(row):
+    row = dict(row)
+    for key in ('emotions', 'key_themes'):
+        if isinstance(row.get(key), str):
+            try:
+                row[key] = json.loads(row[key])
+            except ValueError:
+                row[key] = []
+    return _finish_preview(row)
+
+
+class SQLiteEntries:
+    """Entries in the local SQLite `journal_entries` table"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+
+    def _encode(self, fields):
+        fields = dict(fields)
+        for key in ('emotions', 'key_themes'):
+            if key in fields and not isinstance(fields[key], str):
+                fields[key] = json.dumps(fields[key])
+        return fields
+
+    def insert(self, entry):
+        entry = self._encode(entry)
+        entry.setdefault('created_at', _now())
+        entry.setdefault('updated_at', entry['created_at'])
+        names = list(entry)
+        db = self._get_db()
+        try:
+            row = db.execute(
+                f"INSERT INTO journal_entries ({', '.join(names)}) "
+                f"VALUES ({', '.join('?' for _ in names)}) RETURNING *",
+                [entry[n] for n in names]
+            ).fetchone()
+            db.commit()
+        finally:
+            db.close()
+        return _decode_row(row)
+
+    def insert_many(self, entries):
+        entries = [self._encode(entry) for entry in entries]
+        if not entries:
+            return 0
+        now = _now()
+        for entry in entries:
+            entry.setdefault('created_at', now)
+            entry.setdefault('updated_at', entry['created_at'])
+        names = list(entries[0])
+        db = self._get_db()
+        try:
+            with db:
+                db.executemany(
+                    f"INSERT INTO journal_entries ({', '.join(names)}) "
+                    f"VALUES ({', '.join('?' for _ in names)})",
+                    ([entry[n] for n in names] for entry in entries)
+                )
+        finally:
+            db.close()
+        return len(entries)
+
+    def update(self, user_id, entry_id, fields, expect_status=None, expect_content=None):
+        fields = self._encode(fields)
+        fields['updated_at'] = _now()
+        sql = f"UPDATE journal_entries SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?"
+        params = list(fields.values()) + [entry_id]
+        if user_id is not None:
+            sql += ' AND user_id = ?'
+            params.append(user_id)
+        if expect_status:
+            sql += ' AND analysis_status = ?'
+            params.append(expect_status)
+        if expect_content is not None:
+            sql += ' AND content = ?'
+            params.append(expect_content)
+        db = self._get_db()
+        try:
+            row = db.execute(sql + ' RETURNING *', params).fetchone()
+            db.commit()
+        finally:
+            db.close()
+        return _decode_row(row) if row else None
+
+    def delete(self, user_id, entry_id):
+        db = self._get_db()
+        try:
+            row = db.execute(
+                'DELETE FROM journal_entries WHERE id = ? AND user_id = ? RETURNING *',
+                (entry_id, user_id)
+            ).fetchone()
+            db.commit()
+        finally:
+            db.close()
+        return _decode_row(row) if row else None
+
+    def get(self, user_id, entry_id, columns='*'):
+        db = self._get_db()
+        try:
+            row = db.execute(
+                f"SELECT {columns.replace('content_preview', _SQLITE_PREVIEW)} "
+                'FROM journal_entries WHERE id = ? AND user_id = ?',
+                (entry_id, user_id)
+            ).fetchone()
+        finally:
+            db.close()
+        return _decode_row(row) if row else None
+
+    def _where(self, user_id, ids=None, since=None, until=None, sentiment=None):
+        """Conditions on `journal_entries e` and their parameters"""
+        where = ['e.user_id = ?']
+        params = [user_id]
+        if ids is not None:
+            where.append(f"e.id IN ({', '.join('?' for _ in ids)})")
+            params.extend(ids)
+        if since:
+            where.append('e.created_at >= ?')
+            params.append(_local_time(since))
+        if until:
+            where.append('e.created_at < ?')
+            params.append(_local_time(until))
+        if sentiment in search_index.SENTIMENT_FILTERS:
+            where.append(search_index.SENTIMENT_FILTERS[sentiment])
+        return where, params
+
+    def delete_many(self, user_id, ids=None, since=None, until=None, sentiment=None):
+        where, params = self._where(user_id, ids, since, until, sentiment)
+        db = self._get_db()
+        try:
+            rows = db.execute(
+                f"DELETE FROM journal_entries AS e WHERE {' AND '.join(where)} RETURNING id", params
+            ).fetchall()
+            db.commit()
+        finally:
+            db.close()
+        return [row['id'] for row in rows]
+
+    def update_many(self, user_id, fields, ids=None, since=None, until=None, sentiment=None):
+        fields = self._encode(fields)
+        fields['updated_at'] = _now()
+        where, params = self._where(user_id, ids, since, until, sentiment)
+        db = self._get_db()
+        try:
+            rows = db.execute(
+                f"UPDATE journal_entries AS e SET {', '.join(f'{name} = ?' for name in fields)} "
+                f"WHERE {' AND '.join(where)} RETURNING id",
+                list(fields.values()) + params
+            ).fetchall()
+            db.commit()
+        finally:
+            db.close()
+        return [row['id'] for row in rows]
+
+    def update_each(self, user_id, updates):
+        updates = {str(entry_id): self._encode(fields) for entry_id, fields in updates.items()}
+        if not updates:
+            return []
+        now = _now()
+        # All rows are given the same field names, so one statement serves the whole batch
+        names = list(next(iter(updates.values())))
+        where, params = self._where(user_id, ids=list(updates))
+        db = self._get_db()
+        try:
+            with db:
+                owned = [row['id'] for row in db.execute(
+                    f"SELECT e.id FROM journal_entries e WHERE {' AND '.join(where)}", params
+                )]
+                db.executemany(
+                    f"UPDATE journal_entries SET {', '.join(f'{name} = ?' for name in names)}, updated_at = ? "
+                    'WHERE id = ?',
+                    [[updates[str(entry_id)][name] for name in names] + [now, entry_id] for entry_id in owned]
+                )
+        finally:
+            db.close()
+        return owned
+
+    def range(self, user_id, since=None, until=None, sentiment=None, cursor=None,
+              limit=None, descending=True, columns='*'):
+        where, params = self._where(user_id, since=since, until=until, sentiment=sentiment)
+        if cursor:
+            where.append('(e.created_at < ? OR (e.created_at = ? AND e.id < ?))')
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        direction = 'DESC' if descending else 'ASC'
+        sql = (f"SELECT {columns.replace('content_preview', _SQLITE_PREVIEW)} "
+               f"FROM journal_entries e WHERE {' AND '.join(where)} "
+               f"ORDER BY e.created_at {direction}, e.id {direction}")
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        db = self._get_db()
+        try:
+            return [_decode_row(row) for row in db.execute(sql, params)]
+        finally:
+            db.close()
+
+    def search(self, user_id, terms, start_date=None, end_date=None, sentiment=None, limit=20, cursor=None):
+        db = self._get_db()
+        try:
+            return search_index.sqlite_search(
+                db, user_id, terms, _local_time(start_date), _local_time(end_date), sentiment, limit, cursor
+            )
+        finally:
+            db.close()
+
+    def aggregate(self, user_id, since=None, until=None):
+        where = ['user_id = ?']
+        params = [user_id]
+        if since:
+            where.append('created_at >= ?')
+            params.append(_local_time(since))
+        if until:
+            where.append('created_at < ?')
+            params.append(_local_time(until))
+        db = self._get_db()
+        try:
+            row = db.execute(
+                f'''SELECT COUNT(*) AS entry_count, AVG(sentiment_score) AS avg_sentiment,
+                           MIN(sentiment_score) AS sentiment_min, MAX(sentiment_score) AS sentiment_max,
+                           COALESCE(SUM(sentiment_score > {POSITIVE_THRESHOLD}), 0) AS positive_count,
+                           COALESCE(SUM(sentiment_score < {NEGATIVE_THRESHOLD}), 0) AS negative_count
+                    FROM journal_entries WHERE {' AND '.join(where)}''',
+                params
+            ).fetchone()
+        finally:
+            db.close()
+        result = dict(row)
+        result['avg_sentiment'] = result['avg_sentiment'] or 0
+        return result
+
+    def pending(self, limit=None):
+        sql = "SELECT id, content FROM journal_entries WHERE analysis_status = 'pending' ORDER BY created_at"
+        params = []
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        db = self._get_db()
+        try:
+            return [dict(row) for row in db.execute(sql, params)]
+        finally:
+            db.close()
+
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_SUFFIXES = ('ing', 'ed', 'es', 's')
+
+
+def _stem(word):
+    """Crude suffix stripping so 'running'/'runs' meet 'run' (no dictionary)"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    # 'running' -> 'runn' -> 'run'
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+        word = word[:-1]
+    return word
+
+
+class MemoryEntries:
+    """Entries held in process memory with a sorted (created_at, id) index per user"""
+
+    def __init__(self):
+        self._rows = {}
+        self._index = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+
+    def _copy(self, row, columns='*'):
+        copied = {name: row.get(name) for name in _columns(columns)}
+        if 'content_preview' in copied:
+            copied['content_preview'] = row['content'][:PREVIEW_LENGTH + 1]
+            _finish_preview(copied)
+        for key in ('emotions', 'key_themes'):
+            if isinstance(copied.get(key), list):
+                copied[key] = list(copied[key])
+        return copied
+
+    def _key(self, row):
+        return (row['created_at'], row['id'])
+
+    def insert(self, entry):
+        with self._lock:
+            row = {name: None for name in ENTRY_FIELDS}
+            row.update(emotions=[], key_themes=[], analysis_status='complete')
+            row.update(entry)
+            row['id'] = self._next_id
+            self._next_id += 1
+            row['created_at'] = _local_time(row.get('created_at')) or _now()
+            row['updated_at'] = row.get('updated_at') or row['created_at']
+            self._rows[row['id']] = row
+            bisect.insort(self._index.setdefault(row['user_id'], []), self._key(row))
+            return self._copy(row)
+
+    def insert_many(self, entries):
+        with self._lock:
+            for entry in entries:
+                self.insert(entry)
+        return len(entries)
+
+    def _owned(self, user_id, entry_id):
+        try:
+            row = self._rows.get(int(entry_id))
+        except (TypeError, ValueError):
+            return None
+        if row is None or (user_id is not None and row['user_id'] != user_id):
+            return None
+        return row
+
+    def update(self, user_id, entry_id, fields, expect_status=None, expect_content=None):
+        with self._lock:
+            row = self._owned(user_id, entry_id)
+            if row is None or (expect_status and row['analysis_status'] != expect_status):
+                return None
+            if expect_content is not None and row['content'] != expect_content:
+                return None
+            index = self._index[row['user_id']]
+            index.remove(self._key(row))
+            row.update(fields)
+            row['updated_at'] = _now()
+            bisect.insort(index, self._key(row))
+            return self._copy(row)
+
+    def delete(self, user_id, entry_id):
+        with self._lock:
+            row = self._owned(user_id, entry_id)
+            if row is None:
+                return None
+            self._index[row['user_id']].remove(self._key(row))
+            del self._rows[row['id']]
+            return self._copy(row)
+
+    def _matching(self, user_id, ids=None, since=None, until=None, sentiment=None):
+        """Rows of a batch selection (callers hold the lock)"""
+        if ids is not None:
+            rows = (self._owned(user_id, entry_id) for entry_id in ids)
+            return list({row['id']: row for row in rows if row is not None}.values())
+        test = _SENTIMENT_TESTS.get(sentiment)
+        return [
+            row for row in self._scan(user_id, since, until)
+            if not test or test(float(row['sentiment_score']))
+        ]
+
+    def delete_many(self, user_id, ids=None, since=None, until=None, sentiment=None):
+        with self._lock:
+            return [self.delete(user_id, row['id'])['id']
+                    for row in self._matching(user_id, ids, since, until, sentiment)]
+
+    def update_many(self, user_id, fields, ids=None, since=None, until=None, sentiment=None):
+        with self._lock:
+            return [self.update(user_id, row['id'], fields)['id']
+                    for row in self._matching(user_id, ids, since, until, sentiment)]
+
+    def update_each(self, user_id, updates):
+        updates = {str(entry_id): fields for entry_id, fields in updates.items()}
+        with self._lock:
+            return [self.update(user_id, row['id'], updates[str(row['id'])])['id']
+                    for row in self._matching(user_id, list(updates))]
+
+    def get(self, user_id, entry_id, columns='*'):
+        with self._lock:
+            row = self._owned(user_id, entry_id)
+            return self._copy(row, columns) if row else None
+
+    def _scan(self, user_id, since=None, until=None, cursor=None, descending=True):
+        """Rows in index order in [since, until) (and strictly before a keyset cursor)"""
+        index = self._index.get(user_id, [])
+        lo = bisect.bisect_left(index, (_local_time(since),)) if since else 0
+        hi = bisect.bisect_left(index, (_local_time(until),)) if until else len(index)
+        if cursor:
+            hi = min(hi, bisect.bisect_left(index, (cursor[0], cursor[1])))
+        keys = index[lo:hi]
+        for key in (reversed(keys) if descending else keys):
+            yield self._rows[key[1]]
+
+    def range(self, user_id, since=None, until=None, sentiment=None, cursor=None,
+              limit=None, descending=True, columns='*'):
+        test = _SENTIMENT_TESTS.get(sentiment)
+        rows = []
+        with self._lock:
+            for row in self._scan(user_id, since, until, cursor, descending):
+                if test and not test(float(row['sentiment_score'])):
+                    continue
+                rows.append(self._copy(row, columns))
+                if limit is not None and len(rows) >= limit:
+                    break
+        return rows
+
+    def search(self, user_id, terms, start_date=None, end_date=None, sentiment=None, limit=20, cursor=None):
+        stems = [_stem(term) for term in terms]
+        test = _SENTIMENT_TESTS.get(sentiment)
+        matches = []
+        with self._lock:
+            for row in self._scan(user_id, start_date, end_date):
+                if test and not test(float(row['sentiment_score'])):
+                    continue
+                words = [_TOKEN_RE.findall(word.lower()) for word in row['content'].split()]
+                hits = [
+                    [i for i, tokens in enumerate(words) if any(t.startswith(stem) for t in tokens)]
+                    for stem in stems
+                ]
+                if not all(hits):
+                    continue
+                rank = round(sum(len(h) for h in hits) / (1 + len(words) ** 0.5), 6)
+                if cursor and (rank, row['created_at'], row['id']) >= tuple(cursor):
+                    continue
+                matches.append((rank, row, {i for h in hits for i in h}))
+        matches.sort(key=lambda m: (m[0], m[1]['created_at'], m[1]['id']), reverse=True)
+
+        results = []
+        for rank, row, positions in matches[:limit]:
+            entry = self._copy(row)
+            entry['rank'] = rank
+            entry['snippet'] = self._snippet(row['content'], positions)
+            results.append(entry)
+        return results
+
+    def _snippet(self, content, positions, width=16):
+        """Window of words around the first hit, matched words wrapped in <mark>"""
+        words = content.split()
+        start = max(0, min(positions) - width // 2) if positions else 0
+        marked = [
+            f'{search_index.SNIPPET_START}{word}{search_index.SNIPPET_STOP}' if i in positions else word
+            for i, word in enumerate(words[start:start + width], start)
+        ]
+        prefix = '…' if start else ''
+        suffix = '…' if start + width < len(words) else ''
+        return prefix + ' '.join(marked) + suffix
+
+    def aggregate(self, user_id, since=None, until=None):
+        with self._lock:
+            scores = [row['sentiment_score'] for row in self._scan(user_id, since, until)]
+        return summarize_scores(scores)
+
+    def pending(self, limit=None):
+        with self._lock:
+            rows = sorted(
+                (row for row in self._rows.values() if row['analysis_status'] == 'pending'),
+                key=self._key
+            )
+        return [{'id': row['id'], 'content': row['content']} for row in rows[:limit]]
+
+
+class SQLiteUsers:
+    """Local accounts in the SQLite `users` table"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+
+    def create(self, email, password):
+        import sqlite3
+        db = self._get_db()
+        try:
+            cursor = db.execute('INSERT INTO users (email, password) VALUES (?, ?)', (email, password))
+            db.commit()
+            return {'id': cursor.lastrowid, 'email': email}
+        except sqlite3.IntegrityError:
+            db.rollback()
+            raise DuplicateUserError(email)
+        finally:
+            db.close()
+
+    def authenticate(self, email, password):
+        db = self._get_db()
+        try:
+            user = db.execute('SELECT * FROM users WHERE email = ? AND password = ?',
+                              (email, password)).fetchone()
+        finally:
+            db.close()
+        return {'id': user['id'], 'email': user['email']} if user else None
+
+
+class MemoryUsers:
+    """Local accounts held in process memory"""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def create(self, email, password):
+        with self._lock:
+            if email in self._users:
+                raise DuplicateUserError(email)
+            user = {'id': len(self._users) + 1, 'email': email, 'password': password}
+            self._users[email] = user
+        return {'id': user['id'], 'email': email}
+
+    def authenticate(self, email, password):
+        user = self._users.get(email)
+        if user and user['password'] == password:
+            return {'id': user['id'], 'email': email}
+        return None
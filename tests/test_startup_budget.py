@@ -0,0 +1,66 @@
+"""
+Cold-start budget for the serverless entry point
+
+Runs benchmarks/profile_startup.py (fresh interpreters importing api/index.py)
+and fails when the median import time goes over STARTUP_BUDGET_MS, and checks
+that a cloud-mode cold start leaves the OpenAI/Supabase SDKs unimported.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE = os.path.join(ROOT, 'benchmarks', 'profile_startup.py')
+BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '1000'))
+
+
+def profile(mode):
+    result = subprocess.run(
+        [sys.executable, PROFILE, '--mode', mode, '--runs', '3', '--top', '1000',
+         '--budget-ms', str(BUDGET_MS), '--json'],
+        cwd=ROOT, capture_output=True, text=True, timeout=300
+    )
+    assert result.stdout, result.stderr
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize('mode', ['cloud', 'local'])
+def test_import_within_budget(mode):
+    results = profile(mode)
+    assert results['within_budget'], (
+        f"import {results['module']} ({mode}) took {results['import_ms']['median']} ms, "
+        f"budget {BUDGET_MS:.0f} ms; slowest: {results['slowest_imports'][:5]}"
+    )
+
+
+COLD_START = """
+import json, sys
+import api.index
+import app
+print(json.dumps({
+    'configured': {'supabase': app.supabase is not None, 'openai': app.openai_client is not None},
+    'imported': sorted(m for m in sys.modules if m.split('.')[0] in ('supabase', 'openai'))
+}))
+"""
+
+
+def test_clients_not_imported_on_cold_start(tmp_path):
+    # Stand-in SDK packages so find_spec succeeds and cloud mode wires up both
+    # clients even where the real SDKs are not installed
+    for package in ('supabase', 'openai'):
+        (tmp_path / package).mkdir()
+        (tmp_path / package / '__init__.py').write_text('')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), ROOT]), MODE='cloud',
+               SUPABASE_URL='https://stub.supabase.co', SUPABASE_KEY='stub-key',
+               SUPABASE_SERVICE_KEY='stub-service-key', OPENAI_API_KEY='sk-stub',
+               STORAGE_BACKEND='supabase', ANALYSIS_ENGINE='gpt')
+    result = subprocess.run([sys.executable, '-c', COLD_START], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report['configured'] == {'supabase': True, 'openai': True}
+    assert report['imported'] == []